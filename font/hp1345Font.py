@@ -13,61 +13,115 @@
 # pylint: skip-file
 
 
+import hashlib
+import os
+import pickle
+from functools import cache
+
+CHAR_INDEX_ROM = "./font/1816-1500.bin"
+VECTOR_TABLE_FILE = "./font/charVectors.pickle"
+
+
 class Font:
 	def __init__(self, romfile="./font/01347-80012.bin") -> None:
-		self.charVectorsList: list[list[list[tuple[int, int]]]] = [[]] * 256
-
 		with open(romfile, "rb") as f:
 			strokeRom = f.read()
-		with open("./font/1816-1500.bin", "rb") as f:
+		with open(CHAR_INDEX_ROM, "rb") as f:
 			charIndexRom = f.read()
 
-		used = [False] * len(strokeRom)
+		checksum = hashlib.sha256(strokeRom + charIndexRom).hexdigest()
+		cached = loadVectorTable(checksum)
+		if cached is not None:
+			self.charVectorsList = cached
+			return
+
+		self.charVectorsList = decodeRoms(strokeRom, charIndexRom)
+		saveVectorTable(checksum, self.charVectorsList)
+
+
+@cache
+def getFont() -> Font:
+	"""The default font, only loaded once per process"""
+	return Font()
+
+
+def loadVectorTable(checksum: str) -> list[list[list[tuple[int, int]]]] | None:
+	"""Load the previously decoded vectors, if they were decoded from ROMs with the same checksum"""
+	charVectorsList: list[list[list[tuple[int, int]]]]
+	try:
+		with open(VECTOR_TABLE_FILE, "rb") as f:
+			(cachedChecksum, charVectorsList) = pickle.load(f)
+	except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+		return None
+
+	if cachedChecksum != checksum:
+		return None
+	return charVectorsList
+
+
+def saveVectorTable(checksum: str, charVectorsList: list[list[list[tuple[int, int]]]]):
+	"""Save the decoded vectors so later runs can skip decoding the ROMs"""
+	tempFile = f"{VECTOR_TABLE_FILE}.tmp"
+	try:
+		with open(tempFile, "wb") as f:
+			pickle.dump((checksum, charVectorsList), f)
+		os.replace(tempFile, VECTOR_TABLE_FILE)
+	except OSError:
+		pass  # only an optimisation, the ROMs can be decoded again next time
+
+
+def decodeRoms(strokeRom: bytes, charIndexRom: bytes) -> list[list[list[tuple[int, int]]]]:
+	"""Decode the stroke and character index ROMs into a list of delta-vectors for each character"""
+	charVectorsList: list[list[list[tuple[int, int]]]] = [[]] * 256
+
+	used = [False] * len(strokeRom)
+
+	def buildchar(char: int):
+		# Address permutation of index ROM
+		ia = (char & 0x1F) | ((char & 0xE0) << 1)
 
-		def buildchar(char: int):
-			# Address permutation of index ROM
-			ia = (char & 0x1F) | ((char & 0xE0) << 1)
+		# Address permutation of stroke ROM
+		sa = charIndexRom[ia] << 2
+		sa |= ((1 ^ (char >> 5) ^ (char >> 6)) & 1) << 10
+		sa |= ((char >> 7) & 1) << 11
 
-			# Address permutation of stroke ROM
-			sa = charIndexRom[ia] << 2
-			sa |= ((1 ^ (char >> 5) ^ (char >> 6)) & 1) << 10
-			sa |= ((char >> 7) & 1) << 11
+		if not strokeRom[sa] and not strokeRom[sa + 1]:
+			return
 
-			if not strokeRom[sa] and not strokeRom[sa + 1]:
+		lines: list[list[tuple[int, int]]] = []
+		while True:
+			if used[sa]:
 				return
+			used[sa] = True
 
-			lines: list[list[tuple[int, int]]] = []
-			while True:
-				if used[sa]:
-					return
-				used[sa] = True
+			dx = strokeRom[sa] & 0x3F
+			if strokeRom[sa] & 0x40:
+				dx = -dx
 
-				dx = strokeRom[sa] & 0x3F
-				if strokeRom[sa] & 0x40:
-					dx = -dx
+			dy = strokeRom[sa + 1] & 0x3F
+			if strokeRom[sa + 1] & 0x40:
+				dy = -dy
 
-				dy = strokeRom[sa + 1] & 0x3F
-				if strokeRom[sa + 1] & 0x40:
-					dy = -dy
+			if not strokeRom[sa] & 0x80:
+				lines.append([])
 
-				if not strokeRom[sa] & 0x80:
-					lines.append([])
+			if len(lines) == 0:
+				lines.append([(0, 0)])
 
-				if len(lines) == 0:
-					lines.append([(0, 0)])
+			lines[-1].append((dx, dy))
 
-				lines[-1].append((dx, dy))
+			if strokeRom[sa + 1] & 0x80:
+				break
 
-				if strokeRom[sa + 1] & 0x80:
-					break
+			sa += 2
 
-				sa += 2
+		charVectorsList[char] = lines
 
-			self.charVectorsList[char] = lines
+	for i in range(128):
+		buildchar(i)
+	for i in (0x9B, 0x9E, 0x91, 0x82):
+		buildchar(i)
+	for i in range(128, 256):
+		buildchar(i)
 
-		for i in range(128):
-			buildchar(i)
-		for i in (0x9B, 0x9E, 0x91, 0x82):
-			buildchar(i)
-		for i in range(128, 256):
-			buildchar(i)
+	return charVectorsList
@@ -11,57 +11,64 @@
 
 
 import io
+from dataclasses import dataclass
+from functools import cache, lru_cache
 from io import StringIO
 
 from font.hp1345Font import Font
 
+CARRIAGE_RETURN = ord("\r")
+TEXT_CACHE_SIZE = 1024
 
-def charToPolylines(
-	svg: StringIO,
-	indent: int,
-	charLines: list[list[tuple[int, int]]],
-	x=0,
-	y=0,
-	fontColour: str = "#000000",
-	fontThickness: float = 0.8,
-) -> tuple[int, int]:
-	"""Create a set of polylines from the given character's vector data"""
+
+@dataclass(frozen=True)
+class Glyph:
+	"""A character's vector data, precompiled so text can be rendered by concatenation"""
+
+	path: str
+	"""Path data relative to the pen position before the character, e.g. " m1,2 l3,4 5,6" """
+	dots: tuple[tuple[int, int], ...]
+	"""Offsets of single point lines, which need drawing as circles (see QTBUG-132468)"""
+	advance: tuple[int, int]
+	"""How far the pen moves"""
+	boundingBox: tuple[int, int, int, int] | None
+	"""Offsets of the min x, min y, max x, and max y points, None if the character has no points"""
+
+
+def compileGlyph(charLines: list[list[tuple[int, int]]]) -> Glyph:
+	"""Precompile the given character's vector data"""
+	path = ""
+	dots = []
+	xs = []
+	ys = []
+	x, y = 0, 0
 	for line in charLines:
-		if len(line) == 1:
-			(dx, dy) = line[0]
+		path += linePath(line)
+		for dx, dy in line:
 			x += dx
 			y += dy
-		else:
-			x, y = lineToPolyline(svg, indent, line, x, y, fontColour, fontThickness)
-
-	return x, y
-
-
-def lineToPolyline(
-	svg: StringIO,
-	indent: int,
-	line: list[tuple[int, int]],
-	x: int,
-	y: int,
-	fontColour: str,
-	fontThickness: float,
-) -> tuple[int, int]:
-	"""Create a polyline for the given line"""
-	svg.write(f'{" " * indent}<polyline points="')
-	for dx, dy in line:
-		x += dx
-		y += dy
-		svg.write(f" {x},{y}")
-	svg.write('" />\n')
+			xs.append(x)
+			ys.append(y)
+
+		if len(line) > 1 and areVectorsSinglePoint(line):
+			dots.append((x, y))
+
+	boundingBox = (min(xs), min(ys), max(xs), max(ys)) if xs else None
+	return Glyph(path, tuple(dots), (x, y), boundingBox)
 
-	# workaround for QTBUG-132468
-	if areVectorsSinglePoint(line):
-		svg.write(
-			(" " * indent)
-			+ f"<circle cx='{x}' cy='{y}' r='{fontThickness / 2}' fill='{fontColour}' />\n"
-		)
 
-	return x, y
+def linePath(line: list[tuple[int, int]]) -> str:
+	"""Relative path data for a line, moving to its first point then drawing through the rest"""
+	return "".join(
+		f" m{dx},{dy}" if index == 0 else f" l{dx},{dy}" if index == 1 else f" {dx},{dy}"
+		for index, (dx, dy) in enumerate(line)
+	)
+
+
+@cache
+def compileGlyphs(font: Font) -> tuple[Glyph, ...]:
+	"""Precompile every character of the given font, only once per font"""
+	return tuple(compileGlyph(charLines) for charLines in font.charVectorsList)
 
 
 def areVectorsSinglePoint(line: list[tuple[int, int]]) -> bool:
@@ -91,14 +98,53 @@ def addLineToBoundingBox(line: list[tuple[int, int]], boundingBox: list[int], x:
 	return (boundingBox, x, y)
 
 
+def textBoundingBox(font: Font, text: bytes) -> list[int]:
+	"""Calculate the bounding box of the given text, including the origin"""
+	glyphs = compileGlyphs(font)
+	boundingBox = [0, 0, 0, 0]
+	x, y = 0, 0
+	for char in text:
+		if char == CARRIAGE_RETURN:
+			# resets x before each of its lines, so doesn't fit a precompiled bounding box
+			(boundingBox, x, y) = addCharToBoundingBox(font, char, boundingBox, x, y)
+			continue
+
+		glyph = glyphs[char]
+		if glyph.boundingBox is not None:
+			(minX, minY, maxX, maxY) = glyph.boundingBox
+			boundingBox[0] = min(boundingBox[0], x + minX)
+			boundingBox[1] = min(boundingBox[1], y + minY)
+			boundingBox[2] = max(boundingBox[2], x + maxX)
+			boundingBox[3] = max(boundingBox[3], y + maxY)
+		x += glyph.advance[0]
+		y += glyph.advance[1]
+	return boundingBox
+
+
 def textToSvg(svg: StringIO, font: Font, text: bytes, fontColour: str, fontThickness: float):
-	"""Add the text to the SVG using the given font"""
+	"""Add the text to the SVG using the given font, as a single path"""
+	glyphs = compileGlyphs(font)
+	pathParts = ["M0,0"]
+	dots = []
 	x, y = 0, 0
 	for char in text:
-		charLines = font.charVectorsList[char]
-		x, y = charToPolylines(svg, 6, charLines, x, y, fontColour, fontThickness)
-		if chr(char) == "\r":
+		glyph = glyphs[char]
+		pathParts.append(glyph.path)
+		for dotX, dotY in glyph.dots:
+			dots.append((x + dotX, y + dotY))
+		x += glyph.advance[0]
+		y += glyph.advance[1]
+
+		if char == CARRIAGE_RETURN:
 			x = 0
+			pathParts.append(f" M0,{y}")
+
+	svg.write(f'      <path d="{"".join(pathParts)}" />\n')
+
+	# workaround for QTBUG-132468
+	for dotX, dotY in dots:
+		svg.write(f"      <circle cx='{dotX}' cy='{dotY}' r='{fontThickness / 2}'")
+		svg.write(f" fill='{fontColour}' />\n")
 
 
 def makeTextGroup(
@@ -112,10 +158,7 @@ def makeTextGroup(
 	fontColour="#000000",
 ) -> tuple[str, float, float]:
 	"""Create an SVG group for the given text"""
-	boundingBox = [0, 0, 0, 0]
-	x1, y1 = 0, 0
-	for char in text:
-		(boundingBox, x1, y1) = addCharToBoundingBox(font, char, boundingBox, x1, y1)
+	boundingBox = textBoundingBox(font, text)
 
 	width = scale * (xOffset + 2 * border + boundingBox[2] - boundingBox[0])
 	height = scale * (yOffset + 2 * border + boundingBox[3] - boundingBox[1])
@@ -141,10 +184,7 @@ def makeSvgString(
 	font: Font, text: bytes, scale=2, offset=0, border=10, fontThickness=0.8, fontColour="#000000"
 ) -> tuple[str, int, int]:
 	"""Create an SVG for the given text"""
-	boundingBox = [0, 0, 0, 0]
-	x1, y1 = 0, 0
-	for char in text:
-		(boundingBox, x1, y1) = addCharToBoundingBox(font, char, boundingBox, x1, y1)
+	boundingBox = textBoundingBox(font, text)
 
 	width = scale * (offset + 2 * border + boundingBox[2] - boundingBox[0])
 	height = scale * (offset + 2 * border + boundingBox[3] - boundingBox[1])
@@ -170,3 +210,30 @@ def makeSvgString(
 
 	svg.write("  </g>\n</svg>\n")
 	return (svg.getvalue(), width, height)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def makeTextGroupCached(
+	font: Font,
+	text: bytes,
+	scale=2.0,
+	xOffset=0,
+	yOffset=0,
+	border=10,
+	fontThickness=0.8,
+	fontColour="#000000",
+) -> tuple[str, float, float]:
+	"""makeTextGroup, memoized for text rendered repeatedly (e.g. labels). See
+	makeTextGroupCached.cache_info() for hit/miss counts
+	"""
+	return makeTextGroup(font, text, scale, xOffset, yOffset, border, fontThickness, fontColour)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def makeSvgStringCached(
+	font: Font, text: bytes, scale=2, offset=0, border=10, fontThickness=0.8, fontColour="#000000"
+) -> tuple[str, int, int]:
+	"""makeSvgString, memoized for text rendered repeatedly. See makeSvgStringCached.cache_info()
+	for hit/miss counts
+	"""
+	return makeSvgString(font, text, scale, offset, border, fontThickness, fontColour)
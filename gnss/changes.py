@@ -0,0 +1,41 @@
+import itertools
+from dataclasses import dataclass, field
+
+POSITION = "position"
+"""Observer position, altitude, time, and interference"""
+DOP = "dop"
+"""Dilution of precision and fix quality"""
+SATELLITES = "satellites"
+"""Satellites in view, including their trails"""
+FLIGHTS = "flights"
+
+# shared by every tracker, so a version recorded from one tracker can be compared against any other
+versionCounter = itertools.count(1)
+
+
+@dataclass
+class ChangeTracker:
+	"""Monotonically increasing version of some data, along with the version each group of fields
+	last changed at, so renderers can skip redrawing when nothing they depend on has changed
+	"""
+
+	version: int = 0
+	groupVersions: dict[str, int] = field(default_factory=dict)
+
+	def markChanged(self, *groups: str):
+		"""Bump the version of the given groups"""
+		version = next(versionCounter)
+		for group in groups:
+			self.groupVersions[group] = version
+		self.version = version
+
+	def snapshot(self) -> "ChangeTracker":
+		return ChangeTracker(self.version, dict(self.groupVersions))
+
+	def changedSince(self, version: int, *groups: str) -> bool:
+		"""Whether any of the given groups have changed since the given version"""
+		return any(self.groupVersions.get(group, 0) > version for group in groups)
+
+
+NEVER_DRAWN = -1
+"""Version for a renderer that hasn't drawn anything yet, so any data counts as changed"""
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+import numpy as np
+
+DEFAULT_HISTORY_CAPACITY = 256
+NUM_COLUMNS = 5
+EMPTY_BUFFER = np.empty((NUM_COLUMNS, 0))
+
+
+def utcTimestamp(time: datetime) -> float:
+	"""Epoch seconds of a time from an NMEA sentence, which are UTC but have no timezone, so would
+	otherwise be taken as local time
+	"""
+	return time.replace(tzinfo=timezone.utc).timestamp()
+
+
+class HistoryColumns(NamedTuple):
+	"""Views of each column of a PositionHistory, oldest first"""
+
+	times: np.ndarray
+	"""Epoch seconds"""
+	elevations: np.ndarray
+	azimuths: np.ndarray
+	lats: np.ndarray
+	"""Sub-satellite point at the time of measurement, see PositionHistory"""
+	longs: np.ndarray
+
+	def toJSON(self) -> list[list[float]]:
+		"""[epoch seconds, lat, long] of each observation, rounded to keep the JSON compact"""
+		rows = np.column_stack((self.times.round(1), self.lats.round(4), self.longs.round(4)))
+		points: list[list[float]] = rows.tolist()
+		return points
+
+
+class PositionHistory:
+	"""Bounded history of a satellite's previous positions, stored as columns of epoch seconds,
+	elevations, azimuths, and the sub-satellite lat/long each observation projects to.
+
+	The lat/long are projected once when an observation is recorded (before any rotation by time,
+	see rotateLongsByTime), and only need reprojecting if the observer moves.
+
+	Once full, the older half of the history is thinned to every other point, so recent positions
+	keep their full resolution. Appends only write past the end of existing views, while thinning
+	and reprojecting write into a new buffer, so arrays returned by columns() never change
+	underneath the caller.
+	"""
+
+	def __init__(self, capacity: int = DEFAULT_HISTORY_CAPACITY):
+		if capacity < 4:
+			msg = f"History capacity must be at least 4, got {capacity}"
+			raise ValueError(msg)
+
+		self.capacity = capacity
+		self.readOnly = False
+		# swapped as a single reference so readers always see a matching buffer and count
+		self.state: tuple[np.ndarray, int] = (EMPTY_BUFFER, 0)
+
+	def __len__(self) -> int:
+		return self.state[1]
+
+	def append(
+		self, measuredTime: datetime, elevation: float, azimuth: float, lat: float, long: float
+	):
+		"""Record a new observation, thinning older observations if the history is full"""
+		if self.readOnly:
+			msg = "Can't append to a history snapshot"
+			raise ValueError(msg)
+
+		buffer, count = self.state
+		if count == 0:
+			# allocated on first use, as most parsed satellites only update an existing history
+			buffer = np.empty((NUM_COLUMNS, self.capacity))
+		elif count == self.capacity:
+			buffer, count = thinOlderHalf(buffer, count)
+
+		buffer[:, count] = (utcTimestamp(measuredTime), elevation, azimuth, lat, long)
+		self.state = (buffer, count + 1)
+
+	def reproject(self, lats: np.ndarray, longs: np.ndarray):
+		"""Replace the projected lat/long of every observation, e.g. after the observer moved"""
+		if self.readOnly:
+			msg = "Can't reproject a history snapshot"
+			raise ValueError(msg)
+
+		buffer, count = self.state
+		reprojected = buffer.copy()
+		reprojected[3, :count] = lats
+		reprojected[4, :count] = longs
+		self.state = (reprojected, count)
+
+	def snapshot(self) -> "PositionHistory":
+		"""Read-only copy of the history as it is now. Shares the buffer rather than copying it, as
+		this history only ever writes past the end of the copy's observations, or into a new buffer
+		"""
+		snapshot = PositionHistory(self.capacity)
+		snapshot.state = self.state
+		snapshot.readOnly = True
+		return snapshot
+
+	def columns(self) -> HistoryColumns:
+		buffer, count = self.state
+		return HistoryColumns(*(buffer[column, :count] for column in range(NUM_COLUMNS)))
+
+	def appendedSince(self, older: "PositionHistory") -> HistoryColumns | None:
+		"""Observations appended since an older snapshot of this history, or None if the history was
+		thinned or reprojected since, so the older observations have changed too
+		"""
+		buffer, count = self.state
+		olderBuffer, olderCount = older.state
+		if olderCount > 0 and buffer is not olderBuffer:
+			return None
+		return HistoryColumns(*(buffer[column, olderCount:count] for column in range(NUM_COLUMNS)))
+
+
+def thinOlderHalf(buffer: np.ndarray, count: int) -> tuple[np.ndarray, int]:
+	"""Copy the history into a new buffer, keeping every other point from the older half"""
+	half = count // 2
+	older = buffer[:, :half:2]
+	newer = buffer[:, half:count]
+
+	thinned = np.empty_like(buffer)
+	thinned[:, : older.shape[1]] = older
+	newCount = older.shape[1] + newer.shape[1]
+	thinned[:, older.shape[1] : newCount] = newer
+	return (thinned, newCount)
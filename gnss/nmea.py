@@ -1,19 +1,69 @@
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+import heapq
+from collections.abc import Mapping
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
+from types import MappingProxyType
 from typing import Any
 
 import h3
 from pynmeagps import NMEAMessage
 
-from gnss.satellite import SatelliteInView, isSameSatellite
+from gnss.changes import DOP, FLIGHTS, POSITION, SATELLITES, ChangeTracker
+from gnss.history import DEFAULT_HISTORY_CAPACITY, PositionHistory, utcTimestamp
+from gnss.satellite import (
+	SatelliteInView,
+	SatelliteKey,
+	getSatelliteLatLong,
+	getSatelliteLatLongs,
+	orbitHeightForNetwork,
+	satelliteKey,
+	satelliteLatLongs,
+)
 from palettes.palette import Palette
 
 
 @dataclass
-class GnssData:
-	"""GNSS data"""
+class GsvAssembler:
+	"""Buffers GSV fragments until a talker's full cycle (msgNum 1 to numMsg) has been received"""
 
-	satellites: list[SatelliteInView] = field(default_factory=list)
+	pending: dict[str, list[SatelliteInView]] = field(default_factory=dict)
+	nextMsgNum: dict[str, int] = field(default_factory=dict)
+
+	def addSentence(
+		self, message: NMEAMessage, updateTime: datetime
+	) -> list[SatelliteInView] | None:
+		"""Add a GSV fragment, returning every satellite in the cycle once it is complete"""
+		talker = message.talker
+		msgNum = int(message.msgNum)  # type: ignore
+		numMsg = int(message.numMsg)  # type: ignore
+
+		if msgNum == 1:
+			self.pending[talker] = []
+		elif self.nextMsgNum.get(talker) != msgNum:
+			# missed a fragment, so the cycle can't be trusted - wait for the next one
+			self.pending.pop(talker, None)
+			self.nextMsgNum.pop(talker, None)
+			return None
+
+		self.pending[talker].extend(parseSatelliteInMessage(message, updateTime))
+
+		if msgNum < numMsg:
+			self.nextMsgNum[talker] = msgNum + 1
+			return None
+
+		self.nextMsgNum.pop(talker, None)
+		return self.pending.pop(talker)
+
+
+@dataclass
+class GnssData:  # pylint: disable=too-many-instance-attributes
+	"""GNSS data, only updated by the ingest thread. Other threads read snapshots of it instead"""
+
+	satelliteIndex: dict[SatelliteKey, SatelliteInView] = field(default_factory=dict)
+	"""Satellites currently in view, keyed by (network, PRN), in the order they were first seen"""
+	satelliteExpiry: list[tuple[datetime, SatelliteKey]] = field(default_factory=list)
+	"""Min-heap of (last seen, key), may contain stale entries for satellites seen again since"""
 	latitude: float = 0
 	longitude: float = 0
 	date: datetime = field(default_factory=lambda: datetime.fromtimestamp(0))
@@ -28,28 +78,192 @@ class GnssData:
 	interference: float = 0
 	fixQuality: int = 0
 	"""https://receiverhelp.trimble.com/alloy-gnss/en-us/NMEA-0183messages_GGA.html for meanings"""
+	gsvAssembler: GsvAssembler = field(default_factory=GsvAssembler)
+	historyCapacity: int = DEFAULT_HISTORY_CAPACITY
+	"""Maximum number of previous positions kept per satellite"""
+	historyProjectedFrom: tuple[float, float] = (0, 0)
+	"""Observer lat/long the satellite histories' sub-satellite points were projected from"""
+	changes: ChangeTracker = field(default_factory=ChangeTracker)
+
+	@property
+	def satellites(self) -> list[SatelliteInView]:
+		"""Read-only view of the satellites in view, in the order they were first seen"""
+		return list(self.satelliteIndex.values())
+
+	def snapshot(self) -> "GnssSnapshot":
+		"""Freeze the current state, for readers on other threads. Satellites are replaced rather
+		than modified on update, so only their histories need freezing
+		"""
+		return GnssSnapshot(
+			satellites=tuple(
+				replace(satellite, previousPositions=satellite.previousPositions.snapshot())
+				for satellite in self.satelliteIndex.values()
+			),
+			latitude=self.latitude,
+			longitude=self.longitude,
+			date=self.date,
+			altitude=self.altitude,
+			altitudeUnit=self.altitudeUnit,
+			geoidSeparation=self.geoidSeparation,
+			geoidSeparationUnit=self.geoidSeparationUnit,
+			pdop=self.pdop,
+			hdop=self.hdop,
+			vdop=self.vdop,
+			interference=self.interference,
+			fixQuality=self.fixQuality,
+			historyProjectedFrom=self.historyProjectedFrom,
+			changes=self.changes.snapshot(),
+		)
+
+
+@dataclass(frozen=True)
+class GnssSnapshot:  # pylint: disable=too-many-instance-attributes
+	"""Immutable copy of GnssData at the end of an epoch, published by the ingest thread by swapping
+	a single reference, so readers never see a partially applied update and never need to lock
+	"""
+
+	satellites: tuple[SatelliteInView, ...] = ()
+	latitude: float = 0
+	longitude: float = 0
+	date: datetime = field(default_factory=lambda: datetime.fromtimestamp(0))
+	altitude: float = 0
+	altitudeUnit: str = "M"
+	geoidSeparation: float = 0
+	geoidSeparationUnit: str = "M"
+	pdop: float = 0
+	hdop: float = 0
+	vdop: float = 0
+	interference: float = 0
+	fixQuality: int = 0
+	historyProjectedFrom: tuple[float, float] = (0, 0)
+	"""See GnssData.historyProjectedFrom"""
+	changes: ChangeTracker = field(default_factory=ChangeTracker)
+	"""Versions as of this snapshot, not updated afterwards"""
 
 	def toJSON(self, palette: Palette) -> dict[str, Any]:
+		"""Every satellite with its full trail, as first sent to a client, or after a gap too long
+		to send a delta for (see deltaJSON)
+		"""
+		satellites = []
+		for satellite, latLong in zip(self.satellites, self.satelliteLatLongs, strict=True):
+			satelliteJSON = satellite.toJSON(latLong, palette, self.sentLastSeen(satellite))
+			satelliteJSON["trail"] = satellite.previousPositions.columns().toJSON()
+			satellites.append(satelliteJSON)
+		return {**self.fieldsToJSON(), "full": True, "satellites": satellites}
+
+	def deltaJSON(self, older: "GnssSnapshot", palette: Palette) -> dict[str, Any]:
+		"""Only what has changed since the older snapshot: satellites that have changed, with either
+		the trail points added since (newTrailPoints) or their whole trail if it was thinned
+		(trail), and the keys of satellites no longer in view.
+
+		Satellite positions are projected from the same point as their histories, so the small
+		jitter in every fix doesn't change every satellite, and only need sending again in full once
+		the observer has moved far enough for the histories to be reprojected
+		"""
+		if older.historyProjectedFrom != self.historyProjectedFrom:
+			return self.toJSON(palette)
+
+		olderSatellites = {satelliteKey(satellite): satellite for satellite in older.satellites}
+		satellites = []
+		for satellite, latLong in zip(self.satellites, self.satelliteLatLongs, strict=True):
+			olderSatellite = olderSatellites.pop(satelliteKey(satellite), None)
+			satelliteJSON = self.satelliteDeltaJSON(
+				older, satellite, olderSatellite, latLong, palette
+			)
+			if satelliteJSON is not None:
+				satellites.append(satelliteJSON)
+
+		return {
+			**self.fieldsToJSON(),
+			"full": False,
+			"since": older.changes.version,
+			"satellites": satellites,
+			"removed": list(olderSatellites),
+		}
+
+	def satelliteDeltaJSON(
+		self,
+		older: "GnssSnapshot",
+		satellite: SatelliteInView,
+		olderSatellite: SatelliteInView | None,
+		latLong: tuple[float, float],
+		palette: Palette,
+	) -> dict[str, Any] | None:
+		"""The satellite with the trail points added since its version in the older snapshot, or its
+		whole trail if it's new or its trail was thinned. None if nothing sent for it has changed
+		"""
+		appended = None
+		if olderSatellite is not None:
+			appended = satellite.previousPositions.appendedSince(olderSatellite.previousPositions)
+			unchanged = replace(
+				satellite,
+				previousPositions=olderSatellite.previousPositions,
+				lastSeen=olderSatellite.lastSeen,
+			)
+			if (
+				appended is not None
+				and len(appended.times) == 0
+				and unchanged == olderSatellite
+				and self.sentLastSeen(satellite) == older.sentLastSeen(olderSatellite)
+			):
+				return None
+
+		satelliteJSON = satellite.toJSON(latLong, palette, self.sentLastSeen(satellite))
+		if appended is not None:
+			satelliteJSON["newTrailPoints"] = appended.toJSON()
+		else:
+			satelliteJSON["trail"] = satellite.previousPositions.columns().toJSON()
+		return satelliteJSON
+
+	@cached_property
+	def satelliteLatLongs(self) -> list[tuple[float, float]]:
+		"""Position of each satellite, projected from the same point as their histories so the
+		small jitter in every fix doesn't change every satellite (see deltaJSON)
+		"""
+		(lats, longs) = satelliteLatLongs(self.satellites, *self.historyProjectedFrom)
+		return list(zip(lats.tolist(), longs.tolist(), strict=True))
+
+	@cached_property
+	def lastSeenByNetwork(self) -> dict[str, datetime]:
+		"""When each network's latest GSV cycle was received"""
+		lastSeen: dict[str, datetime] = {}
+		for satellite in self.satellites:
+			lastSeen[satellite.network] = max(
+				satellite.lastSeen, lastSeen.get(satellite.network, satellite.lastSeen)
+			)
+		return lastSeen
+
+	def sentLastSeen(self, satellite: SatelliteInView) -> datetime | None:
+		"""The satellite's lastSeen, or None if it was seen in its network's latest GSV cycle, as
+		the client takes it from lastSeenByNetwork instead. Otherwise every satellite in view would
+		be sent again every epoch, only for its lastSeen to have moved on
+		"""
+		if satellite.lastSeen == self.lastSeenByNetwork[satellite.network]:
+			return None
+		return satellite.lastSeen
+
+	def fieldsToJSON(self) -> dict[str, Any]:
 		return {
+			"version": self.changes.version,
 			"latitude": self.latitude,
 			"longitude": self.longitude,
-			"date": self.date.isoformat(),
+			"date": self.date.replace(tzinfo=timezone.utc).isoformat(),
 			"altitude": self.altitude,
 			"geoidSeparation": self.geoidSeparation,
 			"pdop": self.pdop,
 			"hdop": self.hdop,
 			"vdop": self.vdop,
 			"fixQuality": self.fixQuality,
-			"satellites": [
-				satellite.toJSON(self.latitude, self.longitude, palette, self.date)
-				for satellite in self.satellites
-			],
+			"lastSeen": {
+				network: utcTimestamp(lastSeen)
+				for (network, lastSeen) in self.lastSeenByNetwork.items()
+			},
 		}
 
 
-@dataclass
+@dataclass(frozen=True)
 class Flight:
-	"""Plane data"""
+	"""Plane data, replaced rather than modified when the plane is seen again"""
 
 	flightId: str = ""
 	latitude: float = 0
@@ -60,7 +274,22 @@ class Flight:
 
 @dataclass
 class ADSBData:
+	"""Flights currently tracked, only updated by the ingest thread (see GnssData)"""
+
 	flights: dict[str, Flight] = field(default_factory=dict)
+	changes: ChangeTracker = field(default_factory=ChangeTracker)
+
+	def snapshot(self) -> "ADSBSnapshot":
+		"""Freeze the current state, for readers on other threads"""
+		return ADSBSnapshot(MappingProxyType(dict(self.flights)), self.changes.snapshot())
+
+
+@dataclass(frozen=True)
+class ADSBSnapshot:
+	"""Immutable copy of ADSBData, see GnssSnapshot"""
+
+	flights: Mapping[str, Flight] = field(default_factory=lambda: MappingProxyType({}))
+	changes: ChangeTracker = field(default_factory=ChangeTracker)
 
 
 def parseSatelliteInMessage(parsedData: NMEAMessage, updateTime: datetime) -> list[SatelliteInView]:
@@ -77,15 +306,8 @@ def parseSatelliteInMessage(parsedData: NMEAMessage, updateTime: datetime) -> li
 			azimuth=tryParseFloat(getattr(parsedData, f"az_0{satNum}")),
 			snr=tryParseFloat(getattr(parsedData, f"cno_0{satNum}")),
 			lastSeen=updateTime,
-			previousPositions=[
-				(
-					updateTime,
-					tryParseFloat(getattr(parsedData, f"elv_0{satNum}")),
-					tryParseFloat(getattr(parsedData, f"az_0{satNum}")),
-				)
-			],
 		)
-		for satNum in range(1, 4)
+		for satNum in range(1, 5)
 		if hasattr(parsedData, f"svid_0{satNum}")
 	]
 
@@ -100,25 +322,23 @@ def tryParseFloat(string: str):
 		return 0
 
 
-def updateADSBDataWithMessage(adsbData: ADSBData, message: dict[str, Any], flightTTL: timedelta):
-	"""Update the ADS-B data with the new data from a message"""
+def updateADSBDataWithMessage(
+	adsbData: ADSBData, message: dict[str, Any], flightTTL: timedelta
+) -> bool:
+	"""Update the ADS-B data with the new data from a message, returning whether anything changed"""
 	if "flight" not in message or "lat" not in message or "lon" not in message:
 		# not sure what the shorter messages are
-		return
+		return False
 
 	flightId = message["flight"]
 	lat = message["lat"]
 	long = message["lon"]
 	time = datetime.strptime(message["0"], "%Y-%m-%dT%H:%M:%S.%fZ")
 
-	if flightId in adsbData.flights:
-		adsbData.flights[flightId].latitude = lat
-		adsbData.flights[flightId].longitude = long
-		adsbData.flights[flightId].lastUpdate = time
-	else:
-		adsbData.flights[flightId] = Flight(
-			flightId=flightId, latitude=lat, longitude=long, lastUpdate=time
-		)
+	# replacing an existing flight keeps its original position in the ordering
+	adsbData.flights[flightId] = Flight(
+		flightId=flightId, latitude=lat, longitude=long, lastUpdate=time
+	)
 
 	flightsToRemove = []
 	for flightId, flight in adsbData.flights.items():
@@ -127,24 +347,31 @@ def updateADSBDataWithMessage(adsbData: ADSBData, message: dict[str, Any], fligh
 	for flightId in flightsToRemove:
 		del adsbData.flights[flightId]
 
+	adsbData.changes.markChanged(FLIGHTS)
+	return True
+
 
 def updateGnssDataWithMessage(
 	gnssData: GnssData,
 	message: NMEAMessage,
 	satelliteTTL: timedelta,
 	gpsJamData: dict[str, tuple[int, int]],
-):
-	"""Update the gnss data with the new data from a message"""
+) -> bool:
+	"""Update the gnss data with the new data from a message.
+
+	Returns whether an epoch was completed, i.e. a talker's full GSV cycle was committed or the fix
+	time moved on, and so whether consumers should be notified.
+	"""
+	previousDate = gnssData.date
+	previousPosition = positionFields(gnssData)
+	previousDop = dopFields(gnssData)
+	cycleCommitted = False
+	satellitesChanged = False
+
 	# no clue what's up with the typing here, it's fine though so ignore
 	match message.msgID:
 		case "GSV":
-			gnssData.satellites = updateSatellitePositions(
-				gnssData.satellites, message, gnssData.date, satelliteTTL
-			)
-
-			if gnssData.date - gnssData.lastRecordedTime > timedelta(seconds=1200):
-				gnssData.lastRecordedTime = gnssData.date
-				updateSaltellitePreviousPositions(gnssData.satellites)
+			(cycleCommitted, satellitesChanged) = addGsvSentence(gnssData, message, satelliteTTL)
 		case "GLL":
 			gnssData.latitude = message.lat
 			gnssData.longitude = message.lon
@@ -153,12 +380,7 @@ def updateGnssDataWithMessage(
 			gnssData.latitude = message.lat
 			gnssData.longitude = message.lon
 			gnssData.date = datetime.combine(message.date, message.time)  # type: ignore
-
-			if gpsJamData:
-				h3Cell = h3.latlng_to_cell(message.lat, message.lon, 4)
-				if h3Cell in gpsJamData:
-					countGood, countBad = gpsJamData[h3Cell]
-					gnssData.interference = countBad / (countGood + countBad) * 100
+			updateInterference(gnssData, gpsJamData)
 		case "GGA":
 			gnssData.latitude = message.lat
 			gnssData.longitude = message.lon
@@ -177,44 +399,169 @@ def updateGnssDataWithMessage(
 			gnssData.vdop = message.VDOP  # type: ignore
 		case _:
 			print(f"Unknown message type: {message.msgID}")
-	return gnssData
 
+	reprojectHistoriesIfMoved(gnssData)
+	markChangedGroups(gnssData, previousPosition, previousDop, satellitesChanged)
 
-def updateSaltellitePreviousPositions(satellites: list[SatelliteInView]):
-	for satellite in satellites:
-		satellite.previousPositions.append(
-			(satellite.lastSeen, satellite.elevation, satellite.azimuth)
-		)
+	return cycleCommitted or gnssData.date != previousDate
 
 
-def updateSatellitePositions(
-	satellites: list[SatelliteInView],
-	nmeaSentence: NMEAMessage,
-	updateTime: datetime,
-	satelliteTTL: timedelta,
-) -> list[SatelliteInView]:
-	"""Update satellites (current positions, adding new satellites, and removing old satellites)"""
-	newSatelliteData = parseSatelliteInMessage(nmeaSentence, updateTime)
-	# update existing satellites
-	for i, oldData in enumerate(satellites):
-		matchingNewData = next(
-			(newData for newData in newSatelliteData if isSameSatellite(newData, oldData)), None
+def markChangedGroups(
+	gnssData: GnssData, previousPosition: tuple, previousDop: tuple, satellitesChanged: bool
+):
+	"""Bump the version of each change group whose fields differ from before the message"""
+	changedGroups = [
+		group
+		for (group, changed) in (
+			(POSITION, positionFields(gnssData) != previousPosition),
+			(DOP, dopFields(gnssData) != previousDop),
+			(SATELLITES, satellitesChanged),
 		)
-		if matchingNewData is not None:
-			matchingNewData.previousPositions = oldData.previousPositions
-			satellites[i] = matchingNewData
-
-	# remove satellites that haven't been seen in a while
-	satellites = [
-		satellite for satellite in satellites if satellite.lastSeen + satelliteTTL > updateTime
+		if changed
 	]
+	if changedGroups:
+		gnssData.changes.markChanged(*changedGroups)
+
+
+def addGsvSentence(
+	gnssData: GnssData, message: NMEAMessage, satelliteTTL: timedelta
+) -> tuple[bool, bool]:
+	"""Add a GSV sentence to its talker's cycle, updating the satellites once the cycle is complete.
+	Returns whether the cycle was committed, and whether the satellites changed
+	"""
+	cycle = gnssData.gsvAssembler.addSentence(message, gnssData.date)
+	if cycle is None:
+		return (False, False)
+
+	satellitesChanged = updateSatellitePositions(gnssData, cycle, gnssData.date, satelliteTTL)
+	if gnssData.date - gnssData.lastRecordedTime > timedelta(seconds=1200):
+		gnssData.lastRecordedTime = gnssData.date
+		updateSaltellitePreviousPositions(gnssData)
+		satellitesChanged = True
+	return (True, satellitesChanged)
+
+
+def updateInterference(gnssData: GnssData, gpsJamData: dict[str, tuple[int, int]]):
+	"""Look up the interference reported by GPSJam around the current position"""
+	if not gpsJamData:
+		return
+	h3Cell = h3.latlng_to_cell(gnssData.latitude, gnssData.longitude, 4)
+	if h3Cell in gpsJamData:
+		countGood, countBad = gpsJamData[h3Cell]
+		gnssData.interference = countBad / (countGood + countBad) * 100
+
+
+def positionFields(gnssData: GnssData) -> tuple:
+	"""Fields in the position change group"""
+	return (
+		gnssData.latitude,
+		gnssData.longitude,
+		gnssData.date,
+		gnssData.altitude,
+		gnssData.geoidSeparation,
+		gnssData.interference,
+	)
+
+
+def dopFields(gnssData: GnssData) -> tuple:
+	"""Fields in the DOP change group"""
+	return (gnssData.pdop, gnssData.hdop, gnssData.vdop, gnssData.fixQuality)
+
+
+def updateSaltellitePreviousPositions(gnssData: GnssData):
+	for satellite in gnssData.satellites:
+		recordPreviousPosition(gnssData, satellite)
+
+
+def recordPreviousPosition(gnssData: GnssData, satellite: SatelliteInView):
+	"""Add the satellite's current position to its history, projecting its sub-satellite point"""
+	(observerLat, observerLong) = gnssData.historyProjectedFrom
+	(lat, long) = getSatelliteLatLong(
+		satellite.azimuth, satellite.elevation, satellite.network, observerLat, observerLong
+	)
+	satellite.previousPositions.append(
+		satellite.lastSeen, satellite.elevation, satellite.azimuth, lat, long
+	)
+
+
+def reprojectHistoriesIfMoved(gnssData: GnssData, threshold: float = 0.01):
+	"""Reproject the sub-satellite points of every satellite's history if the observer has moved
+	more than the threshold (in degrees) from where they were projected from
+	"""
+	(projectedLat, projectedLong) = gnssData.historyProjectedFrom
+	if (
+		abs(gnssData.latitude - projectedLat) <= threshold
+		and abs(gnssData.longitude - projectedLong) <= threshold
+	):
+		return
 
-	# add new satellites
-	newSatellites = [
-		newData
-		for newData in newSatelliteData
-		if not any(isSameSatellite(newData, oldData) for oldData in satellites)
-	]
-	satellites.extend(newSatellites)
+	gnssData.historyProjectedFrom = (gnssData.latitude, gnssData.longitude)
+	for satellite in gnssData.satelliteIndex.values():
+		history = satellite.previousPositions.columns()
+		(lats, longs) = getSatelliteLatLongs(
+			history.azimuths,
+			history.elevations,
+			orbitHeightForNetwork(satellite.network),
+			gnssData.latitude,
+			gnssData.longitude,
+		)
+		satellite.previousPositions.reproject(lats, longs)
 
-	return satellites
+
+def updateSatellitePositions(
+	gnssData: GnssData,
+	newSatelliteData: list[SatelliteInView],
+	updateTime: datetime,
+	satelliteTTL: timedelta,
+) -> bool:
+	"""Update satellites (current positions, adding new satellites, and removing old satellites),
+	returning whether any satellite was added, moved, changed SNR, or removed
+	"""
+	satelliteIndex = gnssData.satelliteIndex
+	changed = False
+
+	for newData in newSatelliteData:
+		key = satelliteKey(newData)
+		oldData = satelliteIndex.get(key)
+		if oldData is not None:
+			satellite = replace(newData, previousPositions=oldData.previousPositions)
+			changed = changed or (oldData.elevation, oldData.azimuth, oldData.snr) != (
+				newData.elevation,
+				newData.azimuth,
+				newData.snr,
+			)
+		else:
+			satellite = replace(
+				newData, previousPositions=PositionHistory(gnssData.historyCapacity)
+			)
+			recordPreviousPosition(gnssData, satellite)
+			changed = True
+		# replacing an existing key keeps its original position in the ordering
+		satelliteIndex[key] = satellite
+		heapq.heappush(gnssData.satelliteExpiry, (updateTime, key))
+
+	return expireSatellites(gnssData, updateTime, satelliteTTL) or changed
+
+
+def expireSatellites(gnssData: GnssData, updateTime: datetime, satelliteTTL: timedelta) -> bool:
+	"""Remove satellites that haven't been seen in a while, returning whether any were removed"""
+	satelliteIndex = gnssData.satelliteIndex
+	expiry = gnssData.satelliteExpiry
+	removedAny = False
+
+	while expiry and expiry[0][0] + satelliteTTL <= updateTime:
+		_, key = heapq.heappop(expiry)
+		satellite = satelliteIndex.get(key)
+		# entry is stale if the satellite has been seen again since it was pushed
+		if satellite is not None and satellite.lastSeen + satelliteTTL <= updateTime:
+			del satelliteIndex[key]
+			removedAny = True
+
+	# every sighting pushes an entry, so rebuild once stale entries start to dominate
+	if len(expiry) > 4 * len(satelliteIndex) + 64:
+		gnssData.satelliteExpiry = [
+			(satellite.lastSeen, key) for key, satellite in satelliteIndex.items()
+		]
+		heapq.heapify(gnssData.satelliteExpiry)
+
+	return removedAny
@@ -1,74 +1,75 @@
 import math
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
+import numpy as np
+
+from gnss.history import PositionHistory, utcTimestamp
 from palettes.palette import Palette
 
+SatelliteKey = tuple[str, int]
+
+EARTH_RADIUS = 6.37
+"""In thousands of km, same units as orbitHeightForNetwork"""
+ROTATION_PER_SECOND = 360.985647 / (24 * 60 * 60)
+"""Degrees the earth rotates per second (sidereal)"""
 
-@dataclass
+
+@dataclass(frozen=True)
 class SatelliteInView:
-	"""Satellite data"""
+	"""Satellite data, replaced rather than modified when the satellite is seen again"""
 
 	prnNumber: int = 0
 	network: str = "??"
 	elevation: float = 0
 	azimuth: float = 0
-	previousPositions: list[tuple[datetime, float, float]] = field(default_factory=list)
+	previousPositions: PositionHistory = field(default_factory=PositionHistory)
 	snr: float = 0
 	lastSeen: datetime = field(default_factory=lambda: datetime.fromtimestamp(0))
 
 	def toJSON(
-		self,
-		measuredFromLat: float,
-		measuredFromLong: float,
-		palette: Palette,
-		currentTime: datetime,
+		self, latLong: tuple[float, float], palette: Palette, lastSeen: datetime | None
 	) -> dict[str, Any]:
-		"""Return data as dictionary to be converted to json"""
-		lat, long = getSatelliteLatLong(
-			self.azimuth, self.elevation, self.network, measuredFromLat, measuredFromLong
-		)
-		(lat, long) = rotateLatLongByTime((lat, long), self.lastSeen, currentTime)
-
-		previousPositions = [
-			(
-				str(measuredTime),
-				rotateLatLongByTime(
-					getSatelliteLatLong(
-						azimuth, elevation, self.network, measuredFromLat, measuredFromLong
-					),
-					measuredTime,
-					currentTime,
-				),
-			)
-			for (measuredTime, elevation, azimuth) in self.previousPositions
-		]
-		previousPositions.append((str(self.lastSeen), (lat, long)))
-
-		return {
+		"""Return data as dictionary to be converted to json, without the trail. The position is
+		projected by the caller, so every satellite can be projected at once (see
+		satelliteLatLongs), and isn't rotated by the time passed since it was measured, so never
+		changes once sent. lastSeen is only sent if given, see GnssSnapshot.sentLastSeen
+		"""
+		(lat, long) = latLong
+		satelliteJSON = {
 			"prnNumber": self.prnNumber,
 			"network": self.network,
 			"elevation": self.elevation,
 			"azimuth": self.azimuth,
 			"snr": self.snr,
-			"lastSeen": self.lastSeen.isoformat(),
 			"lat": lat,
 			"long": long,
 			"colour": colourForNetwork(self.network, palette),
 			"altitude": orbitHeightForNetwork(self.network),
-			"previousPositions": previousPositions,
 		}
+		if lastSeen is not None:
+			satelliteJSON["lastSeen"] = utcTimestamp(lastSeen)
+		return satelliteJSON
 
 
 def rotateLatLongByTime(
 	latLong: tuple[float, float], measuredTime: datetime, currentTime: datetime
 ) -> tuple[float, float]:
 	"""Rotates a lat/long coordinate by the time passed since the measurement time."""
-	rotationPerDay = 360.985647
-	rotationPerSecond = rotationPerDay / (24 * 60 * 60)
 	timePassed = (currentTime - measuredTime).total_seconds()
-	return (latLong[0], latLong[1] - timePassed * rotationPerSecond)
+	return (latLong[0], latLong[1] - timePassed * ROTATION_PER_SECOND)
+
+
+def rotateLongsByTime(
+	longs: np.ndarray, measuredTimestamps: np.ndarray, currentTime: datetime
+) -> np.ndarray:
+	"""Vectorised rotateLatLongByTime, for arrays of longitudes measured at the given epoch
+	seconds
+	"""
+	timePassed = utcTimestamp(currentTime) - measuredTimestamps
+	return longs - timePassed * ROTATION_PER_SECOND
 
 
 def colourForNetwork(network: str, palette: Palette) -> str:
@@ -144,7 +145,7 @@ def azimuthToWorldXyz(
 	azimuthRadians = math.radians(azimuth)
 
 	orbit = orbitHeightForNetwork(satelliteNetwork)
-	ground = 6.37
+	ground = EARTH_RADIUS
 
 	x1, x2 = calcX(elevation, orbit, ground)
 	x1 *= math.cos(azimuthRadians)
@@ -235,3 +236,80 @@ def getSatelliteLatLong(
 
 def isSameSatellite(satellite1: SatelliteInView, satellite2: SatelliteInView) -> bool:
 	return satellite1.prnNumber == satellite2.prnNumber and satellite1.network == satellite2.network
+
+
+def satelliteKey(satellite: SatelliteInView) -> SatelliteKey:
+	"""Key uniquely identifying a satellite, see isSameSatellite"""
+	return (satellite.network, satellite.prnNumber)
+
+
+def getSatelliteLatLongs(
+	azimuths: np.ndarray,
+	elevations: np.ndarray,
+	orbitHeights: np.ndarray | float,
+	measuredFromLat: float,
+	measuredFromLong: float,
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Vectorised getSatelliteLatLong, projecting whole arrays of observations in one pass.
+	:param azimuths: in degrees
+	:param elevations: in degrees
+	:param orbitHeights: per observation, or one height for all of them
+	"""
+	azimuthRadians = np.radians(azimuths)
+	(xs, ys) = calcXsYs(elevations, orbitHeights)
+
+	xs = xs * np.cos(azimuthRadians)
+	zs = xs * np.tan(azimuthRadians)
+
+	xs = xs / orbitHeights
+	ys = ys / orbitHeights
+	zs = zs / orbitHeights
+
+	# rotateXyzByLatitude
+	rotationAngle = math.radians(-measuredFromLat)
+	rotatedXs = xs * math.cos(rotationAngle) - ys * math.sin(rotationAngle)
+	rotatedYs = xs * math.sin(rotationAngle) + ys * math.cos(rotationAngle)
+
+	# xyzToLatLong
+	lats = np.degrees(np.arcsin(rotatedXs))
+	longs = np.degrees(np.arctan2(zs, rotatedYs)) + measuredFromLong
+	return (lats, longs)
+
+
+def satelliteLatLongs(
+	satellites: Sequence[SatelliteInView], measuredFromLat: float, measuredFromLong: float
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Project the current position of each of the satellites, all in one pass"""
+	return getSatelliteLatLongs(
+		np.array([satellite.azimuth for satellite in satellites], dtype=float),
+		np.array([satellite.elevation for satellite in satellites], dtype=float),
+		np.array([orbitHeightForNetwork(satellite.network) for satellite in satellites]),
+		measuredFromLat,
+		measuredFromLong,
+	)
+
+
+def calcXsYs(
+	elevations: np.ndarray, orbitHeights: np.ndarray | float
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Vectorised calcX and calcY"""
+	ground = EARTH_RADIUS
+	tanElevation = np.tan(np.radians(elevations))
+
+	# the 0 and 90 degree special cases of calcX/calcY divide by zero, they get replaced below
+	with np.errstate(divide="ignore", invalid="ignore"):
+		# root 1 of calcX
+		ax = 1 + tanElevation**2
+		bx = 2 * ground * tanElevation
+		cx = ground**2 - orbitHeights**2
+		xs = (-bx + np.sqrt(bx**2 - 4 * ax * cx)) / (2 * ax)
+		xs = np.where(elevations == 90, 0, xs)
+
+		# root 2 of calcY
+		yConst = 1 / tanElevation**2
+		ay = -1 - yConst
+		by = 2 * ground * yConst
+		cy = orbitHeights**2 - ground**2 * yConst
+		ys = (-by - np.sqrt(by**2 - 4 * ay * cy)) / (2 * ay)
+		ys = np.where(elevations == 0, ground, ys)
+	return (xs, ys)
@@ -5,14 +5,13 @@ import signal
 import sys
 import threading
 from collections.abc import Callable
-from datetime import datetime, timedelta
 
 from dotenv import load_dotenv
 from PyQt6.QtGui import QScreen
 from PyQt6.QtWidgets import QApplication, QMainWindow
 
 from font.fetch import fetchFontRomsIfNeeded
-from gnss.nmea import ADSBData, GnssData
+from gnss.nmea import ADSBSnapshot, GnssSnapshot
 from misc.config import (
 	Config,
 	GlobeConfig,
@@ -31,6 +30,7 @@ from views.globe.window import GlobeWindow
 from views.map.window import MapWindow
 from views.polarGrid.window import PolarGridWindow
 from views.rawMessages.window import RawMessageWindow
+from views.renderScheduler import RenderScheduler
 from views.signalGraph.window import SignalGraphWindow
 from views.startup.window import StartupWindow
 from views.stats.window import MiscStatsWindow
@@ -97,8 +97,11 @@ def createMainWindows(config: Config, palette: Palette):
 	"""Create the main windows"""
 	windows = [windowConfigToWindow(windowConfig, palette) for windowConfig in config.windows]
 
-	onNewData = updateWindows(windows)
-	threading.Thread(target=createMqttSubscriber, args=(config, onNewData)).start()
+	onEpochComplete = updateWindows(windows, config.windows)
+	onRawMessage = updateRawMessageWindows(windows)
+	threading.Thread(
+		target=createMqttSubscriber, args=(config, onEpochComplete, onRawMessage)
+	).start()
 	return windows
 
 
@@ -135,37 +138,56 @@ def windowConfigToWindow(windowConfig: WindowConfig, palette: Palette) -> BaseWi
 			raise ValueError(msg)
 
 
-def updateWindows(windows: list[BaseWindow]) -> Callable[[bytes, GnssData, ADSBData], None]:
-	"""Generate a callback for the windows to handle new data"""
-	lastUpdatedAt = datetime.now()
+def updateRawMessageWindows(windows: list[BaseWindow]) -> Callable[[bytes], None]:
+	"""Generate a callback for the raw message windows to log every incoming message"""
+	rawMessageWindows = [window for window in windows if isinstance(window, RawMessageWindow)]
 
-	def updateWindowsOnNewData(rawMessage: bytes, gnssData: GnssData, adsbData: ADSBData):
-		nonlocal windows
-		nonlocal lastUpdatedAt
+	def updateRawMessageWindowsOnNewMessage(rawMessage: bytes):
+		for window in rawMessageWindows:
+			window.onNewData(rawMessage)
 
-		for window in windows:
-			if isinstance(window, RawMessageWindow):
-				window.onNewData(rawMessage)
+	return updateRawMessageWindowsOnNewMessage
+
+
+def updateWindows(
+	windows: list[BaseWindow], windowConfigs: list[WindowConfig]
+) -> Callable[[GnssSnapshot, ADSBSnapshot], None]:
+	"""Generate a callback for the windows to handle each completed epoch of data.
+
+	The callback only marks the windows as needing redrawn, and each window is then redrawn with the
+	latest data on the Qt event loop, at most at its configured max FPS
+	"""
+	latestData = (GnssSnapshot(), ADSBSnapshot())
 
-		# limit how often we update the windows, otherwise pyqt mostly freezes
-		timeSinceLastUpdate = datetime.now() - lastUpdatedAt
-		if timeSinceLastUpdate < timedelta(seconds=0.5):
-			return
-		lastUpdatedAt = datetime.now()
+	def drawLatestData(window: BaseWindow):
+		return lambda: updateWindow(window, *latestData)
+
+	for window, windowConfig in zip(windows, windowConfigs, strict=True):
+		if isinstance(windowConfig, GlobeConfig):
+			continue  # is managed by whatever server the globe is on
+		window.renderScheduler = RenderScheduler(
+			drawLatestData(window), windowConfig.maxFps, parent=window
+		)
+
+	def updateWindowsOnNewData(gnssData: GnssSnapshot, adsbData: ADSBSnapshot):
+		nonlocal latestData
+		# swapped as a single reference, so a window never draws data from two different epochs
+		latestData = (gnssData, adsbData)
 
 		for window in windows:
-			updateWindow(window, gnssData, adsbData)
+			if window.renderScheduler is not None:
+				window.renderScheduler.markDirty()
 
 	return updateWindowsOnNewData
 
 
-def updateWindow(window: BaseWindow, gnssData: GnssData, adsbData: ADSBData):
+def updateWindow(window: BaseWindow, gnssData: GnssSnapshot, adsbData: ADSBSnapshot):
 	"""Update the given window with the given data"""
 	match window:
 		case MapWindow():
 			window.onNewData(gnssData, adsbData)
 		case PolarGridWindow():
-			window.onNewData(gnssData.satellites)
+			window.onNewData(gnssData)
 		case MiscStatsWindow():
 			window.onNewData(gnssData)
 		case RawMessageWindow():
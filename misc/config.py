@@ -5,6 +5,9 @@ from typing import Union
 import pyjson5
 from dataclass_wizard import JSONWizard
 
+DEFAULT_MAX_FPS = 2.0
+"""Default limit on how often each window is redrawn"""
+
 
 @dataclass
 class MapConfig(JSONWizard):
@@ -21,12 +24,18 @@ class MapConfig(JSONWizard):
 	hideCities: bool = True
 	hideAdmin0Borders: bool = False
 
+	renderBackend: str = "svg"
+	"""Either "svg", or "raster" to draw satellites with QPainter over a cached image of the map"""
+	maxFps: float = DEFAULT_MAX_FPS
+
 	class _(JSONWizard.Meta):
 		tag = "worldMap"
 
 
 @dataclass
 class PolalGridConfig(JSONWizard):
+	maxFps: float = DEFAULT_MAX_FPS
+
 	class _(JSONWizard.Meta):
 		tag = "polarGrid"
 
@@ -34,6 +43,7 @@ class PolalGridConfig(JSONWizard):
 @dataclass
 class MiscStatsConfig(JSONWizard):
 	fontThickness: float = 1.5
+	maxFps: float = DEFAULT_MAX_FPS
 
 	class _(JSONWizard.Meta):
 		tag = "miscStats"
@@ -41,8 +51,13 @@ class MiscStatsConfig(JSONWizard):
 
 @dataclass
 class RawMessageConfig(JSONWizard):
+	"""Configuration for the raw message log"""
+
 	fontThickness: float = 1.5
 	numMessagesToKeep: int = 50
+	renderBackend: str = "svg"
+	"""Either "svg", or "raster" to draw the log with QPainter, which is cheaper for large logs"""
+	maxFps: float = DEFAULT_MAX_FPS
 
 	class _(JSONWizard.Meta):
 		tag = "rawMessages"
@@ -66,6 +81,8 @@ class SignalChartConfig(JSONWizard):
 
 	countUntrackedSatellites: bool = False
 
+	maxFps: float = DEFAULT_MAX_FPS
+
 	class _(JSONWizard.Meta):
 		tag = "signalGraph"
 
@@ -86,8 +103,39 @@ class MqttConfig(JSONWizard):
 
 @dataclass
 class GnssConfig(JSONWizard):
+	"""Configuration for the GNSS receiver, and how its sentences are published"""
+
 	serialPort: str = "/dev/ttyUSB0"
 	baudRate: int = 38400
+	publishQos: int = 2
+	"""MQTT QoS level the sentences are published with"""
+	batchBy: str = "sentence"
+	"""Either "sentence" to publish each sentence on its own, "epoch" to publish each epoch's
+	sentences as one message, or "window" for those received within batchWindow of each other"""
+	batchWindow: float = 0.1
+	"""Seconds a "window" batch is held for, or without any sentences before an "epoch" batch is
+	published anyway"""
+
+
+@dataclass
+class WebConfig(JSONWizard):
+	"""Configuration for the web app, and the files generated for it"""
+
+	host: str = "0.0.0.0"
+	port: int = 2024
+	threads: int = 256
+	"""Most requests handled at once, including clients streaming live updates"""
+	maxStreams: int = 192
+	"""Most clients streaming live updates at once, each holding one of the threads while connected.
+	Must be less than threads, so other requests aren't left waiting behind streams. Clients past
+	the limit poll for updates instead
+	"""
+	mirrorFilesToDisk: bool = False
+	"""Also write the generated files to web/generated when serving them from the same process"""
+	maxFps: float = 1.0
+	"""Limit on how often each generated file is rewritten, when its data changes"""
+	artifactMaxFps: dict[str, float] = field(default_factory=dict)
+	"""Limits for specific files, e.g. {"map": 0.5}, overriding maxFps"""
 
 
 WindowConfig = Union[
@@ -106,7 +154,9 @@ class Config(JSONWizard):
 	mqtt: MqttConfig = field(default_factory=MqttConfig)
 	multiTrackBroadcasting: list[MqttConfig] = field(default_factory=list)
 	gnss: GnssConfig = field(default_factory=GnssConfig)
+	web: WebConfig = field(default_factory=WebConfig)
 	satelliteTTL: int = 3600
+	satelliteHistoryLength: int = 256
 	flightTTL: int = 30
 	warRoom: bool = False
 	startupSequence: bool = False
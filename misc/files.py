@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+
+def writeAtomically(path: str, content: bytes):
+	"""Write the file by renaming a complete temporary file over it"""
+	directory = os.path.dirname(path)
+	os.makedirs(directory, exist_ok=True)
+	(fd, tempPath) = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+	try:
+		# wrapped straight away, so the fd is closed however the write fails
+		with os.fdopen(fd, "wb") as f:
+			# mkstemp only lets the owner read the file
+			os.fchmod(f.fileno(), 0o644)
+			f.write(content)
+		os.replace(tempPath, path)
+	except BaseException:
+		os.remove(tempPath)
+		raise
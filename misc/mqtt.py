@@ -11,10 +11,20 @@ from paho.mqtt.client import Client as MqttClient
 from paho.mqtt.client import MQTTMessage
 from pynmeagps import NMEAMessage, NMEAReader
 
-from gnss.nmea import ADSBData, GnssData, updateADSBDataWithMessage, updateGnssDataWithMessage
+from gnss.nmea import (
+	ADSBData,
+	ADSBSnapshot,
+	GnssData,
+	GnssSnapshot,
+	updateADSBDataWithMessage,
+	updateGnssDataWithMessage,
+)
 from misc.config import Config, MqttConfig
 from misc.scrape import gpsCsvToDict, tryLoadCachedGpsJam
 
+BATCH_SEPARATOR = b"\n"
+"""Separates the sentences batched into one GNSS message, as no NMEA sentence can contain it"""
+
 
 def figureOutPublishingConfig(config: Config):
 	if len(config.multiTrackBroadcasting) > 0:
@@ -23,14 +33,18 @@ def figureOutPublishingConfig(config: Config):
 
 
 def createMqttSubscriber(
-	config: Config, onNewData: Callable[[bytes, GnssData, ADSBData], None]
+	config: Config,
+	onEpochComplete: Callable[[GnssSnapshot, ADSBSnapshot], None],
+	onRawMessage: Callable[[bytes], None] | None = None,
 ) -> MqttClient:
 	"""Create the subscriber MQTT client"""
 	mqttClient = MqttClient(mqttEnums.CallbackAPIVersion.VERSION2)
 	mqttClient.on_message = callbackOnMessage(
-		onNewData,
+		onEpochComplete,
 		timedelta(seconds=int(config.satelliteTTL)),
 		timedelta(seconds=int(config.flightTTL)),
+		config.satelliteHistoryLength,
+		onRawMessage,
 	)
 
 	mqttClient.on_disconnect = reconnectOnDisconnect
@@ -127,57 +141,112 @@ def tryReconnectAfterDisconnect(mqttClient: MqttClient, attemptNum=1):
 
 
 def callbackOnMessage(
-	onNewData: Callable[[bytes, GnssData, ADSBData], None],
+	onEpochComplete: Callable[[GnssSnapshot, ADSBSnapshot], None],
 	satelliteTTL: timedelta,
 	flightTTL: timedelta,
+	historyCapacity: int,
+	onRawMessage: Callable[[bytes], None] | None = None,
 ) -> Callable[[MqttClient, Any, MQTTMessage], None]:
-	"""Create a callback for the MQTT subscriber client to handle incoming messages"""
-	gnssData = GnssData()
+	"""Create a callback for the MQTT subscriber client to handle incoming messages.
+
+	onRawMessage is called for every message (and every sentence of a batched GNSS message), while
+	onEpochComplete is only called once the data has reached a consistent state (see
+	updateGnssDataWithMessage), with immutable snapshots of the data that are only rebuilt when
+	their source completes an epoch, at most once per message
+	"""
+	gnssData = GnssData(historyCapacity=historyCapacity)
 	gpsJamData: dict[str, tuple[int, int]] = {}
 	adsbData = ADSBData()
+	gnssSnapshot = gnssData.snapshot()
+	adsbSnapshot = adsbData.snapshot()
 
 	def onMessage(_client: MqttClient, _userdata: Any, message: MQTTMessage):
 		nonlocal gnssData
 		nonlocal gpsJamData
 		nonlocal adsbData
-		nonlocal onNewData
+		nonlocal gnssSnapshot
+		nonlocal adsbSnapshot
 
 		match message.topic:
 			case "gnss/rawMessages":
-				onNewGnssData(message.payload, gnssData, gpsJamData, satelliteTTL)
+				epochComplete = onNewGnssBatch(
+					message.payload, gnssData, gpsJamData, satelliteTTL, onRawMessage
+				)
 				gpsJamStartDate = datetime.fromisoformat("2022-02-15")
 				if not gpsJamData and gnssData.date > gpsJamStartDate:
 					csv = tryLoadCachedGpsJam(gnssData.date)
 					gpsJamData = gpsCsvToDict(csv)
+				if epochComplete:
+					gnssSnapshot = gnssData.snapshot()
 
 			case "adsb/rawMessages":
-				onNewAdsbData(message.payload, adsbData, flightTTL)
+				if onRawMessage is not None:
+					onRawMessage(message.payload)
+				epochComplete = onNewAdsbData(message.payload, adsbData, flightTTL)
+				if epochComplete:
+					adsbSnapshot = adsbData.snapshot()
 
 			case _:
+				if onRawMessage is not None:
+					onRawMessage(message.payload)
 				print(f"Unknown topic: {message.topic}")
+				epochComplete = False
 
-		onNewData(message.payload, gnssData, adsbData)
+		if epochComplete:
+			onEpochComplete(gnssSnapshot, adsbSnapshot)
 
 	return onMessage
 
 
+def packBatch(sentences: list[bytes]) -> bytes:
+	"""Join sentences into a single GNSS message"""
+	return BATCH_SEPARATOR.join(sentences)
+
+
+def unpackBatch(payload: bytes) -> list[bytes]:
+	"""Split a GNSS message into its sentences, a message with a single sentence being a batch of
+	one, so batched and unbatched publishers can be mixed
+	"""
+	return [sentence for sentence in payload.splitlines() if sentence]
+
+
+def onNewGnssBatch(
+	payload: bytes,
+	gnssData: GnssData,
+	gpsJamData: dict[str, tuple[int, int]],
+	satelliteTTL: timedelta,
+	onRawMessage: Callable[[bytes], None] | None,
+) -> bool:
+	"""Handle each sentence of a GNSS message, returning whether any of them completed an epoch.
+	The data is then snapshotted once for the whole batch, rather than at each epoch in it
+	"""
+	epochComplete = False
+	for sentence in unpackBatch(payload):
+		if onRawMessage is not None:
+			onRawMessage(sentence)
+		if onNewGnssData(sentence, gnssData, gpsJamData, satelliteTTL):
+			epochComplete = True
+	return epochComplete
+
+
 def onNewGnssData(
 	rawMessage: bytes,
 	gnssData: GnssData,
 	gpsJamData: dict[str, tuple[int, int]],
 	satelliteTTL: timedelta,
-):
-	"""Handle a new GNSS message"""
+) -> bool:
+	"""Handle a new GNSS message, returning whether it completed an epoch"""
 	parsedMessage = NMEAReader.parse(rawMessage)
 	if not isinstance(parsedMessage, NMEAMessage):
-		return
-	gnssData = updateGnssDataWithMessage(gnssData, parsedMessage, satelliteTTL, gpsJamData)
+		return False
+	return updateGnssDataWithMessage(gnssData, parsedMessage, satelliteTTL, gpsJamData)
 
 
-def onNewAdsbData(rawMessage: bytes, adsbData: ADSBData, flightTTL: timedelta):
-	"""Handle a new ADS-B message"""
+def onNewAdsbData(rawMessage: bytes, adsbData: ADSBData, flightTTL: timedelta) -> bool:
+	"""Handle a new ADS-B message, returning whether any flights changed"""
 	try:
 		parsedMessage = json.loads(rawMessage)
-		updateADSBDataWithMessage(adsbData, parsedMessage, flightTTL)
+		return updateADSBDataWithMessage(adsbData, parsedMessage, flightTTL)
 	except json.JSONDecodeError:
 		print("Failed to decode ADS-B message")
+		return False
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from pynmeagps import NMEAMessage
+
+from misc.mqtt import packBatch
+
+
+class SentenceBatcher:
+	"""Groups sentences to be published as a single MQTT message, rather than each paying for its
+	own round trips to the broker.
+
+	If splitOnEpoch, batches are split when the fix time moves on, and are also published once no
+	sentence has been received for maxDelay, as an epoch can take longer than that to arrive.
+	Otherwise a batch is published once its first sentence has been held for maxDelay
+	"""
+
+	def __init__(self, publish: Callable[[bytes], None], splitOnEpoch: bool, maxDelay: float):
+		self.publish = publish
+		self.splitOnEpoch = splitOnEpoch
+		self.maxDelay = maxDelay
+		# held while publishing too, so batches can't be published out of order
+		self.lock = threading.Lock()
+		self.sentences: list[bytes] = []
+		self.heldSince = 0.0
+		"""When the batch's first sentence was received, or its latest if splitOnEpoch"""
+		self.epochTime: Any = None
+
+	def add(self, rawData: bytes, message: NMEAMessage):
+		"""Add a sentence read from the receiver, publishing the batch before it if it's complete"""
+		# GSV and GSA sentences have no time, so stay with the epoch they were sent in
+		fixTime = getattr(message, "time", None)
+		with self.lock:
+			if self.splitOnEpoch and fixTime and fixTime != self.epochTime:
+				self.epochTime = fixTime
+				self.flush()
+			now = time.monotonic()
+			self.flushIfDue(now)
+
+			if not self.sentences or self.splitOnEpoch:
+				self.heldSince = now
+			self.sentences.append(rawData.strip())
+
+	def flushIfDue(self, now: float) -> float:
+		"""Publish the batch if it's been held for maxDelay, returning how long until the next is"""
+		if self.sentences and now - self.heldSince >= self.maxDelay:
+			self.flush()
+		if not self.sentences:
+			return self.maxDelay
+		return self.maxDelay - (now - self.heldSince)
+
+	def flush(self):
+		"""Publish any sentences waiting in the batch"""
+		if self.sentences:
+			self.publish(packBatch(self.sentences))
+			self.sentences = []
+
+	def startFlushing(self):
+		"""Publish batches that have been held for too long from a background thread, so the last
+		epoch received isn't held until the next starts
+		"""
+		threading.Thread(target=self.flushLoop, daemon=True).start()
+
+	def flushLoop(self):
+		while True:
+			with self.lock:
+				untilDue = self.flushIfDue(time.monotonic())
+			time.sleep(untilDue)
@@ -1,21 +1,38 @@
+from collections.abc import Callable
+
 from dotenv import load_dotenv
 from paho.mqtt.client import Client as MqttClient
 from pynmeagps import NMEAMessage
 
-from misc.config import loadConfig
+from misc.config import GnssConfig, loadConfig
 from misc.mqtt import createMqttPublishers, figureOutPublishingConfig
+from receiver.batching import SentenceBatcher
 from receiver.serialMonitor import monitorSerial
 
 
-def createPublishCallback(mqttClients: list[MqttClient]):
-	"""Create a function to publish any time a message is received"""
+def createPublishCallback(
+	mqttClients: list[MqttClient], config: GnssConfig
+) -> Callable[[bytes, NMEAMessage], None]:
+	"""Create a function to publish any time a message is received, either straight away or as
+	part of a batch (see config.batchBy)
+	"""
 
-	def publishMessage(rawData: bytes, _: NMEAMessage):
-		data = rawData.decode("utf-8").strip()
+	def publishPayload(payload: bytes):
 		for mqttClient in mqttClients:
-			mqttClient.publish("gnss/rawMessages", data, qos=2)
+			mqttClient.publish("gnss/rawMessages", payload, qos=config.publishQos)
+
+	def publishMessage(rawData: bytes, _: NMEAMessage):
+		publishPayload(rawData.strip())
 
-	return publishMessage
+	match config.batchBy:
+		case "sentence":
+			return publishMessage
+		case "epoch" | "window":
+			batcher = SentenceBatcher(publishPayload, config.batchBy == "epoch", config.batchWindow)
+			batcher.startFlushing()
+			return batcher.add
+		case _:
+			raise ValueError(f"Unknown batchBy: {config.batchBy}")
 
 
 def main():
@@ -25,7 +42,7 @@ def main():
 	mqttConfig = figureOutPublishingConfig(config)
 
 	clients = createMqttPublishers(mqttConfig, "gnssreceiver")
-	onMessage = createPublishCallback(clients)
+	onMessage = createPublishCallback(clients, config.gnss)
 	monitorSerial(onMessage, config.gnss)
 
 
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import paho.mqtt.enums as mqttEnums
+from dotenv import load_dotenv
+from paho.mqtt.client import Client as MqttClient
+from paho.mqtt.client import MQTTMessage
+from pynmeagps import NMEAMessage, NMEAParseError, NMEAReader
+
+from misc.config import MqttConfig, loadConfig
+from misc.mqtt import unpackBatch
+from receiver.batching import SentenceBatcher
+
+TOPIC = "benchmark/gnssRawMessages"
+"""Kept apart from the live topic, so anything subscribed to it isn't fed the benchmark"""
+
+
+def main():
+	"""Compare how many sentences a second get through the MQTT broker (e.g. a local mosquitto)
+	when published one at a time and when batched by epoch, at each QoS level
+	"""
+	load_dotenv()
+	config = loadConfig()
+	messages = loadMessages("100k.nmea", 10_000)
+
+	for qos in (0, 1, 2):
+		for batched in (False, True):
+			(received, seconds) = measureThroughput(config.mqtt, messages, qos, batched)
+			label = "batched by epoch" if batched else "per sentence"
+			print(
+				f"QoS {qos}, {label}: {received / seconds:,.0f} sentences/s "
+				f"({received}/{len(messages)} received in {seconds:.2f}s)"
+			)
+
+
+def loadMessages(path: str, numMessages: int) -> list[tuple[bytes, NMEAMessage]]:
+	"""Read and parse the first numMessages sentences, skipping any that can't be parsed"""
+	messages = []
+	with open(path, "r", encoding="utf-8") as f:
+		for line in f:
+			rawData = line.strip().encode()
+			try:
+				parsed = NMEAReader.parse(rawData)
+			except NMEAParseError:
+				continue
+			if isinstance(parsed, NMEAMessage):
+				messages.append((rawData, parsed))
+			if len(messages) == numMessages:
+				break
+	return messages
+
+
+def measureThroughput(
+	config: MqttConfig, messages: list[tuple[bytes, NMEAMessage]], qos: int, batched: bool
+) -> tuple[int, float]:
+	"""Publish every message, returning how many sentences arrived and how long they took"""
+	received = 0
+	allReceived = threading.Event()
+
+	def onMessage(_client: MqttClient, _userdata: Any, message: MQTTMessage):
+		nonlocal received
+		received += len(unpackBatch(message.payload))
+		if received >= len(messages):
+			allReceived.set()
+
+	subscriber = createMqttClient(config, onMessage)
+	subscribed = threading.Event()
+	subscriber.on_subscribe = lambda *_args: subscribed.set()
+	subscriber.subscribe(TOPIC, qos=qos)
+	subscribed.wait(timeout=10)
+	publisher = createMqttClient(config)
+
+	def publish(payload: bytes):
+		publisher.publish(TOPIC, payload, qos=qos)
+
+	startTime = time.perf_counter()
+	if batched:
+		batcher = SentenceBatcher(publish, splitOnEpoch=True, maxDelay=float("inf"))
+		for rawData, parsed in messages:
+			batcher.add(rawData, parsed)
+		batcher.flush()
+	else:
+		for rawData, _ in messages:
+			publish(rawData)
+	allReceived.wait(timeout=120)
+	seconds = time.perf_counter() - startTime
+
+	publisher.disconnect()
+	subscriber.disconnect()
+	return (received, seconds)
+
+
+def createMqttClient(
+	config: MqttConfig, onMessage: Callable[[MqttClient, Any, MQTTMessage], None] | None = None
+) -> MqttClient:
+	"""Create a client without credentials, as the benchmark is meant for a local broker"""
+	mqttClient = MqttClient(mqttEnums.CallbackAPIVersion.VERSION2)
+	mqttClient.on_message = onMessage
+	mqttClient.connect(config.host, config.port)
+	mqttClient.loop_start()
+	return mqttClient
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,63 @@
+import random
+import timeit
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from gnss.history import utcTimestamp
+from gnss.satellite import (
+	getSatelliteLatLong,
+	getSatelliteLatLongs,
+	orbitHeightForNetwork,
+	rotateLatLongByTime,
+	rotateLongsByTime,
+)
+
+
+def main():
+	"""Compare the scalar and vectorised satellite projection over a full set of trails"""
+	numSatellites = 100
+	numTrailPoints = 500
+	repeats = 5
+
+	currentTime = datetime.now()
+	networks = [random.choice(["GP", "GL", "GA", "GB"]) for _ in range(numSatellites)]
+	trails = [
+		(
+			np.array(
+				[
+					utcTimestamp(currentTime - timedelta(minutes=20 * i))
+					for i in range(numTrailPoints)
+				]
+			),
+			np.random.uniform(0, 90, numTrailPoints),
+			np.random.uniform(0, 360, numTrailPoints),
+		)
+		for _ in range(numSatellites)
+	]
+
+	def scalar():
+		for network, (times, elevations, azimuths) in zip(networks, trails, strict=True):
+			for measuredTime, elevation, azimuth in zip(times, elevations, azimuths, strict=True):
+				rotateLatLongByTime(
+					getSatelliteLatLong(azimuth, elevation, network, 54.6, -5.9),
+					datetime.fromtimestamp(measuredTime),
+					currentTime,
+				)
+
+	def batch():
+		for network, (times, elevations, azimuths) in zip(networks, trails, strict=True):
+			(_, longs) = getSatelliteLatLongs(
+				azimuths, elevations, orbitHeightForNetwork(network), 54.6, -5.9
+			)
+			rotateLongsByTime(longs, times, currentTime)
+
+	print(f"{numSatellites} satellites x {numTrailPoints} trail points, best of {repeats}")
+	scalarTime = min(timeit.repeat(scalar, number=1, repeat=repeats))
+	print(f"Scalar: {scalarTime * 1000:.2f}ms")
+	batchTime = min(timeit.repeat(batch, number=1, repeat=repeats))
+	print(f"Batch:  {batchTime * 1000:.2f}ms ({scalarTime / batchTime:.1f}x faster)")
+
+
+if __name__ == "__main__":
+	main()
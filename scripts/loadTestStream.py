@@ -0,0 +1,100 @@
+import http.client
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+
+@dataclass
+class ClientResult:
+	connected: bool = False
+	updates: int = 0
+	latencies: list[float] = field(default_factory=list)
+	"""Seconds from each update being sent to it being received"""
+	error: str | None = None
+
+
+def main():
+	"""Connect many clients to the live update stream at once, and measure how long each update
+	takes to reach every client. Run on the same machine as the server, so their clocks agree.
+
+	Usage: python -m scripts.loadTestStream [url] [numClients] [durationSeconds]
+	"""
+	url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:2024/api/stream"
+	numClients = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+	duration = float(sys.argv[3]) if len(sys.argv) > 3 else 30
+
+	results = [ClientResult() for _ in range(numClients)]
+	stopAt = time.time() + duration
+	threads = [
+		threading.Thread(target=runClient, args=(url, result, stopAt), daemon=True)
+		for result in results
+	]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join(duration + 10)
+
+	connected = [result for result in results if result.connected]
+	print(f"{len(connected)}/{numClients} clients connected for {duration:.0f}s")
+	errors = [result.error for result in results if result.error is not None]
+	if errors:
+		print(f"{len(errors)} errors, e.g. {errors[0]}")
+
+	updateCounts = [result.updates for result in connected]
+	if updateCounts:
+		print(f"Updates per client: min {min(updateCounts)}, max {max(updateCounts)}")
+
+	latencies = [latency for result in connected for latency in result.latencies]
+	if latencies:
+		print(f"Delivery latency over {len(latencies)} updates:")
+		for percentile in (50, 90, 99, 99.9):
+			print(
+				f"  {percentile}th percentile: {calcPercentile(latencies, percentile) * 1000:.1f}ms"
+			)
+
+
+def runClient(url: str, result: ClientResult, stopAt: float):
+	"""Read updates from the stream until stopAt"""
+	parts = urlsplit(url)
+	connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+	try:
+		connection.request("GET", parts.path, headers={"Accept": "text/event-stream"})
+		response = connection.getresponse()
+		if response.status != http.HTTPStatus.OK:
+			result.error = f"HTTP {response.status}"
+			return
+		result.connected = True
+		readUpdates(response, result, stopAt)
+	except OSError as e:
+		result.error = repr(e)
+	finally:
+		connection.close()
+
+
+def readUpdates(response: http.client.HTTPResponse, result: ClientResult, stopAt: float):
+	"""Record how long each update took to arrive, until stopAt or the stream is closed"""
+	eventType = None
+	while time.time() < stopAt:
+		line = response.readline()
+		if not line:
+			result.error = "Stream closed by server"
+			return
+		if line.startswith(b"event: "):
+			eventType = line[7:].strip().decode()
+		elif line.startswith(b"data: ") and eventType == "update":
+			sentAt = json.loads(line[6:])["time"]
+			result.latencies.append(time.time() - sentAt)
+			result.updates += 1
+
+
+def calcPercentile(values: list[float], percentile: float) -> float:
+	sortedValues = sorted(values)
+	index = min(int(len(sortedValues) * (percentile / 100)), len(sortedValues) - 1)
+	return sortedValues[index]
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,72 @@
+# pylint: skip-file
+from gnss.changes import FLIGHTS, POSITION, SATELLITES, ChangeTracker
+from gnss.nmea import ADSBSnapshot, GnssSnapshot
+from web.artifacts import Artifact, ArtifactWriter
+
+
+def changedData(*groups: str) -> tuple[GnssSnapshot, ADSBSnapshot]:
+	changes = ChangeTracker()
+	changes.markChanged(*groups)
+	return (GnssSnapshot(changes=changes), ADSBSnapshot())
+
+
+def test_onlyStaleArtifactsWritten():
+	written = []
+	writer = ArtifactWriter(
+		[
+			Artifact("position", lambda *_: written.append("position"), (POSITION,)),
+			Artifact("flights", lambda *_: written.append("flights"), (), (FLIGHTS,)),
+		]
+	)
+	writer.publish(*changedData(POSITION))
+	writer.writeDue()
+	assert sorted(written) == ["flights", "position"]
+
+	for artifact in writer.artifacts:
+		artifact.lastWrittenAt = float("-inf")
+	writer.publish(*changedData(POSITION))
+	assert writer.writeDue() is None
+	assert sorted(written) == ["flights", "position", "position"]
+
+
+def test_rateLimitedArtifactWrittenOnceDue():
+	written = []
+	writer = ArtifactWriter(
+		[Artifact("map", lambda *_: written.append("map"), (SATELLITES,), maxFps=2)]
+	)
+	writer.publish(*changedData(SATELLITES))
+	writer.writeDue()
+	writer.publish(*changedData(SATELLITES))
+
+	untilDue = writer.writeDue()
+	assert untilDue is not None
+	assert 0 < untilDue <= 0.5
+	assert written == ["map"]
+
+	writer.artifacts[0].lastWrittenAt -= 0.5
+	assert writer.writeDue() is None
+	assert written == ["map", "map"]
+
+
+def test_failedWriteCountedAndRetried():
+	def failingWrite(*_):
+		raise OSError("disk full")
+
+	artifact = Artifact("stats", failingWrite, (POSITION,))
+	writer = ArtifactWriter([artifact])
+	writer.publish(*changedData(POSITION))
+
+	assert writer.writeDue() is not None
+	assert artifact.stats.errors == 1
+	assert artifact.stats.writes == 0
+	assert artifact.isStale(*writer.latestData)
+
+
+def test_slowWriteCountedAsOverrun():
+	artifact = Artifact("map", lambda *_: None, (SATELLITES,), maxFps=float("inf"))
+	writer = ArtifactWriter([artifact])
+	writer.publish(*changedData(SATELLITES))
+	writer.writeDue()
+
+	assert artifact.stats.writes == 1
+	assert artifact.stats.overruns == 1
@@ -0,0 +1,33 @@
+# pylint: skip-file
+import gzip
+
+from web.assets import StaticAssets
+from web.store import storedArtifact
+
+INDEX_HTML = '<head><link rel="stylesheet" href="/style.css"></head>'
+STYLE = b"body { color: red; }" * 100
+
+
+def test_indexPointsAtHashedUrls(tmp_path):
+	(tmp_path / "style.css").write_bytes(STYLE)
+	assets = StaticAssets(
+		{"style.css": str(tmp_path / "style.css"), "script.js": str(tmp_path / "missing.js")}
+	)
+
+	hashedUrl = assets.url("style.css")
+	assert hashedUrl.startswith("/assets/style.")
+	assert assets.byHashedName[hashedUrl.removeprefix("/assets/")].content == STYLE
+	assert assets.url("script.js") == "/script.js"
+
+	index = assets.renderIndex(INDEX_HTML).content.decode()
+	assert f'href="{hashedUrl}"' in index
+	assert '"style.css": "/assets/style.' in index
+
+
+def test_compressedOnceAndReproducibly():
+	artifact = storedArtifact("style.css", STYLE)
+	compressed = artifact.encoded("gzip")
+
+	assert artifact.encoded("gzip") is compressed
+	assert gzip.decompress(compressed) == STYLE
+	assert storedArtifact("style.css", STYLE).encoded("gzip") == compressed
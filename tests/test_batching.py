@@ -0,0 +1,99 @@
+# pylint: skip-file
+from datetime import timedelta
+from functools import reduce
+
+import pytest
+from paho.mqtt.client import MQTTMessage
+from pynmeagps import NMEAReader
+
+from misc.mqtt import callbackOnMessage, packBatch, unpackBatch
+from receiver.batching import SentenceBatcher
+
+GGA = "GPGGA,{time},5436.0,N,00556.0,W,1,08,1.0,10.0,M,0,M,,"
+GSV = "GPGSV,1,1,01,01,40,083,46"
+
+
+def rawSentence(body: str) -> bytes:
+	checksum = reduce(lambda acc, char: acc ^ ord(char), body, 0)
+	return f"${body}*{checksum:02X}\r\n".encode("ascii")
+
+
+def addSentence(batcher: SentenceBatcher, body: str):
+	raw = rawSentence(body)
+	batcher.add(raw, NMEAReader.parse(raw))
+
+
+def test_epochBatchPublishedOnceFixTimeMovesOn():
+	published: list[bytes] = []
+	batcher = SentenceBatcher(published.append, splitOnEpoch=True, maxDelay=60)
+
+	addSentence(batcher, GGA.format(time="120000.00"))
+	addSentence(batcher, GSV)
+	assert published == []
+
+	addSentence(batcher, GGA.format(time="120001.00"))
+	assert len(published) == 1
+	assert unpackBatch(published[0]) == [
+		rawSentence(GGA.format(time="120000.00")).strip(),
+		rawSentence(GSV).strip(),
+	]
+
+
+def test_epochSlowerThanMaxDelayKeptInOneBatch(monkeypatch):
+	published: list[bytes] = []
+	batcher = SentenceBatcher(published.append, splitOnEpoch=True, maxDelay=0.1)
+	now = 1000.0
+	monkeypatch.setattr("receiver.batching.time.monotonic", lambda: now)
+
+	addSentence(batcher, GGA.format(time="120000.00"))
+	for _ in range(10):
+		now += 0.05
+		addSentence(batcher, GSV)
+	assert published == []
+	assert batcher.flushIfDue(now + 0.05) == pytest.approx(0.05)
+
+	now += 0.05
+	addSentence(batcher, GGA.format(time="120001.00"))
+	assert len(published) == 1
+	assert len(unpackBatch(published[0])) == 11
+
+	batcher.flushIfDue(now + 0.1)
+	assert len(published) == 2
+
+
+def test_batchPublishedOnceHeldForMaxDelay():
+	published: list[bytes] = []
+	batcher = SentenceBatcher(published.append, splitOnEpoch=False, maxDelay=0.5)
+	addSentence(batcher, GSV)
+	addSentence(batcher, GSV)
+
+	untilDue = batcher.flushIfDue(batcher.heldSince + 0.2)
+	assert published == []
+	assert untilDue == pytest.approx(0.3)
+
+	batcher.flushIfDue(batcher.heldSince + 0.5)
+	assert len(unpackBatch(published[0])) == 2
+
+
+def test_batchedSentencesEachPassedOnAndEpochNotifiedOnce():
+	rawMessages: list[bytes] = []
+	epochs = []
+	onMessage = callbackOnMessage(
+		lambda gnssData, _adsbData: epochs.append(gnssData),
+		timedelta(hours=1),
+		timedelta(seconds=30),
+		16,
+		rawMessages.append,
+	)
+	sentences = [
+		rawSentence(GGA.format(time="120000.00")).strip(),
+		rawSentence(GGA.format(time="120001.00")).strip(),
+		rawSentence(GSV).strip(),
+	]
+	message = MQTTMessage(topic=b"gnss/rawMessages")
+	message.payload = packBatch(sentences)
+
+	onMessage(None, None, message)
+	assert rawMessages == sentences
+	assert len(epochs) == 1
+	assert len(epochs[0].satellites) == 1
@@ -1,5 +1,13 @@
 # pylint: skip-file
-from views.map.cities import findNearestCityWithCache
+from concurrent.futures import ThreadPoolExecutor
+
+import views.map.cities
+from views.map.cities import (
+	buildCityIndex,
+	findNearestCity,
+	findNearestCityWithCache,
+	loadCityDataset,
+)
 
 
 def test_finds_nearest_city():
@@ -14,3 +22,68 @@ def test_finds_nearest_city():
 	assert findNearestCityWithCache(25, 121.56) == "Taipei"  # on the edge of Taipei, Taiwan
 	assert findNearestCityWithCache(69.5, 19) == "Tromso"  # down a bit from Tromsø, Norway
 	assert findNearestCityWithCache(30.05, 31.24) == "Cairo"  # middle-ish of Cairo, Egypt
+
+
+def writeDataset(directory, cities: list[tuple[str, float, float, str, int]]):
+	"""Write geonames format TSVs with the given (name, lat, long, country, population) cities"""
+	with open(directory / "cities.txt", "w", encoding="utf8") as f:
+		for index, (name, lat, long, country, population) in enumerate(cities):
+			row = [str(index), name, name, "", str(lat), str(long), "P", "PPL", country]
+			row += [""] * 5 + [str(population)]
+			f.write("\t".join(row) + "\n")
+	with open(directory / "countries.txt", "w", encoding="utf8") as f:
+		f.write("#ISO\tISO3\n")
+		f.write("\t".join(["AA", "", "", "", "", "", "1000", "1000000000"]) + "\n")
+		f.write("\t".join(["BB", "", "", "", "", "", "1000", "1000000"]) + "\n")
+
+	return loadCityDataset(
+		str(directory / "cities.txt"), str(directory / "countries.txt"), str(directory)
+	)
+
+
+def test_nearest_city_by_great_circle(tmp_path):
+	dataset = writeDataset(
+		tmp_path,
+		[
+			("Over The Pole", 89, 170, "AA", 20000),
+			("Same Meridian", 85, 0, "AA", 20000),
+			("West", 0, -179.9, "BB", 20000),
+			("East", 0, 178, "BB", 20000),
+		],
+	)
+	cityIndex = buildCityIndex(dataset)
+
+	assert findNearestCity(89, 0, cityIndex) == "Over The Pole"
+	assert findNearestCity(0, 179.9, cityIndex) == "West"  # across the antimeridian
+	assert (tmp_path / "cities.npy").exists()
+
+
+def test_loads_prebuilt_dataset(tmp_path):
+	writeDataset(tmp_path, [("Belfast", 54.6, -5.93, "AA", 345000)])
+	(tmp_path / "cities.txt").unlink()
+
+	dataset = loadCityDataset(
+		str(tmp_path / "cities.txt"), str(tmp_path / "countries.txt"), str(tmp_path)
+	)
+	assert dataset.cityName(0) == "Belfast"
+	assert float(dataset.cities["lat"][0]) == 54.6
+
+
+def test_dataset_built_once_by_concurrent_loads(tmp_path, monkeypatch):
+	writeDataset(tmp_path, [("Belfast", 54.6, -5.93, "AA", 345000)])
+	(tmp_path / "cities.npy").unlink()
+	builds = []
+	build = views.map.cities.buildCityDataset
+
+	def countingBuild(*args):
+		builds.append(args)
+		build(*args)
+
+	monkeypatch.setattr(views.map.cities, "buildCityDataset", countingBuild)
+	paths = (str(tmp_path / "cities.txt"), str(tmp_path / "countries.txt"), str(tmp_path))
+	with ThreadPoolExecutor(8) as pool:
+		datasets = list(pool.map(lambda _: loadCityDataset(*paths), range(8)))
+
+	assert len(builds) == 1
+	assert all(dataset.cityName(0) == "Belfast" for dataset in datasets)
+	assert not [path for path in tmp_path.iterdir() if path.name.startswith(".")]
@@ -1,7 +1,7 @@
 # pylint: skip-file
 from font.fetch import fetchFontRomsIfNeeded
-from font.hp1345Font import Font
-from font.mksvgs import makeSvgString, makeTextGroup
+from font.hp1345Font import Font, getFont
+from font.mksvgs import compileGlyph, makeSvgString, makeTextGroup, makeTextGroupCached
 
 fetchFontRomsIfNeeded()
 
@@ -43,3 +43,30 @@ def test_generateCharGroups():
 		print(f"Testing char {chr(char)}")
 		svg, _, _ = makeTextGroup(font, chr(char).encode("ascii"))
 		assert svg
+
+
+def test_compileGlyph():
+	"""Test that a character's vectors are precompiled into relative path data and metrics"""
+	glyph = compileGlyph([[(1, 2)], [(0, 1), (3, 0), (0, 0)], [(1, 1), (0, 0)]])
+	assert glyph.path == " m1,2 m0,1 l3,0 0,0 m1,1 l0,0"
+	assert glyph.dots == ((5, 4),)
+	assert glyph.advance == (5, 4)
+	assert glyph.boundingBox == (1, 2, 5, 4)
+
+
+def test_cachedTextGroup():
+	"""Test that repeated labels are only rendered once"""
+	makeTextGroupCached.cache_clear()
+	first = makeTextGroupCached(font, b"42", fontThickness=2)
+	second = makeTextGroupCached(font, b"42", fontThickness=2)
+
+	assert first == makeTextGroup(font, b"42", fontThickness=2)
+	assert second is first
+	assert makeTextGroupCached.cache_info().hits == 1
+	assert makeTextGroupCached.cache_info().misses == 1
+
+
+def test_fontLoadedOnce():
+	"""Test that the shared font is only loaded once, and matches decoding the ROMs directly"""
+	assert getFont() is getFont()
+	assert getFont().charVectorsList == font.charVectorsList
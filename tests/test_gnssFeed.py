@@ -0,0 +1,49 @@
+# pylint: skip-file
+import json
+
+from gnss.changes import SATELLITES, ChangeTracker
+from gnss.nmea import GnssSnapshot
+from palettes.palette import loadPalette
+from web.gnssFeed import DELTAS_FILE, GnssDeltas, GnssFeed
+from web.store import ArtifactStore
+
+
+def snapshot() -> GnssSnapshot:
+	changes = ChangeTracker()
+	changes.markChanged(SATELLITES)
+	return GnssSnapshot(changes=changes)
+
+
+def test_deltasFromPreviousAndLatestVersion(tmp_path):
+	store = ArtifactStore(str(tmp_path))
+	feed = GnssFeed(loadPalette("warGames"))
+	gnssDeltas = GnssDeltas(store)
+	(oldest, older, latest) = (snapshot(), snapshot(), snapshot())
+
+	for gnssData in (oldest, older, latest):
+		(_, deltas) = feed.publish(gnssData)
+		store.put(DELTAS_FILE, deltas)
+
+	assert gnssDeltas.since(oldest.changes.version) is None
+	delta = gnssDeltas.since(older.changes.version)
+	assert delta is not None
+	assert json.loads(delta.content)["version"] == latest.changes.version
+	assert delta.mimetype == "application/json"
+	assert gnssDeltas.latestStep() is delta
+
+	upToDate = gnssDeltas.since(latest.changes.version)
+	assert upToDate is not None
+	assert json.loads(upToDate.content)["satellites"] == []
+
+
+def test_republishedSnapshotKeepsStepFromPreviousVersion():
+	feed = GnssFeed(loadPalette("warGames"))
+	(older, latest) = (snapshot(), snapshot())
+	feed.publish(older)
+	feed.publish(latest)
+
+	(_, deltas) = feed.publish(latest)
+	assert [line.split(b"\t")[0] for line in deltas.splitlines()] == [
+		b"%d" % older.changes.version,
+		b"%d" % latest.changes.version,
+	]
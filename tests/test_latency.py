@@ -0,0 +1,17 @@
+# pylint: skip-file
+from web.latency import RequestLatencies
+
+
+def test_requestsCountedInBucketPerRoute():
+	latencies = RequestLatencies()
+	latencies.record("/map", 0.0005)
+	latencies.record("/map", 0.02)
+	latencies.record("/map", 10)
+	latencies.record("/api/gnss", 0.001)
+
+	histograms = latencies.toJSON()
+	assert histograms["/map"]["count"] == 3
+	assert histograms["/map"]["buckets"]["1"] == 1
+	assert histograms["/map"]["buckets"]["25"] == 1
+	assert histograms["/map"]["buckets"]["+Inf"] == 1
+	assert histograms["/api/gnss"]["buckets"]["1"] == 1
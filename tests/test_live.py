@@ -0,0 +1,70 @@
+# pylint: skip-file
+import json
+
+from web.gnssFeed import GnssDeltas
+from web.live import LiveUpdates
+from web.store import ArtifactStore
+
+EMPTY_UPDATE_EVENT = b"event: update\ndata: {}\n\n"
+
+
+def test_subscribersShareOneSerializedUpdate(tmp_path):
+	store = ArtifactStore(str(tmp_path))
+	updates = LiveUpdates(store, GnssDeltas(store))
+	updates.publish(b"{}")
+
+	first = updates.waitForUpdate(0, timeout=0)
+	second = updates.waitForUpdate(0, timeout=0)
+	assert first is not None
+	assert second is not None
+	assert first[1] is second[1]
+	assert first[1] == EMPTY_UPDATE_EVENT
+
+
+def test_slowSubscriberSkipsToLatest(tmp_path):
+	store = ArtifactStore(str(tmp_path))
+	updates = LiveUpdates(store, GnssDeltas(store))
+	updates.publish(b"1")
+	updates.publish(b"2")
+
+	latest = updates.waitForUpdate(0, timeout=0)
+	assert latest is not None
+	(version, event) = latest
+	assert event.endswith(b"data: 2\n\n")
+	assert updates.waitForUpdate(version, timeout=0) is None
+
+
+def test_updateIncludesGnssDataAndPanelVersions(tmp_path):
+	store = ArtifactStore(str(tmp_path))
+	mapSvg = store.put("map.svg", b"<svg/>")
+	store.put("gnssData.json", json.dumps({"satellites": []}).encode())
+	updates = LiveUpdates(store, GnssDeltas(store))
+
+	update = json.loads(updates.serializeUpdate(updates.currentEtags()))
+	assert update["versions"] == {"map": mapSvg.etag}
+	assert update["gnss"] == {"satellites": []}
+
+
+def test_updatePublishedAsSoonAsPanelStored(tmp_path):
+	store = ArtifactStore(str(tmp_path), writeToDisk=False)
+	updates = LiveUpdates(store, GnssDeltas(store))
+	mapSvg = store.put("map.svg", b"<svg/>")
+	store.put("metrics.json", b"{}")
+
+	update = updates.waitForUpdate(0, timeout=0)
+	assert update is not None
+	(version, event) = update
+	assert json.loads(event.split(b"data: ")[1])["versions"] == {"map": mapSvg.etag}
+	assert updates.waitForUpdate(version, timeout=0) is None
+
+
+def test_subscribersPastLimitTurnedAway(tmp_path):
+	store = ArtifactStore(str(tmp_path))
+	updates = LiveUpdates(store, GnssDeltas(store), maxSubscribers=2)
+
+	assert updates.subscribe()
+	assert updates.subscribe()
+	assert not updates.subscribe()
+
+	updates.unsubscribe()
+	assert updates.subscribe()
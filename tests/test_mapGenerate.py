@@ -0,0 +1,42 @@
+# pylint: skip-file
+from collections import OrderedDict
+from dataclasses import replace
+
+import views.map.generate
+from misc.config import MapConfig
+from misc.size import Size
+from palettes.palette import loadPalette
+from views.map.generate import getPreparedMap, scaleBucket
+
+preparedMap = """<svg viewBox="0 0 100 50">
+<!-- satellites go here -->
+<g id="Key"></g>
+</svg>"""
+
+
+def test_zoomingInAndBackOutHitsCache(monkeypatch):
+	preparedScales = []
+
+	def prepareInitialMap(_mapSvg, _palette, options):
+		preparedScales.append(options.scaleFactor)
+		return (preparedMap, Size(10, 10))
+
+	monkeypatch.setattr(views.map.generate, "prepareInitialMap", prepareInitialMap)
+	monkeypatch.setattr(views.map.generate, "preparedMapCache", OrderedDict())
+	palette = loadPalette("warGames")
+	options = MapConfig(scaleFactor=1.3)
+
+	# as the Q and E keys zoom in and out
+	for zoom in [1.1] * 3 + [1 / 1.1] * 6 + [1.1] * 3:
+		options = replace(options, scaleFactor=options.scaleFactor * zoom)
+		getPreparedMap(palette, options)
+
+	assert len(preparedScales) == 7
+	assert getPreparedMap(palette, options) is getPreparedMap(palette, MapConfig(scaleFactor=1.3))
+	assert len(preparedScales) == 7
+
+
+def test_scaleBucketsAreZoomSteps():
+	assert scaleBucket(1) == 1
+	assert scaleBucket(1.1**5 * 1.01) == scaleBucket(1.1**5)
+	assert scaleBucket(1.1**5) != scaleBucket(1.1**6)
@@ -0,0 +1,38 @@
+# pylint: skip-file
+import pytest
+
+from views.map.template import KEY_TAG, compileMapTemplate
+
+preparedMap = """<svg viewBox="0 0 100 50">
+<g id="Land"></g>
+<!-- satellites go here -->
+  <g id="Key">
+<text>Key</text></g>
+</svg>"""
+
+
+def test_templateMatchesReplace():
+	template = compileMapTemplate(preparedMap)
+	rendered = template.render(
+		viewBox=b"10 5 20 10",
+		satellites=b'<g id="Satellites"></g>',
+		keyTag=b'<g id="Key" style="display:none">',
+	)
+
+	expected = (
+		preparedMap.replace("0 0 100 50", "10 5 20 10")
+		.replace("<!-- satellites go here -->", '<g id="Satellites"></g>')
+		.replace('<g id="Key">', '<g id="Key" style="display:none">')
+	)
+	assert rendered == expected.encode()
+
+
+def test_templateRequiresEverySlot():
+	with pytest.raises(ValueError):
+		compileMapTemplate(preparedMap.replace("<!-- satellites go here -->", ""))
+
+
+def test_chunkAfterKeyIsRestOfKey():
+	template = compileMapTemplate(preparedMap)
+	keyContents = preparedMap.split('<g id="Key">')[1]
+	assert template.chunkAfter(KEY_TAG) == keyContents.encode()
@@ -0,0 +1,287 @@
+# pylint: skip-file
+import time
+from datetime import datetime, timedelta, timezone
+from functools import reduce
+
+import pytest
+from pynmeagps import NMEAReader
+
+from gnss.changes import DOP, POSITION, SATELLITES
+from gnss.history import PositionHistory
+from gnss.nmea import GnssData, updateGnssDataWithMessage
+from gnss.satellite import getSatelliteLatLong
+from palettes.palette import loadPalette
+
+startTime = datetime(2025, 1, 1, 12, 0, 0)
+ttl = timedelta(seconds=60)
+
+
+def sentence(body: str):
+	"""Parse the given NMEA sentence body, adding the checksum"""
+	checksum = reduce(lambda acc, char: acc ^ ord(char), body, 0)
+	return NMEAReader.parse(f"${body}*{checksum:02X}\r\n".encode("ascii"))
+
+
+def receive(gnssData: GnssData, body: str, time: datetime = startTime) -> bool:
+	gnssData.date = time
+	return updateGnssDataWithMessage(gnssData, sentence(body), ttl, {})
+
+
+def test_satellitesKeyedByNetworkAndPrn():
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,1,1,02,03,40,120,33,04,10,020,20")
+	receive(gnssData, "GLGSV,1,1,01,03,50,100,30")
+
+	assert [(sat.network, sat.prnNumber) for sat in gnssData.satellites] == [
+		("GP", 3),
+		("GP", 4),
+		("GL", 3),
+	]
+
+
+def test_updatedSatelliteKeepsOrderAndHistory():
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,1,1,02,03,40,120,33,04,10,020,20")
+	firstHistory = gnssData.satellites[0].previousPositions
+	receive(gnssData, "GPGSV,1,1,01,03,41,121,35", startTime + timedelta(seconds=1))
+
+	updated = gnssData.satellites[0]
+	assert (updated.prnNumber, updated.elevation, updated.snr) == (3, 41, 35)
+	assert updated.previousPositions is firstHistory
+	assert len(gnssData.satellites) == 2
+
+
+def test_satellitesExpireAfterTTL():
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,1,1,02,03,40,120,33,04,10,020,20")
+	receive(gnssData, "GPGSV,1,1,01,03,40,120,33", startTime + timedelta(seconds=30))
+	receive(gnssData, "GPGSV,1,1,01,03,40,120,33", startTime + timedelta(seconds=61))
+
+	assert [sat.prnNumber for sat in gnssData.satellites] == [3]
+
+
+def test_expiryHeapStaysBounded():
+	gnssData = GnssData()
+	for second in range(1000):
+		receive(gnssData, "GPGSV,1,1,01,03,40,120,33", startTime + timedelta(seconds=second))
+
+	assert len(gnssData.satellites) == 1
+	assert len(gnssData.satelliteExpiry) <= 4 * len(gnssData.satellites) + 64
+
+
+def test_gsvCycleCommittedOnceComplete():
+	gnssData = GnssData()
+	assert not receive(gnssData, "GPGSV,2,1,05,01,40,120,33,02,10,020,20,03,50,100,30,04,60,200,25")
+	assert gnssData.satellites == []
+
+	assert receive(gnssData, "GPGSV,2,2,05,05,70,300,40")
+	assert [sat.prnNumber for sat in gnssData.satellites] == [1, 2, 3, 4, 5]
+
+
+def test_incompleteGsvCycleDropped():
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,3,1,09,01,40,120,33")
+	assert not receive(gnssData, "GPGSV,3,3,09,09,70,300,40")  # missed fragment 2
+	assert gnssData.satellites == []
+
+	receive(gnssData, "GPGSV,2,1,05,01,40,120,33")
+	assert receive(gnssData, "GPGSV,2,2,05,05,70,300,40")
+	assert [sat.prnNumber for sat in gnssData.satellites] == [1, 5]
+
+
+def test_gsvCyclesAssembledPerTalker():
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,2,1,05,01,40,120,33")
+	assert receive(gnssData, "GLGSV,1,1,01,65,50,100,30")
+	assert receive(gnssData, "GPGSV,2,2,05,05,70,300,40")
+
+	assert [(sat.network, sat.prnNumber) for sat in gnssData.satellites] == [
+		("GL", 65),
+		("GP", 1),
+		("GP", 5),
+	]
+
+
+def test_epochCompleteWhenFixTimeMoves():
+	gnssData = GnssData()
+	rmc = "GPRMC,120001.00,A,5436.00000,N,00600.00000,W,0.004,77.52,010125,,,A"
+	assert updateGnssDataWithMessage(gnssData, sentence(rmc), ttl, {})
+	assert not updateGnssDataWithMessage(gnssData, sentence(rmc), ttl, {})
+	assert not updateGnssDataWithMessage(
+		gnssData, sentence("GPVTG,77.52,T,,M,0.004,N,0.008,K,A"), ttl, {}
+	)
+
+
+def test_historyThinsOlderPositionsOnceFull():
+	history = PositionHistory(8)
+	for minute in range(8):
+		history.append(startTime + timedelta(minutes=minute), minute, minute, 0, 0)
+	before = history.columns().elevations
+
+	history.append(startTime + timedelta(minutes=8), 8, 8, 0, 0)
+
+	assert list(history.columns().elevations) == [0, 2, 4, 5, 6, 7, 8]
+	assert list(before) == [0, 1, 2, 3, 4, 5, 6, 7]  # earlier views are left untouched
+
+
+def test_historyReprojectedWhenObserverMoves():
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,1,1,01,03,40,120,33")
+	projectedFromOrigin = gnssData.satellites[0].previousPositions.columns().longs
+
+	receive(gnssData, "GPRMC,120001.00,A,5436.00000,N,00600.00000,W,0.004,77.52,010125,,,A")
+
+	assert gnssData.historyProjectedFrom == (54.6, -6)
+	history = gnssData.satellites[0].previousPositions.columns()
+	assert history.longs[0] != projectedFromOrigin[0]
+	assert (history.lats[0], history.longs[0]) == pytest.approx(
+		getSatelliteLatLong(120, 40, "GP", 54.6, -6)
+	)
+
+
+def test_changeGroupsOnlyBumpedWhenChanged():
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,1,1,01,03,40,120,33")
+	drawnVersion = gnssData.changes.version
+	receive(gnssData, "GPGSV,1,1,01,03,40,120,33")
+	receive(gnssData, "GPVTG,77.52,T,,M,0.004,N,0.008,K,A")
+
+	assert not gnssData.changes.changedSince(drawnVersion, POSITION, DOP, SATELLITES)
+
+	receive(gnssData, "GPGSA,A,3,03,,,,,,,,,,,,1.5,0.9,1.2")
+	assert gnssData.changes.changedSince(drawnVersion, DOP)
+	assert not gnssData.changes.changedSince(drawnVersion, POSITION, SATELLITES)
+
+	receive(gnssData, "GPGSV,1,1,01,03,40,120,35")
+	assert gnssData.changes.changedSince(drawnVersion, SATELLITES)
+
+
+def test_snapshotUnaffectedByLaterMessages():
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,1,1,01,03,40,120,33")
+	snapshot = gnssData.snapshot()
+	trailLength = len(snapshot.satellites[0].previousPositions)
+
+	receive(gnssData, "GPGSV,1,1,02,03,41,121,35,04,10,020,20", startTime + timedelta(hours=1))
+
+	assert [(sat.prnNumber, sat.elevation) for sat in snapshot.satellites] == [(3, 40)]
+	assert len(gnssData.satellites[0].previousPositions) > trailLength
+	assert len(snapshot.satellites[0].previousPositions.columns().times) == trailLength
+	assert not snapshot.changes.changedSince(gnssData.changes.version, SATELLITES)
+	assert gnssData.changes.changedSince(snapshot.changes.version, SATELLITES)
+	with pytest.raises(ValueError):
+		snapshot.satellites[0].previousPositions.append(startTime, 0, 0, 0, 0)
+
+
+def test_deltaOnlyHasChangedSatellites():
+	palette = loadPalette("warGames")
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,1,1,03,03,40,120,33,04,10,020,20,05,20,200,25")
+	older = gnssData.snapshot()
+
+	receive(
+		gnssData,
+		"GPGSV,1,1,03,03,41,121,35,04,10,020,20,05,20,200,25",
+		startTime + timedelta(seconds=30),
+	)
+	delta = gnssData.snapshot().deltaJSON(older, palette)
+
+	assert not delta["full"]
+	assert delta["since"] == older.changes.version
+	assert [satellite["prnNumber"] for satellite in delta["satellites"]] == [3]
+	assert delta["removed"] == []
+
+
+def test_deltaHasNewTrailPointsAndRemovedSatellites():
+	palette = loadPalette("warGames")
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,1,1,02,03,40,120,33,04,10,020,20")
+	older = gnssData.snapshot()
+	olderTrailLength = len(older.satellites[0].previousPositions)
+
+	updateTime = startTime + timedelta(hours=1)
+	receive(gnssData, "GPGSV,1,1,01,03,60,150,35", updateTime)
+	delta = gnssData.snapshot().deltaJSON(older, palette)
+
+	newPoints = delta["satellites"][0]["newTrailPoints"]
+	assert len(newPoints) == len(gnssData.satellites[0].previousPositions) - olderTrailLength
+	assert newPoints[-1][0] == updateTime.replace(tzinfo=timezone.utc).timestamp()
+	assert delta["removed"] == [("GP", 4)]
+
+
+def test_timesSentAsUtcWhateverTheLocalTimezone(monkeypatch):
+	monkeypatch.setenv("TZ", "America/New_York")
+	time.tzset()
+	try:
+		gnssData = GnssData()
+		receive(gnssData, "GPGSV,1,1,01,03,40,120,33")
+		json = gnssData.snapshot().toJSON(loadPalette("warGames"))
+	finally:
+		monkeypatch.undo()
+		time.tzset()
+
+	utcStart = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+	assert datetime.fromisoformat(json["date"]) == utcStart
+	assert json["lastSeen"] == {"GP": utcStart.timestamp()}
+	assert json["satellites"][0]["trail"][0][0] == utcStart.timestamp()
+
+
+def test_deltaNotFullWhenPositionOnlyJitters():
+	palette = loadPalette("warGames")
+	gnssData = GnssData()
+	(firstEpoch, secondEpoch) = (startTime, startTime + timedelta(seconds=1))
+	receive(gnssData, "GPRMC,120000.00,A,5436.00000,N,00600.00000,W,0.004,77.52,010125,,,A")
+	receive(gnssData, "GPGSV,1,1,02,03,40,120,33,04,10,020,20", firstEpoch)
+	older = gnssData.snapshot()
+
+	receive(
+		gnssData, "GPRMC,120001.00,A,5436.00006,N,00600.00006,W,0.004,77.52,010125,,,A", secondEpoch
+	)
+	receive(gnssData, "GPGSV,1,1,02,03,40,120,35,04,10,020,20", secondEpoch)
+	jittered = gnssData.snapshot()
+	assert (jittered.latitude, jittered.longitude) != (older.latitude, older.longitude)
+	assert jittered.satellites[1].lastSeen != older.satellites[1].lastSeen
+
+	delta = jittered.deltaJSON(older, palette)
+	assert not delta["full"]
+	assert [satellite["prnNumber"] for satellite in delta["satellites"]] == [3]
+	assert "lastSeen" not in delta["satellites"][0]
+	assert delta["lastSeen"] == {"GP": secondEpoch.replace(tzinfo=timezone.utc).timestamp()}
+
+	receive(
+		gnssData,
+		"GPRMC,120002.00,A,5437.00000,N,00600.00000,W,0.004,77.52,010125,,,A",
+		secondEpoch + timedelta(seconds=1),
+	)
+	assert gnssData.snapshot().deltaJSON(older, palette)["full"]
+
+
+def test_lastSeenOnlySentForSatellitesMissingFromLatestCycle():
+	palette = loadPalette("warGames")
+	gnssData = GnssData()
+	receive(gnssData, "GPGSV,1,1,02,03,40,120,33,04,10,020,20")
+	older = gnssData.snapshot()
+
+	receive(gnssData, "GPGSV,1,1,01,03,40,120,33", startTime + timedelta(seconds=1))
+	delta = gnssData.snapshot().deltaJSON(older, palette)
+	assert [
+		(satellite["prnNumber"], satellite.get("lastSeen")) for satellite in delta["satellites"]
+	] == [(4, startTime.replace(tzinfo=timezone.utc).timestamp())]
+
+
+def test_satellitePositionsMatchScalarProjection():
+	gnssData = GnssData()
+	receive(gnssData, "GPRMC,120000.00,A,5436.00000,N,00600.00000,W,0.004,77.52,010125,,,A")
+	receive(gnssData, "GPGSV,1,1,03,03,40,120,33,04,00,020,20,05,90,200,25")
+	receive(gnssData, "GLGSV,1,1,01,65,50,100,30")
+	json = gnssData.snapshot().toJSON(loadPalette("warGames"))
+
+	assert [(satellite["lat"], satellite["long"]) for satellite in json["satellites"]] == [
+		pytest.approx(getSatelliteLatLong(azimuth, elevation, network, 54.6, -6))
+		for (network, elevation, azimuth) in (
+			("GP", 40, 120),
+			("GP", 0, 20),
+			("GP", 90, 200),
+			("GL", 50, 100),
+		)
+	]
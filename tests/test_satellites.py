@@ -1,9 +1,10 @@
 # pylint: skip-file
 import math
 
+import numpy as np
 from pytest import approx
 
-from gnss.satellite import getSatelliteLatLong, orbitHeightForNetwork
+from gnss.satellite import getSatelliteLatLong, getSatelliteLatLongs, orbitHeightForNetwork
 
 
 def easaSatelliteLatLong(lat: float, long: float, elevation: float, azimuth: float, network: str):
@@ -93,3 +94,22 @@ def test_alternateMeasurementPoint():
 	(lat, long) = getSatelliteLatLong(30, 45, "GA", 45, 10)
 	assert lat == approx(68.1693)
 	assert long == approx(58.442)
+
+
+def test_batchMatchesScalar():
+	azimuths = np.array([float(az) for az in range(0, 360, 15) for _ in range(0, 91, 15)])
+	elevations = np.array([float(elv) for _ in range(0, 360, 15) for elv in range(0, 91, 15)])
+
+	for network in ["GA", "GP", "GQ"]:
+		for lat, long in [(0, 0), (54.6, -5.9), (-33.9, 151.2)]:
+			(lats, longs) = getSatelliteLatLongs(
+				azimuths, elevations, orbitHeightForNetwork(network), lat, long
+			)
+			for azimuth, elevation, batchLat, batchLong in zip(
+				azimuths, elevations, lats, longs, strict=True
+			):
+				(scalarLat, scalarLong) = getSatelliteLatLong(
+					azimuth, elevation, network, lat, long
+				)
+				assert batchLat == approx(scalarLat, abs=1e-9)
+				assert batchLong == approx(scalarLong, abs=1e-9)
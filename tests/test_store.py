@@ -0,0 +1,46 @@
+# pylint: skip-file
+import os
+
+from web.store import ArtifactStore
+
+FIRST_CONTENT = b"{}"
+CHANGED_CONTENT = b"[]"
+
+
+def test_putWritesCompleteFile(tmp_path):
+	store = ArtifactStore(str(tmp_path))
+	store.put("map.svg", FIRST_CONTENT)
+	latest = store.put("map.svg", CHANGED_CONTENT)
+
+	assert os.listdir(tmp_path) == ["map.svg"]
+	assert (tmp_path / "map.svg").read_bytes() == CHANGED_CONTENT
+	assert store.get("map.svg") == latest
+	assert latest.version == 2
+	assert latest.mimetype == "image/svg+xml"
+
+
+def test_etagDependsOnlyOnContent(tmp_path):
+	store = ArtifactStore(str(tmp_path))
+	first = store.put("wopr.json", FIRST_CONTENT)
+	changed = store.put("wopr.json", CHANGED_CONTENT)
+	unchanged = ArtifactStore(str(tmp_path / "other")).put("wopr.json", FIRST_CONTENT)
+
+	assert first.etag != changed.etag
+	assert first.etag == unchanged.etag
+
+
+def test_fileFromOtherProcessReadOnceReplaced(tmp_path):
+	writer = ArtifactStore(str(tmp_path))
+	reader = ArtifactStore(str(tmp_path))
+	assert reader.get("gnssData.json") is None
+
+	writer.put("gnssData.json", FIRST_CONTENT)
+	first = reader.get("gnssData.json")
+	assert first is not None
+	assert reader.get("gnssData.json") is first
+
+	writer.put("gnssData.json", CHANGED_CONTENT)
+	replaced = reader.get("gnssData.json")
+	assert replaced is not None
+	assert replaced.content == CHANGED_CONTENT
+	assert replaced.version == first.version + 1
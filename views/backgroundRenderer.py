@@ -0,0 +1,56 @@
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtWidgets import QWidget
+
+# threads rather than processes, as frames are generated from snapshots sharing the satellite
+# histories, which would otherwise need pickling for every frame
+renderPool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="render")
+
+
+class BackgroundRenderer(QObject):
+	"""Generates frames on the render pool, handing each finished frame back to the GUI thread.
+
+	Frames are numbered as they are submitted, and a frame finishing after a newer one has already
+	been shown is discarded, so a slow frame can never replace newer data. A frame that fails to
+	generate is reported and skipped, leaving the last frame shown.
+	"""
+
+	frameFinished = pyqtSignal(int, object)
+
+	def __init__(self, onFrame: Callable[[Any], None], parent: QObject | None = None):
+		super().__init__(parent)
+		self.onFrame = onFrame
+		self.nextFrameNumber = 0
+		self.shownFrameNumber = -1
+		# emitted from the render pool, so queued onto the GUI thread this object lives on
+		self.frameFinished.connect(self.showFrame)
+
+	def submit(self, generateFrame: Callable[[], Any]):
+		"""Generate a frame in the background. generateFrame must only use data that won't be
+		modified while it runs, e.g. snapshots and copies of any options
+		"""
+		frameNumber = self.nextFrameNumber
+		self.nextFrameNumber += 1
+
+		future = renderPool.submit(generateFrame)
+		future.add_done_callback(lambda done: self.frameFinished.emit(frameNumber, done))
+
+	def showFrame(self, frameNumber: int, future: Future):
+		"""Show the frame once generated, on the GUI thread, unless a newer one already has been"""
+		if frameNumber <= self.shownFrameNumber:
+			return  # stale, a newer frame has already been shown
+		try:
+			frame = future.result()
+		except Exception as e:  # pylint: disable=broad-exception-caught
+			# raising here would leave it to Qt, which only prints it and carries on
+			print(f"Failed to generate a frame for {self.windowName()}: {e!r}")
+			return
+		self.shownFrameNumber = frameNumber
+		self.onFrame(frame)
+
+	def windowName(self) -> str:
+		parent = self.parent()
+		return parent.windowTitle() if isinstance(parent, QWidget) else "a window"
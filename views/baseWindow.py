@@ -2,8 +2,10 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QKeyEvent
 from PyQt6.QtWidgets import QMainWindow
 
+from gnss.changes import NEVER_DRAWN
 from misc.size import Size
 from palettes.palette import Palette
+from views.renderScheduler import RenderScheduler
 
 
 class BaseWindow(QMainWindow):
@@ -16,6 +18,9 @@ class BaseWindow(QMainWindow):
 		super().__init__()
 
 		self.customPalette = palette
+		self.drawnVersion = NEVER_DRAWN
+		"""Data version this window last drew, see ChangeTracker"""
+		self.renderScheduler: RenderScheduler | None = None
 
 		self.setGeometry(0, 0, int(self.defaultSize.width), int(self.defaultSize.height))
 		self.setStyleSheet(f"background-color: {palette.background}; color: {palette.foreground};")
@@ -27,3 +32,5 @@ class BaseWindow(QMainWindow):
 			return
 		if event.key() == Qt.Key.Key_F:
 			self.setWindowState(self.windowState() ^ Qt.WindowState.WindowFullScreen)
+		if event.key() == Qt.Key.Key_I and self.renderScheduler is not None:
+			print(f"{self.windowTitle()}: {self.renderScheduler.stats.summary()}")
@@ -1,139 +1,244 @@
 import csv
-import itertools
-import math
+import io
 import os
+import threading
+from dataclasses import dataclass
+from functools import cache
 
-# see https://download.geonames.org/export/dump/ (readme at bottom)
-
+import numpy as np
 
-def getCities() -> list[list[str]]:
-	"""Get a filtered list of cities to display on the map"""
-	cities: list[list[str]] = []
+from misc.files import writeAtomically
 
-	citiesByCountry = readCityInfo()
-	countriesInfo = readCountryInfo()
-
-	for country in citiesByCountry:
-		citiesInCountry = citiesByCountry[country]
-		countryInfo = countriesInfo[country]
+# see https://download.geonames.org/export/dump/ (readme at bottom)
+CITIES_FILE = "./views/map/cities15000.txt"
+COUNTRIES_FILE = "./views/map/countryInfo.txt"
+DATASET_DIRECTORY = "./views/map"
+
+CITY_DTYPE = np.dtype(
+	[
+		("lat", "f8"),
+		("long", "f8"),
+		("population", "i8"),
+		("country", "i4"),
+		("nameStart", "i4"),
+		("nameEnd", "i4"),
+	]
+)
+"""One row per city. country is an index into the countries array (-1 if unknown), and the name is
+the slice nameStart:nameEnd of the names blob"""
+COUNTRY_DTYPE = np.dtype([("code", "U2"), ("area", "f8"), ("population", "i8")])
+
+datasetBuildLock = threading.Lock()
+"""Held while checking for and building the dataset, so threads don't build it at the same time"""
+
+
+@dataclass(frozen=True)
+class CityDataset:
+	"""Preprocessed city and country data, see buildCityDataset"""
+
+	cities: np.ndarray
+	countries: np.ndarray
+	names: bytes
+
+	def cityName(self, index: int) -> str:
+		city = self.cities[index]
+		return self.names[city["nameStart"] : city["nameEnd"]].decode()
+
+
+@dataclass(frozen=True)
+class CityIndex:
+	"""Cities as unit vectors on the sphere, for nearest-city lookups.
+
+	The nearest city by great-circle distance is the one with the largest dot product with the
+	query's unit vector, so a lookup is a single matrix-vector product. At ~25k cities this takes
+	tens of microseconds, without the build cost or boundary handling of a tree or bucket grid.
+	"""
 
-		citiesInCountry = filterToMinPop(citiesInCountry, 100000)
-		citiesInCountry = sortCitiesByPop(citiesInCountry)
-		citiesInCountry = filterToMaxNumCities(citiesInCountry, countryInfo)
+	unitVectors: np.ndarray
+	"""(number of cities, 3) array of x, y, z"""
+	dataset: CityDataset
 
-		# does this one do much at this point?
-		citiesInCountry = filterToPopPercent(citiesInCountry, countryInfo, 0.2, 3)
 
-		cities += citiesInCountry
+@cache
+def getCities() -> np.ndarray:
+	"""Get a filtered array of cities (see CITY_DTYPE) to display on the map, only filtered once per
+	process
+	"""
+	dataset = getCityDataset()
+	cities = filterToMinPop(dataset.cities[dataset.cities["country"] >= 0], 100000)
 
-	return cities
+	# group by country, with the most populous cities first (lexsort is stable, and sorts by the
+	# last key first)
+	cities = cities[np.lexsort((-cities["population"], cities["country"]))]
+	countryBoundaries = np.flatnonzero(np.diff(cities["country"])) + 1
 
+	filteredCities = [np.empty(0, dtype=CITY_DTYPE)]
+	for countryCities in np.split(cities, countryBoundaries):
+		if len(countryCities) == 0:
+			continue
+		country = dataset.countries[countryCities["country"][0]]
 
-def filterToMinPop(citiesInCountry: list[list[str]], minPop: int) -> list[list[str]]:
-	return [city for city in citiesInCountry if int(city[14]) > minPop]
+		citiesInCountry = filterToMaxNumCities(countryCities, country)
 
+		# does this one do much at this point?
+		citiesInCountry = filterToPopPercent(citiesInCountry, country, 0.2, 3)
 
-def filterToPopPercent(
-	citiesInCountry: list[list[str]], countryInfo: list[str], percent: float, minCities: int
-) -> list[list[str]]:
-	""":param citiesInCountry: sorted list of cities in a country"""
-	countryPop = float(countryInfo[7])
-	addedPop = 0
+		filteredCities.append(citiesInCountry)
 
-	filteredCities = []
-	for addedCount, city in enumerate(citiesInCountry, 1):
-		filteredCities.append(city)
+	return np.concatenate(filteredCities)
 
-		addedPop += int(city[14])
 
-		if addedPop > countryPop * percent and addedCount > minCities:
-			break
+def filterToMinPop(cities: np.ndarray, minPop: int) -> np.ndarray:
+	return cities[cities["population"] > minPop]
 
-	return filteredCities
 
+def filterToPopPercent(
+	citiesInCountry: np.ndarray, country: np.void, percent: float, minCities: int
+) -> np.ndarray:
+	"""Keep the most populous cities until they add up to the given percent of the country's
+	population, and there are more than minCities of them
+	:param citiesInCountry: cities in a country, sorted by population
+	"""
+	addedPop = np.cumsum(citiesInCountry["population"])
+	addedCount = np.arange(1, len(citiesInCountry) + 1)
+	enoughCities = np.flatnonzero(
+		(addedPop > country["population"] * percent) & (addedCount > minCities)
+	)
 
-def filterToMaxNumCities(citiesInCountry: list[list[str]], countryInfo: list[str]):
-	""":param citiesInCountry: sorted list of cities in a country"""
-	return citiesInCountry[: calcMaxNumCitiesToInclude(countryInfo)]
+	if len(enoughCities) == 0:
+		return citiesInCountry
+	return citiesInCountry[: enoughCities[0] + 1]
 
 
-def sortCitiesByPop(citiesInCountry: list[list[str]]):
-	return sorted(citiesInCountry, key=lambda x: int(x[14]), reverse=True)
+def filterToMaxNumCities(citiesInCountry: np.ndarray, country: np.void) -> np.ndarray:
+	""":param citiesInCountry: cities in a country, sorted by population"""
+	return citiesInCountry[: calcMaxNumCitiesToInclude(country)]
 
 
-def calcMaxNumCitiesToInclude(countryInfo: list[str]) -> int:
+def calcMaxNumCitiesToInclude(country: np.void) -> int:
 	"""Calculate the maximum number of cities to include in a country, based on both its population
 	and area
 	"""
 	extraCityPerMillion = 0.05
 	extraCityPerThousandKm2 = 0.05
 
-	area = float(countryInfo[6]) / 1000
-	popMillions = int(countryInfo[7]) / 1000000
+	area = float(country["area"]) / 1000
+	popMillions = int(country["population"]) / 1000000
 	return int(popMillions * extraCityPerMillion + area * extraCityPerThousandKm2)
 
 
-def readCityInfo() -> dict[str, list[list[str]]]:
-	"""Read the city info from the file and group it by country"""
-	rawCityInfo = readTSV("./views/map/cities15000.txt")
-	return {
-		country: list(cities)
-		for country, cities in itertools.groupby(rawCityInfo, key=lambda x: x[8])
-	}
-
-
-def findNearestCity(lat: float, long: float, file: str = "./views/map/cities15000.txt"):
-	"""Find the nearest city to a given lat/long"""
-	cities = readTSV(file)
-
-	nearestCity = None
-	nearestDist = math.inf
-	for city in cities:
-		cityLat = float(city[4])
-		cityLong = float(city[5])
-		dist = distBetweenPoints(lat, long, cityLat, cityLong)
-		if dist < nearestDist:
-			nearestDist = dist
-			nearestCity = city
-
-	if nearestCity is None:
-		return []
-
-	return nearestCity
-
-
-def findNearestCityWithCache(lat: float, long: float):
-	"""Find the nearest city to the given lat/long, using the cache file if possible"""
-	nearestCity = findNearestCity(lat, long, "./views/map/citiesCache.txt")
-
-	if len(nearestCity) > 0:
-		margin = 0.1
-		if abs(lat - float(nearestCity[4])) < margin and abs(long - float(nearestCity[5])) < margin:
-			return nearestCity[2]
-
-	nearestCity = findNearestCity(lat, long, "./views/map/cities15000.txt")
-	appendToCache(nearestCity)
-	return nearestCity[2]
-
-
-def appendToCache(city: list[str]):
-	"""Append a city to the cache file"""
-	strToAppend = ""
-	for index, string in enumerate(city):
-		strToAppend += string
-		if index != len(city) - 1:
-			strToAppend += "\t"
-	with open("./views/map/citiesCache.txt", "a", encoding="utf-8") as file:
-		file.write(strToAppend + "\n")
-
+def latLongsToUnitVectors(lats: np.ndarray, longs: np.ndarray) -> np.ndarray:
+	"""Convert lat/longs (in degrees) to unit vectors on the sphere"""
+	latsRad = np.radians(lats)
+	longsRad = np.radians(longs)
+	return np.stack(
+		(np.cos(latsRad) * np.cos(longsRad), np.cos(latsRad) * np.sin(longsRad), np.sin(latsRad)),
+		axis=-1,
+	)
+
+
+def buildCityIndex(dataset: CityDataset) -> CityIndex:
+	"""Build a nearest-city index of every city in the dataset"""
+	return CityIndex(latLongsToUnitVectors(dataset.cities["lat"], dataset.cities["long"]), dataset)
+
+
+@cache
+def getCityIndex() -> CityIndex:
+	"""Get the index of every city, only built once per process"""
+	return buildCityIndex(getCityDataset())
+
+
+def findNearestCity(lat: float, long: float, cityIndex: CityIndex) -> str:
+	"""Find the name of the nearest city to a given lat/long, by great-circle distance"""
+	if len(cityIndex.unitVectors) == 0:
+		return ""
+
+	point = latLongsToUnitVectors(np.array(lat), np.array(long))
+	return cityIndex.dataset.cityName(int(np.argmax(cityIndex.unitVectors @ point)))
+
+
+def findNearestCityWithCache(lat: float, long: float) -> str:
+	"""Find the name of the nearest city to the given lat/long, using the in-memory city index"""
+	return findNearestCity(lat, long, getCityIndex())
+
+
+def datasetPaths(directory: str) -> tuple[str, str, str]:
+	"""Paths of the cities, countries, and names files of the preprocessed dataset"""
+	return (
+		os.path.join(directory, "cities.npy"),
+		os.path.join(directory, "countries.npy"),
+		os.path.join(directory, "cityNames.bin"),
+	)
+
+
+def buildCityDataset(
+	citiesFile: str = CITIES_FILE,
+	countriesFile: str = COUNTRIES_FILE,
+	directory: str = DATASET_DIRECTORY,
+):
+	"""Preprocess the geonames TSV files into a binary dataset, so they only need parsing once"""
+	countryRows = [row for row in readTSV(countriesFile) if not row[0].startswith("#")]
+	countries = np.array(
+		[(row[0], float(row[6]), int(row[7])) for row in countryRows], dtype=COUNTRY_DTYPE
+	)
+	countryIndices = {row[0]: index for index, row in enumerate(countryRows)}
+
+	cityRows = readTSV(citiesFile)
+	cities = np.empty(len(cityRows), dtype=CITY_DTYPE)
+	names = bytearray()
+	for index, row in enumerate(cityRows):
+		name = row[2].encode()
+		cities[index] = (
+			float(row[4]),
+			float(row[5]),
+			int(row[14]),
+			countryIndices.get(row[8], -1),
+			len(names),
+			len(names) + len(name),
+		)
+		names += name
+
+	(citiesPath, countriesPath, namesPath) = datasetPaths(directory)
+	# each file is replaced once complete, so other processes never load one partly written
+	writeAtomically(namesPath, bytes(names))
+	writeAtomically(countriesPath, arrayToNpy(countries))
+	# written last, as its existence is used to check if the dataset has been built
+	writeAtomically(citiesPath, arrayToNpy(cities))
+
+
+def arrayToNpy(array: np.ndarray) -> bytes:
+	"""Serialize the array in the .npy format"""
+	buffer = io.BytesIO()
+	np.save(buffer, array)
+	return buffer.getvalue()
+
+
+def loadCityDataset(
+	citiesFile: str = CITIES_FILE,
+	countriesFile: str = COUNTRIES_FILE,
+	directory: str = DATASET_DIRECTORY,
+) -> CityDataset:
+	"""Load the preprocessed dataset, memory mapping the cities. Builds the dataset first if it
+	hasn't been built yet (see ReadMe), or returns an empty dataset if the source files are not
+	available
+	"""
+	(citiesPath, countriesPath, namesPath) = datasetPaths(directory)
+	with datasetBuildLock:
+		if not os.path.exists(citiesPath):
+			if not os.path.exists(citiesFile):
+				return CityDataset(
+					np.empty(0, dtype=CITY_DTYPE), np.empty(0, dtype=COUNTRY_DTYPE), b""
+				)
+			buildCityDataset(citiesFile, countriesFile, directory)
 
-def distBetweenPoints(lat1: float, long1: float, lat2: float, long2: float) -> float:
-	return (lat2 - lat1) ** 2 + (long2 - long1) ** 2
+	with open(namesPath, "rb") as f:
+		names = f.read()
+	return CityDataset(np.load(citiesPath, mmap_mode="r"), np.load(countriesPath), names)
 
 
-def readCountryInfo() -> dict[str, list[str]]:
-	rawCountryInfo = readTSV("./views/map/countryInfo.txt")
-	return {row[0]: row for row in rawCountryInfo}  # key is the country code
+@cache
+def getCityDataset() -> CityDataset:
+	return loadCityDataset()
 
 
 def readTSV(filename: str) -> list[list[str]]:
@@ -144,3 +249,7 @@ def readTSV(filename: str) -> list[list[str]]:
 	with open(filename, "r", encoding="utf8") as f:
 		rd = csv.reader(f, delimiter="\t")
 		return list(rd)
+
+
+if __name__ == "__main__":
+	buildCityDataset()
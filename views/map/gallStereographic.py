@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 
 def latLongToGallStereographic(lat: float, long: float, mapWidth: float) -> tuple[float, float]:
 	"""Convert latitude and longitude to Gall Stereographic coordinates."""
@@ -30,3 +32,28 @@ def latLongToGallStereographic(lat: float, long: float, mapWidth: float) -> tupl
 	y = -radius * (math.sqrt(2) + 1) * math.tan(latRad / 2)
 
 	return (x, y)
+
+
+def latLongsToGallStereographic(
+	lats: np.ndarray, longs: np.ndarray, mapWidth: float
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Vectorised latLongToGallStereographic, for whole arrays of coordinates."""
+	longOffset = -10
+	longs = longs + longOffset
+
+	# "bounce" off the top when wrapping over the poles
+	overNorthPole = lats > 90
+	overSouthPole = lats < -90
+	longs = np.where(overNorthPole | overSouthPole, longs + 180, longs)
+	lats = np.where(overNorthPole, 180 - lats, lats)
+	lats = np.where(overSouthPole, -180 - lats, lats)
+
+	# wrap around the world as the map is not centered at 0
+	longs = np.where(longs < -180 - longOffset, longs + 360, longs)
+	longs = np.where(longs > 180 - longOffset, longs - 360, longs)
+
+	radius = mapWidth / (2 * math.pi)
+	xs = radius * np.radians(longs)
+	ys = -radius * (math.sqrt(2) + 1) * np.tan(np.radians(lats) / 2)
+
+	return (xs, ys)
@@ -1,19 +1,68 @@
-from font.hp1345Font import Font
-from font.mksvgs import makeTextGroup
+import json
+import math
+from collections import OrderedDict
+from dataclasses import replace
+from functools import cache
+
+from font.hp1345Font import getFont
+from font.mksvgs import makeTextGroupCached
 from gnss.satellite import nameToNetworkCode
 from misc.config import MapConfig
 from misc.size import Size
 from palettes.palette import Palette
 from views.map.cities import getCities
-from views.map.gallStereographic import latLongToGallStereographic
+from views.map.gallStereographic import latLongsToGallStereographic
+from views.map.template import MapTemplate, compileMapTemplate
 
+PREPARED_MAP_CACHE_SIZE = 16
+SCALE_BUCKET_STEP = 1.1
+"""Ratio between the scale factors maps are prepared at, the same as each zoom step"""
+preparedMapCache: OrderedDict[tuple[str, float, bool, bool], tuple[MapTemplate, Size]] = (
+	OrderedDict()
+)
 
+
+@cache
 def readBaseMap() -> str:
-	"""Read the base SVG map file."""
+	"""Read the base SVG map file, only reading it from disk once per process."""
 	with open("views/map/1981.svg", "r", encoding="utf8") as f:
 		return f.read()
 
 
+def getPreparedMap(palette: Palette, options: MapConfig) -> tuple[MapTemplate, Size]:
+	"""Get the prepared map template and key size for the given palette and options, from an LRU
+	cache shared by every map, so toggling options or zooming back doesn't re-prepare the map.
+	"""
+	scaleFactor = scaleBucket(options.scaleFactor)
+	key = (
+		json.dumps(palette.__dict__, sort_keys=True),
+		scaleFactor,
+		options.hideCities,
+		options.hideAdmin0Borders,
+	)
+
+	if key in preparedMapCache:
+		preparedMapCache.move_to_end(key)
+		return preparedMapCache[key]
+
+	(mapSvg, keySize) = prepareInitialMap(
+		readBaseMap(), palette, replace(options, scaleFactor=scaleFactor)
+	)
+	preparedMap = (compileMapTemplate(mapSvg), keySize)
+
+	preparedMapCache[key] = preparedMap
+	if len(preparedMapCache) > PREPARED_MAP_CACHE_SIZE:
+		preparedMapCache.popitem(last=False)
+	return preparedMap
+
+
+def scaleBucket(scaleFactor: float) -> float:
+	"""Round the scale factor to the nearest power of SCALE_BUCKET_STEP, so zooming in and back out
+	lands on the same few scales, however the repeated multiplications have rounded
+	"""
+	return SCALE_BUCKET_STEP ** round(math.log(scaleFactor, SCALE_BUCKET_STEP))
+
+
 def getMapSize() -> Size:
 	return Size(3213.05005, 2468.23999)
 
@@ -75,16 +124,14 @@ def prepareInitialMap(mapSvg: str, palette: Palette, options: MapConfig) -> tupl
 def genCitiesGroup(mapSize: Size, options: MapConfig, palette: Palette) -> str:
 	"""Insert cities into the SVG"""
 	cities = getCities()
-	cityDataStr = f'\t<g id="Cities" fill="{palette.cities}">\n'
-	for city in cities:
-		cityLat = float(city[4])
-		cityLong = float(city[5])
-		[cityX, cityY] = latLongToGallStereographic(cityLat, cityLong, mapSize.width)
-		cityX += mapSize.width / 2
-		cityY += mapSize.height / 2
+	(cityXs, cityYs) = latLongsToGallStereographic(cities["lat"], cities["long"], mapSize.width)
+	cityXs = (cityXs + mapSize.width / 2).astype(int)
+	cityYs = (cityYs + mapSize.height / 2).astype(int)
 
-		radius = 5 / options.scaleFactor
-		cityDataStr += f'\t\t<circle cx="{int(cityX)}" cy="{int(cityY)}" r="{radius}" />\n'
+	radius = 5 / options.scaleFactor
+	cityDataStr = f'\t<g id="Cities" fill="{palette.cities}">\n'
+	for cityX, cityY in zip(cityXs.tolist(), cityYs.tolist(), strict=True):
+		cityDataStr += f'\t\t<circle cx="{cityX}" cy="{cityY}" r="{radius}" />\n'
 
 	cityDataStr += "\t</g>\n"
 
@@ -93,7 +140,7 @@ def genCitiesGroup(mapSize: Size, options: MapConfig, palette: Palette) -> str:
 
 def genKey(palette: Palette) -> tuple[str, Size]:
 	"""Generate the key for the map"""
-	svgFont = Font()
+	svgFont = getFont()
 
 	group = ""
 
@@ -106,7 +153,7 @@ def genKey(palette: Palette) -> tuple[str, Size]:
 	for networkName, colour in satelliteNetworks:
 		networkScale = 3.5
 
-		(network, width, height) = makeTextGroup(
+		(network, width, height) = makeTextGroupCached(
 			svgFont,
 			networkName.encode("ascii"),
 			fontThickness=2,
@@ -0,0 +1,281 @@
+import itertools
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+
+from PyQt6.QtCore import QByteArray, QLineF, QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QPainter, QPaintEvent, QPen, QPixmap
+from PyQt6.QtSvg import QSvgRenderer
+from PyQt6.QtSvgWidgets import QSvgWidget
+from PyQt6.QtWidgets import QWidget
+
+from gnss.nmea import ADSBSnapshot, GnssSnapshot
+from gnss.satellite import SatelliteInView, colourForNetwork, satelliteLatLongs
+from misc.config import MapConfig
+from misc.size import Size
+from palettes.palette import Palette
+from views.map.generate import getMapSize
+from views.map.template import KEY_TAG, MapTemplate
+from views.map.update import (
+	TrailSection,
+	calcFocus,
+	calcViewBox,
+	flightMapPosition,
+	focusOnPoint,
+	genSnapshotMapGroup,
+	satelliteMapPositions,
+	satelliteTrailSections,
+	trailOpacity,
+)
+from views.renderScheduler import FrameStats
+
+
+class SvgMapView(QSvgWidget):
+	"""Map drawn by filling the prepared map's template with the satellites, and loading the whole
+	SVG for every frame
+	"""
+
+	def __init__(self, parent: QWidget, options: MapConfig, template: MapTemplate, keySize: Size):
+		super().__init__(parent)
+		self.mapOptions = options
+		self.template = template
+		self.keySize = keySize
+		self.keyXMult = 0.0
+		self.keyYMult = 1.0
+
+		self.satelliteGroup = b""
+		self.frameStats = FrameStats()
+		"""Time taken to load and paint each frame"""
+		self.unpaintedTime = 0.0
+
+	@staticmethod
+	def generateOverlay(
+		options: MapConfig, palette: Palette, gnssData: GnssSnapshot, adsbData: ADSBSnapshot
+	) -> bytes:
+		"""Generate the satellites for a frame, safe to call from the render pool"""
+		return genSnapshotMapGroup(options, palette, gnssData, adsbData).encode()
+
+	def setTemplate(self, template: MapTemplate, keySize: Size):
+		self.template = template
+		self.keySize = keySize
+		self.refocus()
+
+	def setOverlay(self, satelliteGroup: bytes):
+		self.satelliteGroup = satelliteGroup
+		self.refocus()
+
+	def refocus(self):
+		"""Fill the template with the latest satellites, focused for the current options and size"""
+		startTime = time.monotonic()
+		mapParts = focusOnPoint(
+			self.template,
+			self.satelliteGroup,
+			self.mapOptions,
+			Size(self.width(), self.height()),
+			self.keySize,
+			self.keyXMult,
+			self.keyYMult,
+		)
+		self.load(QByteArray(b"".join(mapParts)))
+		self.unpaintedTime += time.monotonic() - startTime
+
+	def paintEvent(self, event: QPaintEvent | None):
+		startTime = time.monotonic()
+		super().paintEvent(event)
+		self.frameStats.recordFrame(self.unpaintedTime + time.monotonic() - startTime)
+		self.unpaintedTime = 0.0
+
+
+@dataclass(frozen=True)
+class MapOverlay:
+	"""Satellites, trails, and flights in map coordinates, to draw over an image of the map"""
+
+	radius: float
+	points: tuple[tuple[QPointF, QColor], ...]
+	trails: tuple[tuple[QColor, tuple[QLineF, ...]], ...]
+	"""Trail segments grouped by colour (including opacity), so each group is drawn in one call"""
+
+
+class RasterMapView(QWidget):
+	"""Map drawn from a cached image of the prepared map, only rasterised again when the view
+	changes, with the satellites, trails, and flights drawn over it with QPainter for each frame
+	"""
+
+	def __init__(self, parent: QWidget, options: MapConfig, template: MapTemplate, keySize: Size):
+		super().__init__(parent)
+		self.mapOptions = options
+		self.template = template
+		self.keySize = keySize
+		self.keyXMult = 0.0
+		self.keyYMult = 1.0
+
+		self.overlay = MapOverlay(0, (), ())
+		self.viewBox = QRectF()
+		self.basePixmap = QPixmap()
+		self.keyPixmap: QPixmap | None = None
+		self.frameStats = FrameStats()
+		"""Time taken to paint each frame, including rasterising the map if the view changed"""
+		self.unpaintedTime = 0.0
+
+	@staticmethod
+	def generateOverlay(
+		options: MapConfig, palette: Palette, gnssData: GnssSnapshot, adsbData: ADSBSnapshot
+	) -> MapOverlay:
+		"""Project the satellites for a frame, safe to call from the render pool"""
+		mapSize = getMapSize()
+		(lats, longs) = satelliteLatLongs(
+			gnssData.satellites, gnssData.latitude, gnssData.longitude
+		)
+		trails: dict[tuple[str, float], list[QLineF]] = {}
+		if not options.hideSatelliteTrails:
+			for satellite, lat, long in zip(
+				gnssData.satellites, lats.tolist(), longs.tolist(), strict=True
+			):
+				addSatelliteTrail(trails, satellite, (lat, long), palette, gnssData.date, mapSize)
+
+		points = []
+		(xs, ys) = satelliteMapPositions(lats, longs, mapSize)
+		for satellite, x, y in zip(gnssData.satellites, xs.tolist(), ys.tolist(), strict=True):
+			points.append((QPointF(x, y), QColor(colourForNetwork(satellite.network, palette))))
+		points.extend(
+			(QPointF(*flightMapPosition(flight, mapSize)), QColor(palette.cities))
+			for flight in adsbData.flights.values()
+		)
+
+		return MapOverlay(
+			30 / options.scaleFactor,
+			tuple(points),
+			tuple(
+				(colourWithOpacity(colour, opacity), tuple(lines))
+				for (colour, opacity), lines in trails.items()
+			),
+		)
+
+	def setTemplate(self, template: MapTemplate, keySize: Size):
+		self.template = template
+		self.keySize = keySize
+		self.refocus()
+
+	def setOverlay(self, overlay: MapOverlay):
+		self.overlay = overlay
+		self.update()
+
+	def refocus(self):
+		"""Rasterise the map and key for the current options and size"""
+		if self.width() == 0 or self.height() == 0:
+			return
+		startTime = time.monotonic()
+		size = Size(self.width(), self.height())
+
+		(x, y, viewSize) = calcViewBox(self.mapOptions, size)
+		self.viewBox = QRectF(x, y, viewSize.width, viewSize.height)
+
+		# the key is drawn separately, so it stays above the satellites
+		(viewBox, hiddenKeyTag) = calcFocus(
+			replace(self.mapOptions, hideKey=True), size, self.keySize
+		)
+		self.basePixmap = self.rasterise(
+			self.template.render(
+				viewBox=viewBox.encode(), satellites=b"", keyTag=hiddenKeyTag.encode()
+			)
+		)
+
+		self.keyPixmap = None
+		if not self.mapOptions.hideKey:
+			(_, keyTag) = calcFocus(
+				self.mapOptions, size, self.keySize, self.keyXMult, self.keyYMult
+			)
+			# the key is the last element of the prepared map, so everything after its opening tag
+			# is the rest of the key
+			keySvg = (
+				f'<svg version="1.1" xmlns="http://www.w3.org/2000/svg" viewBox="{viewBox}">'
+				f"{keyTag}"
+			).encode() + self.template.chunkAfter(KEY_TAG)
+			self.keyPixmap = self.rasterise(keySvg)
+
+		self.unpaintedTime += time.monotonic() - startTime
+		self.update()
+
+	def rasterise(self, svg: bytes) -> QPixmap:
+		"""Render the SVG to an image the size of the widget"""
+		pixelRatio = self.devicePixelRatioF()
+		pixmap = QPixmap(int(self.width() * pixelRatio), int(self.height() * pixelRatio))
+		pixmap.setDevicePixelRatio(pixelRatio)
+		pixmap.fill(Qt.GlobalColor.transparent)
+
+		painter = QPainter(pixmap)
+		QSvgRenderer(QByteArray(svg)).render(painter, QRectF(0, 0, self.width(), self.height()))
+		painter.end()
+		return pixmap
+
+	def paintEvent(self, event: QPaintEvent | None):  # pylint: disable=unused-argument
+		"""Draw the cached map, then the satellites over it, then the key"""
+		if self.basePixmap.isNull():
+			return
+		startTime = time.monotonic()
+
+		painter = QPainter(self)
+		painter.drawPixmap(0, 0, self.basePixmap)
+
+		painter.save()
+		painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+		painter.scale(self.width() / self.viewBox.width(), self.height() / self.viewBox.height())
+		painter.translate(-self.viewBox.x(), -self.viewBox.y())
+		self.drawOverlay(painter)
+		painter.restore()
+
+		if self.keyPixmap is not None:
+			painter.drawPixmap(0, 0, self.keyPixmap)
+		painter.end()
+
+		self.frameStats.recordFrame(self.unpaintedTime + time.monotonic() - startTime)
+		self.unpaintedTime = 0.0
+
+	def drawOverlay(self, painter: QPainter):
+		"""Draw the trails, then the satellites and flights, in map coordinates"""
+		overlay = self.overlay
+		for colour, lines in overlay.trails:
+			pen = QPen(colour, overlay.radius / 3)
+			pen.setCapStyle(Qt.PenCapStyle.FlatCap)
+			painter.setPen(pen)
+			painter.drawLines(*lines)
+
+		painter.setPen(Qt.PenStyle.NoPen)
+		for point, colour in overlay.points:
+			painter.setBrush(colour)
+			painter.drawEllipse(point, overlay.radius, overlay.radius)
+
+
+def addSatelliteTrail(
+	trails: dict[tuple[str, float], list[QLineF]],
+	satellite: SatelliteInView,
+	currentLatLong: tuple[float, float],
+	palette: Palette,
+	currentTime: datetime,
+	mapSize: Size,
+):
+	"""Add the segments of the satellite's trail to the groups for their colour and opacity"""
+	colour = colourForNetwork(satellite.network, palette)
+	sections = satelliteTrailSections(satellite, currentLatLong, mapSize, currentTime)
+	for section in sections:
+		addTrailSegments(trails, section, colour, mapSize)
+
+
+def addTrailSegments(
+	trails: dict[tuple[str, float], list[QLineF]], section: TrailSection, colour: str, mapSize: Size
+):
+	"""Add each segment of the trail section to the group for its colour and opacity"""
+	centreX = mapSize.width / 2
+	centreY = mapSize.height / 2
+	for (secondsSinceMeasured, (x1, y1)), (_, (x2, y2)) in itertools.pairwise(section):
+		# rounded as the SVG backend does, so there are only a few groups per colour
+		opacity = round(trailOpacity(secondsSinceMeasured), 2)
+		trails.setdefault((colour, opacity), []).append(
+			QLineF(x1 + centreX, y1 + centreY, x2 + centreX, y2 + centreY)
+		)
+
+
+def colourWithOpacity(colour: str, opacity: float) -> QColor:
+	qColour = QColor(colour)
+	qColour.setAlphaF(opacity)
+	return qColour
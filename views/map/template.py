@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+VIEW_BOX = "viewBox"
+SATELLITES = "satellites"
+KEY_TAG = "keyTag"
+
+SLOT_MARKERS = {
+	VIEW_BOX: (b'viewBox="', b'"'),
+	SATELLITES: (b"", b"<!-- satellites go here -->"),
+	KEY_TAG: (b"", b'<g id="Key">'),
+}
+"""Text before each slot (kept as part of the static chunk), and the text the slot replaces"""
+
+
+@dataclass(frozen=True)
+class MapTemplate:
+	"""A prepared map split into static chunks, with a slot between each pair of chunks for the
+	parts that change every frame, so a frame only needs the chunks copied once
+	"""
+
+	chunks: tuple[bytes, ...]
+	slots: tuple[str, ...]
+
+	def parts(self, **slotValues: bytes) -> list[bytes]:
+		"""The static chunks interleaved with the given slot values, e.g. for writelines"""
+		parts = [self.chunks[0]]
+		for slot, chunk in zip(self.slots, self.chunks[1:], strict=True):
+			parts.append(slotValues[slot])
+			parts.append(chunk)
+		return parts
+
+	def chunkAfter(self, slot: str) -> bytes:
+		"""The static chunk following the given slot"""
+		return self.chunks[self.slots.index(slot) + 1]
+
+	def render(self, **slotValues: bytes) -> bytes:
+		"""Fill the slots with the given values"""
+		return b"".join(self.parts(**slotValues))
+
+
+def compileMapTemplate(mapSvg: str) -> MapTemplate:
+	"""Split a prepared map (see prepareInitialMap) around its viewBox, satellites, and key slots"""
+	mapBytes = mapSvg.encode()
+
+	slotSpans = sorted(
+		(*findSlot(mapBytes, slot, prefix, marker), slot)
+		for slot, (prefix, marker) in SLOT_MARKERS.items()
+	)
+
+	chunks = []
+	chunkStart = 0
+	for start, end, _ in slotSpans:
+		chunks.append(mapBytes[chunkStart:start])
+		chunkStart = end
+	chunks.append(mapBytes[chunkStart:])
+
+	return MapTemplate(tuple(chunks), tuple(slot for _, _, slot in slotSpans))
+
+
+def findSlot(mapBytes: bytes, slot: str, prefix: bytes, marker: bytes) -> tuple[int, int]:
+	"""Start and end of the slot: from the prefix up to the marker, or the marker itself if there's
+	no prefix
+	"""
+	if prefix:
+		prefixStart = mapBytes.find(prefix)
+		start = prefixStart + len(prefix)
+		end = mapBytes.find(marker, start) if prefixStart != -1 else -1
+	else:
+		start = mapBytes.find(marker)
+		end = start + len(marker) if start != -1 else -1
+	if end == -1:
+		msg = f"Map has no {slot} to replace"
+		raise ValueError(msg)
+	return (start, end)
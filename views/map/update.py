@@ -1,24 +1,39 @@
-from datetime import datetime, timedelta
-
-from gnss.nmea import Flight
-from gnss.satellite import (
-	SatelliteInView,
-	colourForNetwork,
-	getSatelliteLatLong,
-	rotateLatLongByTime,
-)
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+
+import numpy as np
+
+from gnss.history import utcTimestamp
+from gnss.nmea import ADSBSnapshot, Flight, GnssSnapshot
+from gnss.satellite import SatelliteInView, colourForNetwork, rotateLongsByTime, satelliteLatLongs
 from misc.config import MapConfig
 from misc.size import Size
 from palettes.palette import Palette
-from views.map.gallStereographic import latLongToGallStereographic
+from views.map.gallStereographic import latLongsToGallStereographic, latLongToGallStereographic
 from views.map.generate import getMapSize
+from views.map.template import MapTemplate
+
+
+def genSnapshotMapGroup(
+	options: MapConfig, palette: Palette, gnssData: GnssSnapshot, adsbData: ADSBSnapshot
+) -> str:
+	"""Generate an SVG group of the satellite and flight positions in snapshots of the data"""
+	return genSatelliteMapGroup(
+		options,
+		palette,
+		gnssData.satellites,
+		adsbData.flights,
+		gnssData.latitude,
+		gnssData.longitude,
+		gnssData.date,
+	)
 
 
 def genSatelliteMapGroup(
 	options: MapConfig,
 	palette: Palette,
-	satellites: list[SatelliteInView],
-	flights: dict[str, Flight],
+	satellites: Sequence[SatelliteInView],
+	flights: Mapping[str, Flight],
 	measuredLatitude: float,
 	measuredLongitude: float,
 	currentTime: datetime,
@@ -28,23 +43,15 @@ def genSatelliteMapGroup(
 
 	radius = 30 / options.scaleFactor
 	satelliteStr = '\t<g id="Satellites">\n'
+	(lats, longs) = satelliteLatLongs(satellites, measuredLatitude, measuredLongitude)
 
 	if not options.hideSatelliteTrails:
-		for satellite in satellites:
+		for satellite, lat, long in zip(satellites, lats.tolist(), longs.tolist(), strict=True):
 			satelliteStr += generateSatelliteTrails(
-				satellite,
-				mapSize,
-				palette,
-				measuredLatitude,
-				measuredLongitude,
-				radius,
-				currentTime,
+				satellite, (lat, long), mapSize, palette, radius, currentTime
 			)
 
-	for satellite in satellites:
-		satelliteStr += generateSatellitePoint(
-			satellite, mapSize, palette, measuredLatitude, measuredLongitude, radius
-		)
+	satelliteStr += generateSatellitePoints(satellites, lats, longs, mapSize, palette, radius)
 
 	for flight in flights.values():
 		satelliteStr += generateFlightPoint(flight, mapSize, palette, radius)
@@ -56,75 +63,95 @@ def genSatelliteMapGroup(
 def generateFlightPoint(flight: Flight, mapSize: Size, palette: Palette, radius: float):
 	"""Generate a point for the given flight"""
 	colour = palette.cities
-	lat, long = flight.latitude, flight.longitude
+	(x, y) = flightMapPosition(flight, mapSize)
+	return f'\t\t<circle cx="{x:.4f}" cy="{y:.4f}" fill="{colour}" r="{radius}" />\n'
 
-	[x, y] = latLongToGallStereographic(lat, long, mapSize.width)
-	x += mapSize.width / 2
-	y += mapSize.height / 2
 
-	return f'\t\t<circle cx="{x:.4f}" cy="{y:.4f}" fill="{colour}" r="{radius}" />\n'
+def flightMapPosition(flight: Flight, mapSize: Size) -> tuple[float, float]:
+	"""Position of the given flight on the map"""
+	[x, y] = latLongToGallStereographic(flight.latitude, flight.longitude, mapSize.width)
+	return (x + mapSize.width / 2, y + mapSize.height / 2)
 
 
-def generateSatellitePoint(
-	satellite: SatelliteInView,
+def generateSatellitePoints(
+	satellites: Sequence[SatelliteInView],
+	lats: np.ndarray,
+	longs: np.ndarray,
 	mapSize: Size,
 	palette: Palette,
-	measuredLatitude: float,
-	measuredLongitude: float,
 	radius: float,
-):
-	"""Generate a point for the given satellite"""
-	colour = colourForNetwork(satellite.network, palette)
-	(lat, long) = getSatelliteLatLong(
-		satellite.azimuth,
-		satellite.elevation,
-		satellite.network,
-		measuredLatitude,
-		measuredLongitude,
-	)
+) -> str:
+	"""Generate a point for each of the given satellites, at their projected lat/longs"""
+	if len(satellites) == 0:
+		return ""
 
-	[x, y] = latLongToGallStereographic(lat, long, mapSize.width)
-	x += mapSize.width / 2
-	y += mapSize.height / 2
+	(xs, ys) = satelliteMapPositions(lats, longs, mapSize)
+	points = ""
+	for satellite, x, y in zip(satellites, xs.tolist(), ys.tolist(), strict=True):
+		colour = colourForNetwork(satellite.network, palette)
+		points += f'\t\t<circle cx="{x:.4f}" cy="{y:.4f}" fill="{colour}" r="{radius}" />\n'
+	return points
+
+
+def satelliteMapPositions(
+	lats: np.ndarray, longs: np.ndarray, mapSize: Size
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Positions on the map of satellites at the given lat/longs, see satelliteLatLongs"""
+	(xs, ys) = latLongsToGallStereographic(lats, longs, mapSize.width)
+	return (xs + mapSize.width / 2, ys + mapSize.height / 2)
 
-	return f'\t\t<circle cx="{x:.4f}" cy="{y:.4f}" fill="{colour}" r="{radius}" />\n'
+
+TrailSection = list[tuple[float, tuple[float, float]]]
+"""(seconds since measured, projected (x, y)) of each point along part of a trail"""
 
 
 def generateSatelliteTrails(
 	satellite: SatelliteInView,
+	currentLatLong: tuple[float, float],
 	mapSize: Size,
 	palette: Palette,
-	measuredLatitude: float,
-	measuredLongitude: float,
 	baseRadius: float,
 	currentTime: datetime,
 ):
-	"""Generate a trail for the given satellite"""
-	if len(satellite.previousPositions) < 1:
-		return ""
+	"""Generate a trail for the given satellite, ending at its current projected lat/long"""
+	fade = True
 
-	previousPositions = satellite.previousPositions.copy()
-	previousPositions.append((satellite.lastSeen, satellite.elevation, satellite.azimuth))
-	latLongs = [
-		(
-			measuredTime - currentTime,
-			rotateLatLongByTime(
-				getSatelliteLatLong(
-					azimuth, elevation, satellite.network, measuredLatitude, measuredLongitude
-				),
-				measuredTime,
-				currentTime,
-			),
-		)
-		for (measuredTime, elevation, azimuth) in previousPositions
-	]
-	mapPoints = [
-		(timeDiff, latLongToGallStereographic(lat, long, mapSize.width))
-		for (timeDiff, (lat, long)) in latLongs
-	]
+	colour = colourForNetwork(satellite.network, palette)
+	polylines = ""
+	for mapPointsSet in satelliteTrailSections(satellite, currentLatLong, mapSize, currentTime):
+		if fade:
+			polylines += genFadedTrail(mapPointsSet, mapSize, baseRadius, colour)
+		else:
+			polylines += genTrail(mapPointsSet, mapSize, baseRadius, colour)
+	return polylines
+
+
+def satelliteTrailSections(
+	satellite: SatelliteInView,
+	currentLatLong: tuple[float, float],
+	mapSize: Size,
+	currentTime: datetime,
+) -> list[TrailSection]:
+	"""Split the satellite's trail, ending at its current projected lat/long, into sections that
+	don't wrap around the map. Points are relative to the centre of the map
+	"""
+	if len(satellite.previousPositions) < 1:
+		return []
+
+	(lat, long) = currentLatLong
+	history = satellite.previousPositions.columns()
+	times = np.append(history.times, utcTimestamp(satellite.lastSeen))
+	lats = np.append(history.lats, lat)
+	longs = rotateLongsByTime(np.append(history.longs, long), times, currentTime)
+	(xs, ys) = latLongsToGallStereographic(lats, longs, mapSize.width)
+	secondsSinceMeasured = times - utcTimestamp(currentTime)
+
+	mapPoints = list(
+		zip(secondsSinceMeasured.tolist(), zip(xs.tolist(), ys.tolist(), strict=True), strict=True)
+	)
 
 	# split into separate polylines when distance too big (e.g. crossing antimeridian)
-	mapPointsSplit: list[list[tuple[timedelta, tuple[float, float]]]] = []
+	mapPointsSplit: list[TrailSection] = []
 	for index, point in enumerate(mapPoints):
 		if (
 			index == 0
@@ -134,25 +161,10 @@ def generateSatelliteTrails(
 			mapPointsSplit.append([point])
 		else:
 			mapPointsSplit[-1].append(point)
+	return mapPointsSplit
 
-	fade = True
 
-	colour = colourForNetwork(satellite.network, palette)
-	polylines = ""
-	for mapPointsSet in mapPointsSplit:
-		if fade:
-			polylines += genFadedTrail(mapPointsSet, mapSize, baseRadius, colour)
-		else:
-			polylines += genTrail(mapPointsSet, mapSize, baseRadius, colour)
-	return polylines
-
-
-def genTrail(
-	mapPointsSet: list[tuple[timedelta, tuple[float, float]]],
-	mapSize: Size,
-	baseRadius: float,
-	colour: str,
-) -> str:
+def genTrail(mapPointsSet: TrailSection, mapSize: Size, baseRadius: float, colour: str) -> str:
 	"""Generate a trail of previous positions"""
 	points = " ".join(
 		f"{(x + mapSize.width / 2):.4f},{(y + mapSize.height / 2):.4f}"
@@ -168,24 +180,14 @@ def genTrail(
 	stroke-linejoin='round' />\n"""
 
 
-def genFadedTrail(
-	mapPointsSet: list[tuple[timedelta, tuple[float, float]]],
-	mapSize: Size,
-	baseRadius: float,
-	colour: str,
-) -> str:
-	"""Generate a faded trail of previous positions"""
-	fadeStartTime = timedelta(hours=0)
-	fadeEndTime = timedelta(hours=1.5)
-
+def genFadedTrail(mapPointsSet: TrailSection, mapSize: Size, baseRadius: float, colour: str) -> str:
+	"""Generate a faded trail of previous positions, given seconds since each was measured"""
 	polylines = ""
 	for index in range(len(mapPointsSet) - 1):
 		currentPoints = mapPointsSet[index]
 		nextPoints = mapPointsSet[index + 1]
 
-		opacity = 1 + (currentPoints[0] - fadeStartTime) / (fadeEndTime - fadeStartTime)
-		opacity = max(0, opacity)
-		opacity = min(1, opacity)
+		opacity = trailOpacity(currentPoints[0])
 
 		x1, y1 = currentPoints[1]
 		x2, y2 = nextPoints[1]
@@ -201,15 +203,35 @@ def genFadedTrail(
 	return polylines
 
 
-def focusOnPoint(
-	mapSvg: str,
-	options: MapConfig,
-	desiredSize: Size,
-	keySize: Size,
-	keyXMult: float = 1,
-	keyYMult: float = 1,
-) -> str:
-	"""Focus map on a given Lat/Long."""
+def trailOpacity(secondsSinceMeasured: float) -> float:
+	"""Opacity of the part of a trail starting at a point measured the given time ago"""
+	fadeStartTime = 0
+	fadeEndTime = 1.5 * 60 * 60
+
+	opacity = 1 + (secondsSinceMeasured - fadeStartTime) / (fadeEndTime - fadeStartTime)
+	return min(1, max(0, opacity))
+
+
+def calcFocus(
+	options: MapConfig, desiredSize: Size, keySize: Size, keyXMult: float = 1, keyYMult: float = 1
+) -> tuple[str, str]:
+	"""Calculate the viewBox to focus the map on a given Lat/Long, and the key group's opening tag
+	to match
+	"""
+	(newX, newY, newSize) = calcViewBox(options, desiredSize)
+
+	if options.hideKey:
+		keyTag = '<g id="Key" style="display:none">'
+	else:
+		keyTag = genNewKeyGoup(options, newSize, keySize, keyXMult, keyYMult, newX, newY)
+
+	return (f"{newX} {newY} {newSize.width} {newSize.height}", keyTag)
+
+
+def calcViewBox(options: MapConfig, desiredSize: Size) -> tuple[float, float, Size]:
+	"""Calculate the top left corner and size of the part of the map to show, to focus on the
+	configured Lat/Long
+	"""
 	mapSize = getMapSize()
 
 	(projectedX, projectedY) = latLongToGallStereographic(
@@ -219,18 +241,23 @@ def focusOnPoint(
 	projectedY += mapSize.height / 2
 
 	newSize = calcNewDimensions(mapSize, options.scaleMethod, options.scaleFactor, desiredSize)
+	return (projectedX - newSize.width / 2, projectedY - newSize.height / 2, newSize)
 
-	newX = projectedX - newSize.width / 2
-	newY = projectedY - newSize.height / 2
-
-	if options.hideKey:
-		mapSvg = mapSvg.replace('<g id="Key">', '<g id="Key" style="display:none">')
-
-	if not options.hideKey:
-		newGroupStr = genNewKeyGoup(options, newSize, keySize, keyXMult, keyYMult, newX, newY)
-		mapSvg = mapSvg.replace('<g id="Key">', newGroupStr)
 
-	return replaceViewBox(mapSvg, f"{newX} {newY} {newSize.width} {newSize.height}")
+def focusOnPoint(
+	template: MapTemplate,
+	satelliteGroup: bytes,
+	options: MapConfig,
+	desiredSize: Size,
+	keySize: Size,
+	keyXMult: float = 1,
+	keyYMult: float = 1,
+) -> list[bytes]:
+	"""Fill the map template with the given satellites, focused on a given Lat/Long."""
+	(viewBox, keyTag) = calcFocus(options, desiredSize, keySize, keyXMult, keyYMult)
+	return template.parts(
+		viewBox=viewBox.encode(), satellites=satelliteGroup, keyTag=keyTag.encode()
+	)
 
 
 def genNewKeyGoup(
@@ -249,13 +276,6 @@ def genNewKeyGoup(
 	return f'<g id="Key" transform="translate({keyNewX} {keyNewY}) scale({inverseScaleFactor})">'
 
 
-def replaceViewBox(mapSvg: str, newViewBox: str) -> str:
-	viewboxLen = len('viewBox="')
-	viewBoxStart = mapSvg.find('viewBox="')
-	viewBoxEnd = mapSvg.find('"', viewBoxStart + viewboxLen)
-	return mapSvg[: viewBoxStart + viewboxLen] + newViewBox + mapSvg[viewBoxEnd:]
-
-
 def calcNewDimensions(
 	mapSize: Size, scaleMethod: str, scaleFactor: float, desiredSize: Size
 ) -> Size:
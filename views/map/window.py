@@ -1,14 +1,17 @@
-from PyQt6.QtCore import QByteArray, Qt, pyqtSignal
+from dataclasses import replace
+
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QKeyEvent, QResizeEvent
-from PyQt6.QtSvgWidgets import QSvgWidget
 
-from gnss.nmea import ADSBData, GnssData
+from gnss.changes import FLIGHTS, POSITION, SATELLITES
+from gnss.nmea import ADSBSnapshot, GnssSnapshot
 from misc.config import MapConfig
 from misc.size import Size
 from palettes.palette import Palette
+from views.backgroundRenderer import BackgroundRenderer
 from views.baseWindow import BaseWindow
-from views.map.generate import prepareInitialMap, readBaseMap
-from views.map.update import focusOnPoint, genSatelliteMapGroup
+from views.map.generate import getPreparedMap
+from views.map.render import RasterMapView, SvgMapView
 
 
 class MapWindow(BaseWindow):
@@ -22,46 +25,31 @@ class MapWindow(BaseWindow):
 
 		self.windowConfig = windowConfig
 		self.customPalette = palette
-		self.gnssData = GnssData()
-		self.adsbData = ADSBData()
-
-		self.keyXMult = 0.0
-		self.keyYMult = 1.0
-
-		baseSvg = readBaseMap()
+		self.gnssData = GnssSnapshot()
+		self.adsbData = ADSBSnapshot()
 
-		(self.initialMap, self.keySize) = prepareInitialMap(baseSvg, palette, windowConfig)
-		self.preFocusMap = self.initialMap
-		self.map = QSvgWidget(parent=self)
-		self.map.load(QByteArray(self.initialMap.encode()))
-		self.map.setGeometry(0, 0, int(self.defaultSize.width), int(self.defaultSize.height))
+		(template, keySize) = getPreparedMap(palette, windowConfig)
+		mapView = RasterMapView if windowConfig.renderBackend == "raster" else SvgMapView
+		self.mapView = mapView(self, windowConfig, template, keySize)
+		self.mapView.setGeometry(0, 0, int(self.defaultSize.width), int(self.defaultSize.height))
+		self.mapView.refocus()
 
+		self.renderer = BackgroundRenderer(self.mapView.setOverlay, parent=self)
 		self.satelliteReceivedEvent.connect(self.newSatelliteDataEvent)
 
 		self.setWindowTitle("GNSS War Room")
 		self.setGeometry(0, 0, int(self.defaultSize.width), int(self.defaultSize.height))
 
 	def updateMap(self):
-		"""Update the map with newest data"""
-		satelliteGroup = genSatelliteMapGroup(
-			self.windowConfig,
-			self.customPalette,
-			self.gnssData.satellites,
-			self.adsbData.flights,
-			self.gnssData.latitude,
-			self.gnssData.longitude,
-			self.gnssData.date,
-		)
-		mapSvg = self.initialMap.replace("<!-- satellites go here -->", satelliteGroup)
-		self.preFocusMap = mapSvg
-		return focusOnPoint(
-			mapSvg,
-			self.windowConfig,
-			Size(self.map.width(), self.map.height()),
-			self.keySize,
-			self.keyXMult,
-			self.keyYMult,
-		)
+		"""Generate the satellites for the newest data in the background. They're shown with the
+		options and size at the time they finish, as those may have changed since
+		"""
+		generateOverlay = self.mapView.generateOverlay
+		options = replace(self.windowConfig)
+		palette = self.customPalette
+		gnssData = self.gnssData
+		adsbData = self.adsbData
+		self.renderer.submit(lambda: generateOverlay(options, palette, gnssData, adsbData))
 
 	def resizeEvent(self, event: QResizeEvent | None):
 		"""Resize map when window is resized"""
@@ -72,17 +60,8 @@ class MapWindow(BaseWindow):
 		newX = event.size().width()
 		newY = event.size().height()
 
-		mapSvg = focusOnPoint(
-			self.preFocusMap,
-			self.windowConfig,
-			Size(newX, newY),
-			self.keySize,
-			self.keyXMult,
-			self.keyYMult,
-		)
-
-		self.map.load(QByteArray(mapSvg.encode()))
-		self.map.setGeometry(0, 0, newX, newY)
+		self.mapView.setGeometry(0, 0, newX, newY)
+		self.mapView.refocus()
 
 	def moveMapBy(self, lat: float, long: float):
 		"""Move the map by a given amount"""
@@ -114,16 +93,11 @@ class MapWindow(BaseWindow):
 			self.windowConfig.hideCities = not self.windowConfig.hideCities
 			self.resetMapOnScale()
 
-		mapSvg = focusOnPoint(
-			self.preFocusMap,
-			self.windowConfig,
-			Size(self.map.width(), self.map.height()),
-			self.keySize,
-			self.keyXMult,
-			self.keyYMult,
-		)
+		if event.key() == Qt.Key.Key_I:
+			backend = self.windowConfig.renderBackend
+			print(f"{self.windowTitle()} ({backend}): {self.mapView.frameStats.summary()}")
 
-		self.map.load(QByteArray(mapSvg.encode()))
+		self.mapView.refocus()
 
 	def handleMoveMapKeys(self, event: QKeyEvent):
 		"""Handle keybinds for moving the map"""
@@ -144,16 +118,16 @@ class MapWindow(BaseWindow):
 		"""Handle keybinds for moving the key"""
 		keyMovement = 0.5
 		if event.key() == Qt.Key.Key_Left:
-			self.keyXMult -= keyMovement
+			self.mapView.keyXMult -= keyMovement
 		if event.key() == Qt.Key.Key_Right:
-			self.keyXMult += keyMovement
+			self.mapView.keyXMult += keyMovement
 		if event.key() == Qt.Key.Key_Up:
-			self.keyYMult -= keyMovement
+			self.mapView.keyYMult -= keyMovement
 		if event.key() == Qt.Key.Key_Down:
-			self.keyYMult += keyMovement
+			self.mapView.keyYMult += keyMovement
 
-		self.keyXMult = max(0, min(1, self.keyXMult))
-		self.keyYMult = max(0, min(1, self.keyYMult))
+		self.mapView.keyXMult = max(0, min(1, self.mapView.keyXMult))
+		self.mapView.keyYMult = max(0, min(1, self.mapView.keyYMult))
 
 	def handleScaleKeys(self, event: QKeyEvent):
 		"""Handle keybinds for scaling the map"""
@@ -172,19 +146,20 @@ class MapWindow(BaseWindow):
 
 	def resetMapOnScale(self):
 		"""Reset the map on scale to prevent any artifacts"""
-		baseSvg = readBaseMap()
-		(self.initialMap, self.keySize) = prepareInitialMap(
-			baseSvg, self.customPalette, self.windowConfig
-		)
-		self.preFocusMap = self.initialMap
+		self.mapView.setTemplate(*getPreparedMap(self.customPalette, self.windowConfig))
 		self.newSatelliteDataEvent()
 
-	def onNewData(self, gnssData: GnssData, adsbData: ADSBData):
+	def onNewData(self, gnssData: GnssSnapshot, adsbData: ADSBSnapshot):
 		"""Handle new satellite data"""
+		if not (
+			gnssData.changes.changedSince(self.drawnVersion, POSITION, SATELLITES)
+			or adsbData.changes.changedSince(self.drawnVersion, FLIGHTS)
+		):
+			return
+		self.drawnVersion = max(gnssData.changes.version, adsbData.changes.version)
 		self.gnssData = gnssData
 		self.adsbData = adsbData
 		self.satelliteReceivedEvent.emit()
 
 	def newSatelliteDataEvent(self):
-		newMap = self.updateMap()
-		self.map.load(QByteArray(newMap.encode()))
+		self.updateMap()
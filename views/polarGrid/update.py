@@ -1,4 +1,5 @@
 import math
+from collections.abc import Sequence
 
 from gnss.satellite import SatelliteInView, colourForNetwork
 from palettes.palette import Palette
@@ -13,7 +14,7 @@ def azimuthToPolarCoords(azimuth: float, elevation: float, scale: float):
 
 
 def addSatellitesToPolarGrid(
-	svgData: str, palette: Palette, satellites: list[SatelliteInView]
+	svgData: str, palette: Palette, satellites: Sequence[SatelliteInView]
 ) -> str:
 	"""Add satellite positions to the SVG"""
 	scale = 94
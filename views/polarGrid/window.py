@@ -2,8 +2,11 @@ from PyQt6.QtCore import QByteArray, pyqtSignal
 from PyQt6.QtGui import QResizeEvent
 from PyQt6.QtSvgWidgets import QSvgWidget
 
+from gnss.changes import SATELLITES
+from gnss.nmea import GnssSnapshot
 from gnss.satellite import SatelliteInView
 from palettes.palette import Palette
+from views.backgroundRenderer import BackgroundRenderer
 from views.baseWindow import BaseWindow
 from views.polarGrid.generate import prepareIntialPolarGrid, readBasePolarGrid
 from views.polarGrid.update import addSatellitesToPolarGrid
@@ -17,13 +20,14 @@ class PolarGridWindow(BaseWindow):
 	def __init__(self, palette: Palette):
 		super().__init__(palette)
 
-		self.latestSatellites: list[SatelliteInView] = []
+		self.latestSatellites: tuple[SatelliteInView, ...] = ()
 
 		self.svgFile = self.generateNewGrid()
 		self.polarGrid = QSvgWidget(parent=self)
 		self.polarGrid.load(self.svgFile)
 		self.polarGrid.setGeometry(0, 0, int(self.defaultSize.width), int(self.defaultSize.height))
 
+		self.renderer = BackgroundRenderer(self.showGrid, parent=self)
 		self.satelliteReceivedEvent.connect(self.newSatelliteDataEvent)
 
 		self.setWindowTitle("Polar Grid")
@@ -35,10 +39,17 @@ class PolarGridWindow(BaseWindow):
 		return QByteArray(svgData.encode())
 
 	def updateGrid(self):
-		svgData = addSatellitesToPolarGrid(
-			self.basePolarGrid, self.customPalette, self.latestSatellites
+		"""Add the latest satellites to the grid in the background"""
+		basePolarGrid = self.basePolarGrid
+		palette = self.customPalette
+		satellites = self.latestSatellites
+		self.renderer.submit(
+			lambda: addSatellitesToPolarGrid(basePolarGrid, palette, satellites).encode()
 		)
-		return QByteArray(svgData.encode())
+
+	def showGrid(self, svgData: bytes):
+		self.svgFile = QByteArray(svgData)
+		self.polarGrid.load(self.svgFile)
 
 	def resizeEvent(self, event: QResizeEvent | None):
 		"""Resize the window, and the polar grid to fit"""
@@ -53,10 +64,12 @@ class PolarGridWindow(BaseWindow):
 			int((newX - minSize) / 2), int((newY - minSize) / 2), minSize, minSize
 		)
 
-	def onNewData(self, satellites: list[SatelliteInView]):
-		self.latestSatellites = satellites
+	def onNewData(self, gnssData: GnssSnapshot):
+		if not gnssData.changes.changedSince(self.drawnVersion, SATELLITES):
+			return
+		self.drawnVersion = gnssData.changes.version
+		self.latestSatellites = gnssData.satellites
 		self.satelliteReceivedEvent.emit()
 
 	def newSatelliteDataEvent(self):
-		self.svgFile = self.updateGrid()
-		self.polarGrid.load(self.svgFile)
+		self.updateGrid()
@@ -0,0 +1,229 @@
+from collections import deque
+
+from PyQt6.QtCore import QByteArray, QPointF, Qt
+from PyQt6.QtGui import QColor, QImage, QPainter, QPainterPath, QPaintEvent, QPen
+from PyQt6.QtSvgWidgets import QSvgWidget
+from PyQt6.QtWidgets import QWidget
+
+from font.hp1345Font import Font
+from font.mksvgs import CARRIAGE_RETURN, areVectorsSinglePoint, makeTextGroup, textBoundingBox
+from misc.size import Size
+
+CHARS_WIDE = 80
+
+
+class SvgMessageLog:
+	"""Message log as a single SVG, where each line's group is rendered once and keeps a fixed
+	position, and the whole log is moved up by one line for each new message
+	"""
+
+	def __init__(
+		self,
+		parent: QWidget,
+		font: Font,
+		fontThickness: float,
+		fontColour: str,
+		numMessagesToKeep: int,
+		textScale: float,
+		lineSize: Size,
+	):
+		self.vectorFont = font
+		self.fontThickness = fontThickness
+		self.fontColour = fontColour
+		self.textScale = textScale
+		self.lineSize = lineSize
+		self.numMessagesToKeep = numMessagesToKeep
+
+		self.messages: deque[bytes] = deque(maxlen=numMessagesToKeep)
+		"""Kept to render the lines again if the text scale changes"""
+		self.lines: deque[str] = deque(maxlen=numMessagesToKeep)
+		self.messagesAdded = 0
+
+		self.widget = QSvgWidget(parent=parent)
+
+	def addMessage(self, message: bytes):
+		"""Render just the new message's line"""
+		self.messages.appendleft(message)
+		self.lines.appendleft(self.renderLine(message))
+		self.messagesAdded += 1
+
+	def renderLine(self, message: bytes) -> str:
+		"""The message's group, at its fixed position in the log"""
+		(group, _, _) = makeTextGroup(
+			self.vectorFont,
+			message,
+			scale=self.textScale,
+			fontThickness=self.fontThickness,
+			fontColour=self.fontColour,
+		)
+		lineY = -self.messagesAdded * self.lineSize.height
+		return f'<g transform="translate(0, {lineY})">\n{group}</g>\n'
+
+	def setTextScale(self, textScale: float, lineSize: Size):
+		"""Render every line again at the new scale, as the rendered lines can't be resized"""
+		self.textScale = textScale
+		self.lineSize = lineSize
+		self.lines.clear()
+		self.messagesAdded = 0
+		for message in reversed(self.messages):
+			self.lines.appendleft(self.renderLine(message))
+			self.messagesAdded += 1
+
+	def refresh(self):
+		"""Show the latest lines, newest at the top"""
+		totalWidth = self.lineSize.width
+		totalHeight = int(self.lineSize.height * self.numMessagesToKeep)
+		scrolledBy = (self.messagesAdded - 1) * self.lineSize.height
+
+		svg = "".join(
+			(
+				f'<svg version="1.1" viewBox="0 0 {totalWidth} {totalHeight}">',
+				f'<g transform="translate(0, {scrolledBy})">\n',
+				*self.lines,
+				"</g></svg>",
+			)
+		)
+		self.widget.load(QByteArray(svg.encode()))
+		self.fitToWidth(self.widget.width())
+
+	def fitToWidth(self, width: int):
+		"""Resize the log to the given width, keeping its aspect ratio"""
+		self.widget.setGeometry(
+			0, 0, width, int(heightForWidth(self.lineSize, self.numMessagesToKeep, width))
+		)
+
+
+class RasterMessageLog(QWidget):
+	"""Message log drawn from a cached image of each line with QPainter, so a new message only draws
+	its own line and Qt never has to parse the whole log as an SVG
+	"""
+
+	def __init__(
+		self,
+		parent: QWidget,
+		font: Font,
+		fontThickness: float,
+		fontColour: str,
+		numMessagesToKeep: int,
+		textScale: float,
+		lineSize: Size,
+	):
+		super().__init__(parent)
+		self.vectorFont = font
+		self.fontThickness = fontThickness
+		self.fontColour = QColor(fontColour)
+		self.textScale = textScale
+		self.lineSize = lineSize
+		self.numMessagesToKeep = numMessagesToKeep
+
+		self.messages: deque[bytes] = deque(maxlen=numMessagesToKeep)
+		"""Kept to render the lines again if the text scale changes"""
+		self.lines: deque[QImage] = deque(maxlen=numMessagesToKeep)
+		self.widget = self
+
+	def addMessage(self, message: bytes):
+		"""Render just the new message's line"""
+		self.messages.appendleft(message)
+		self.lines.appendleft(self.renderLine(message))
+
+	def setTextScale(self, textScale: float, lineSize: Size):
+		"""Render every line again at the new scale, as the cached images are for the old one"""
+		self.textScale = textScale
+		self.lineSize = lineSize
+		self.lines = deque(
+			(self.renderLine(message) for message in self.messages), maxlen=self.numMessagesToKeep
+		)
+
+	def refresh(self):
+		"""Show the latest lines, newest at the top"""
+		self.fitToWidth(self.width())
+		self.update()
+
+	def fitToWidth(self, width: int):
+		"""Resize the log to the given width, keeping its aspect ratio"""
+		self.setGeometry(
+			0, 0, width, int(heightForWidth(self.lineSize, self.numMessagesToKeep, width))
+		)
+
+	def renderLine(self, message: bytes) -> QImage:
+		"""Draw the message's vectors into an image, positioned as makeTextGroup would"""
+		border = 10
+		boundingBox = textBoundingBox(self.vectorFont, message)
+
+		image = QImage(
+			int(self.lineSize.width),
+			int(self.lineSize.height),
+			QImage.Format.Format_ARGB32_Premultiplied,
+		)
+		image.fill(Qt.GlobalColor.transparent)
+
+		painter = QPainter(image)
+		painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+		pen = QPen(self.fontColour, self.fontThickness)
+		pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+		pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
+		painter.setPen(pen)
+		# also scales the pen, as the SVG backend's stroke-width is scaled with the text
+		painter.scale(self.textScale, self.textScale)
+		# font vectors are y-up
+		painter.translate(border - boundingBox[0], border + boundingBox[3])
+		painter.scale(1, -1)
+		(path, dots) = self.messagePath(message)
+		painter.drawPath(path)
+		for dot in dots:
+			painter.drawPoint(dot)
+		painter.end()
+		return image
+
+	def messagePath(self, message: bytes) -> tuple[QPainterPath, list[QPointF]]:
+		"""Trace the font's vectors for the message, along with any single point lines, which are
+		drawn as points as a zero length path may not be
+		"""
+		path = QPainterPath()
+		dots: list[QPointF] = []
+		x, y = 0, 0
+		for char in message:
+			for line in self.vectorFont.charVectorsList[char]:
+				(x, y) = traceLine(path, dots, line, x, y)
+			if char == CARRIAGE_RETURN:
+				x = 0
+		return (path, dots)
+
+	def paintEvent(self, event: QPaintEvent | None):  # pylint: disable=unused-argument
+		"""Draw the cached lines, scaled to fit the width"""
+		painter = QPainter(self)
+		painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+		scale = self.width() / self.lineSize.width
+		painter.scale(scale, scale)
+		for index, image in enumerate(self.lines):
+			painter.drawImage(QPointF(0, index * self.lineSize.height), image)
+		painter.end()
+
+
+def traceLine(
+	path: QPainterPath, dots: list[QPointF], line: list[tuple[int, int]], x: int, y: int
+) -> tuple[int, int]:
+	"""Add one of a character's lines to the path (or dots, if it's a single point) from the pen
+	position, returning where the pen ends up
+	"""
+	(dx, dy) = line[0]
+	x += dx
+	y += dy
+	path.moveTo(x, y)
+	for dx, dy in line[1:]:
+		x += dx
+		y += dy
+		path.lineTo(x, y)
+	if len(line) > 1 and areVectorsSinglePoint(line):
+		dots.append(QPointF(x, y))
+	return (x, y)
+
+
+def lineSizeForChar(charSize: Size) -> Size:
+	"""Size of a line of the log, given the size of a character"""
+	return Size(CHARS_WIDE * charSize.width, charSize.height + 15)
+
+
+def heightForWidth(lineSize: Size, numLines: int, width: float) -> float:
+	"""Height of the whole log when scaled to the given width"""
+	return lineSize.height * numLines * width / lineSize.width
@@ -1,13 +1,16 @@
+from collections import deque
+
 from PyQt6.QtCore import QByteArray, pyqtSignal
 from PyQt6.QtGui import QResizeEvent
 from PyQt6.QtSvgWidgets import QSvgWidget
 
-from font.hp1345Font import Font
+from font.hp1345Font import getFont
 from font.mksvgs import makeSvgString, makeTextGroup
 from misc.config import RawMessageConfig
 from misc.size import Size
 from palettes.palette import Palette
 from views.baseWindow import BaseWindow
+from views.rawMessages.log import RasterMessageLog, SvgMessageLog, lineSizeForChar
 
 
 class RawMessageWindow(BaseWindow):
@@ -23,18 +26,11 @@ class RawMessageWindow(BaseWindow):
 		self.config = config
 
 		self.satelliteReceivedEvent.connect(self.updateMessageLog)
-		self.messageSvgGroups = [""] * config.numMessagesToKeep
+		# filled from the MQTT thread, and only rendered on the UI thread when the log is updated
+		self.pendingMessages: deque[bytes] = deque(maxlen=config.numMessagesToKeep)
 
-		self.svgFont = Font()
-		(_, charWidth, charHeight) = makeTextGroup(
-			self.svgFont,
-			"$".encode("ascii"),
-			scale=self.textScale,
-			fontThickness=self.config.fontThickness,
-			border=0,
-			fontColour=palette.foreground,
-		)
-		self.charSize = Size(charWidth, charHeight)
+		self.svgFont = getFont()
+		self.charSize = self.charSizeForScale(self.textScale)
 
 		(svgStr, width, height) = makeSvgString(
 			self.svgFont,
@@ -43,12 +39,44 @@ class RawMessageWindow(BaseWindow):
 			fontThickness=2,
 		)
 
-		self.svg = QSvgWidget(parent=self)
-		self.svg.load(QByteArray(svgStr.encode()))
-		self.svg.setGeometry(0, 0, width, height)
+		self.waitingSvg = QSvgWidget(parent=self)
+		self.waitingSvg.load(QByteArray(svgStr.encode()))
+		self.waitingSvg.setGeometry(0, 0, width, height)
+
+		logBackend = RasterMessageLog if config.renderBackend == "raster" else SvgMessageLog
+		self.messageLog = logBackend(
+			self,
+			self.svgFont,
+			config.fontThickness,
+			palette.foreground,
+			config.numMessagesToKeep,
+			self.textScale,
+			lineSizeForChar(self.charSize),
+		)
+		self.messageLog.widget.hide()
+		self.messageLog.fitToWidth(int(self.defaultSize.width))
 
 		self.setGeometry(0, 0, int(self.defaultSize.width), int(self.defaultSize.height))
 
+	def charSizeForScale(self, textScale: float) -> Size:
+		"""Size of a character of the log's text at the given scale"""
+		(_, charWidth, charHeight) = makeTextGroup(
+			self.svgFont,
+			"$".encode("ascii"),
+			scale=textScale,
+			fontThickness=self.config.fontThickness,
+			border=0,
+			fontColour=self.customPalette.foreground,
+		)
+		return Size(charWidth, charHeight)
+
+	def setTextScale(self, textScale: float):
+		"""Change the size of the log's text, rendering the lines already shown again"""
+		self.textScale = textScale
+		self.charSize = self.charSizeForScale(textScale)
+		self.messageLog.setTextScale(textScale, lineSizeForChar(self.charSize))
+		self.messageLog.fitToWidth(self.width())
+
 	def resizeEvent(self, event: QResizeEvent | None):
 		"""Resize the window, and the messages to fit"""
 		super().resizeEvent(event)
@@ -56,44 +84,23 @@ class RawMessageWindow(BaseWindow):
 			return
 
 		newWidth = event.size().width()
-		oldWidth = self.svg.width()
-		oldHeight = self.svg.height()
-		newHeight = oldHeight * newWidth / oldWidth
-		self.svg.setGeometry(0, 0, newWidth, int(newHeight))
+		oldWidth = self.waitingSvg.width()
+		oldHeight = self.waitingSvg.height()
+		self.waitingSvg.setGeometry(0, 0, newWidth, int(oldHeight * newWidth / oldWidth))
+		self.messageLog.fitToWidth(newWidth)
 
 	def onNewData(self, message: bytes):
-		"""Update the raw message window with new data"""
-		(newGroup, _, _) = makeTextGroup(
-			self.svgFont,
-			message,
-			scale=self.textScale,
-			fontThickness=self.config.fontThickness,
-			fontColour=self.customPalette.foreground,
-		)
-		self.messageSvgGroups.insert(0, newGroup)
-		self.messageSvgGroups.pop()
+		"""Queue a new message to be added to the log"""
+		self.pendingMessages.append(message)
 
 	def updateMessageLog(self):
-		"""Update the displayed message log"""
-		svgToDisplay = ""
-
-		heightOfMessage = self.charSize.height + 15
-
-		for i, messageSvgGroup in enumerate(self.messageSvgGroups):
-			strToAdd = f"""<g transform="translate(0, {i * heightOfMessage})">
-				{messageSvgGroup}
-			</g>"""
-			svgToDisplay += strToAdd
-
-		charsWide = 80
-		totalWidth = charsWide * self.charSize.width
+		"""Render any new messages, and update the displayed message log"""
+		if not self.pendingMessages:
+			return
 
-		newWidth = self.svg.width()
-		desiredHeight = int(heightOfMessage * len(self.messageSvgGroups))
-		newHeight = desiredHeight * newWidth / totalWidth
+		while self.pendingMessages:
+			self.messageLog.addMessage(self.pendingMessages.popleft())
 
-		svgToDisplay = (
-			f'<svg version="1.1" viewBox="0 0 {totalWidth} {desiredHeight}">{svgToDisplay}</svg>'
-		)
-		self.svg.load(QByteArray(svgToDisplay.encode()))
-		self.svg.setGeometry(0, 0, newWidth, int(newHeight))
+		self.waitingSvg.hide()
+		self.messageLog.widget.show()
+		self.messageLog.refresh()
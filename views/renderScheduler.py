@@ -0,0 +1,86 @@
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from misc.config import DEFAULT_MAX_FPS
+
+
+@dataclass
+class FrameStats:
+	"""How long frames take to draw, and how many updates were coalesced into later frames"""
+
+	framesDrawn: int = 0
+	framesDropped: int = 0
+	"""Updates that arrived while a frame was already pending, so were drawn as part of it"""
+	frameTimes: deque[float] = field(default_factory=lambda: deque(maxlen=100))
+	"""Seconds taken to draw each of the most recent frames"""
+
+	def recordFrame(self, frameTime: float):
+		self.framesDrawn += 1
+		self.frameTimes.append(frameTime)
+
+	def meanFrameTime(self) -> float:
+		return sum(self.frameTimes) / len(self.frameTimes) if self.frameTimes else 0
+
+	def maxFrameTime(self) -> float:
+		return max(self.frameTimes, default=0)
+
+	def summary(self) -> str:
+		return (
+			f"{self.framesDrawn} frames drawn, {self.framesDropped} dropped, "
+			f"mean {self.meanFrameTime() * 1000:.1f}ms, max {self.maxFrameTime() * 1000:.1f}ms"
+		)
+
+
+class RenderScheduler(QObject):
+	"""Coalesces redraw requests from any thread into redraws on the Qt event loop, at most maxFps
+	times a second. A request during the cooldown after a frame schedules one more frame at the end
+	of it, so the latest data always gets drawn.
+	"""
+
+	dirtyEvent = pyqtSignal()
+
+	def __init__(self, draw: Callable[[], None], maxFps: float = DEFAULT_MAX_FPS, parent=None):
+		super().__init__(parent)
+		self.draw = draw
+		self.minFrameInterval = 1 / maxFps
+		self.lastFrameAt = -self.minFrameInterval
+		self.stats = FrameStats()
+
+		# only one dirty event is queued at a time, however many requests come in
+		self.dirtyQueued = False
+		self.dirtyEvent.connect(self.onDirty)
+
+		self.trailingFrameTimer = QTimer(self)
+		self.trailingFrameTimer.setSingleShot(True)
+		self.trailingFrameTimer.timeout.connect(self.drawFrame)
+
+	def markDirty(self):
+		"""Request a redraw, safe to call from any thread"""
+		if self.dirtyQueued:
+			self.stats.framesDropped += 1
+			return
+		self.dirtyQueued = True
+		self.dirtyEvent.emit()  # queued onto the Qt event loop if called from another thread
+
+	def onDirty(self):
+		"""Draw now if the last frame was long enough ago, otherwise schedule a trailing frame"""
+		self.dirtyQueued = False
+		if self.trailingFrameTimer.isActive():
+			self.stats.framesDropped += 1
+			return
+
+		untilNextFrame = self.minFrameInterval - (time.monotonic() - self.lastFrameAt)
+		if untilNextFrame <= 0:
+			self.drawFrame()
+		else:
+			self.trailingFrameTimer.start(int(untilNextFrame * 1000))
+
+	def drawFrame(self):
+		startTime = time.monotonic()
+		self.lastFrameAt = startTime
+		self.draw()
+		self.stats.recordFrame(time.monotonic() - startTime)
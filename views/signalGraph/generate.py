@@ -1,5 +1,7 @@
+from collections.abc import Sequence
+
 from font.hp1345Font import Font
-from font.mksvgs import makeTextGroup
+from font.mksvgs import makeTextGroupCached
 from gnss.satellite import SatelliteInView, colourForNetwork
 from misc.config import SignalChartConfig
 from palettes.palette import Palette
@@ -31,7 +33,7 @@ def generateYLabel(
 ) -> str:
 	"""Generate text indicating the given y tick"""
 	textToDisplay = f"{int(settings.maxValue - (settings.markerStep * currentMarker))}"
-	textSvg, textWidth, textHeight = makeTextGroup(
+	textSvg, textWidth, textHeight = makeTextGroupCached(
 		font, textToDisplay.encode("ascii"), fontThickness=2, fontColour=palette.foreground
 	)
 	scaleTextBy = 0.4
@@ -80,14 +82,14 @@ def generateScale(
 	font: Font,
 	chartHeight: float,
 	chartWidth: float,
-	satellites: list[SatelliteInView],
+	satellites: Sequence[SatelliteInView],
 ) -> str:
 	"""Generate the axis and scale with the given options"""
 	scale = generateAxisLines(settings, palette, chartWidth, chartHeight)
 
 	markerCount = int((settings.maxValue - settings.minValue) / settings.markerStep)
 
-	_, _, charHeight = makeTextGroup(font, "0".encode("ascii"), fontThickness=2, border=0)
+	_, _, charHeight = makeTextGroupCached(font, "0".encode("ascii"), fontThickness=2, border=0)
 	step = 1
 	charsCanFit = chartHeight / (charHeight)
 	if charsCanFit < markerCount:
@@ -102,9 +104,11 @@ def generateScale(
 	return scale
 
 
-def shouldLabelXAxis(satellites: list[SatelliteInView], font: Font, availableWidth: float) -> bool:
+def shouldLabelXAxis(
+	satellites: Sequence[SatelliteInView], font: Font, availableWidth: float
+) -> bool:
 	"""Check if the x-axis should be labelled"""
-	_, charWidth, _ = makeTextGroup(font, "0".encode("ascii"), fontThickness=2)
+	_, charWidth, _ = makeTextGroupCached(font, "0".encode("ascii"), fontThickness=2)
 	charsCanFit = availableWidth / (charWidth - 10)
 	return len(satellites) < charsCanFit * 2
 
@@ -115,7 +119,7 @@ def generateXLabels(
 	font: Font,
 	chartWidth: float,
 	chartHeight: float,
-	satellites: list[SatelliteInView],
+	satellites: Sequence[SatelliteInView],
 ) -> str:
 	"""Generate the x-axis labels"""
 	if len(satellites) == 0:
@@ -144,7 +148,7 @@ def generateXLabel(
 	barWidth = chartWidth / numSatellites - barGap
 
 	labelText = f"{satellite.prnNumber}"
-	labelTextSvg, labelWidth, labelHeight = makeTextGroup(
+	labelTextSvg, labelWidth, labelHeight = makeTextGroupCached(
 		font, labelText.encode("ascii"), fontThickness=2, fontColour=palette.foreground
 	)
 	scaleTextBy = 0.4
@@ -188,7 +192,7 @@ def generateBar(
 def generateBars(
 	settings: SignalChartConfig,
 	palette: Palette,
-	satellites: list[SatelliteInView],
+	satellites: Sequence[SatelliteInView],
 	chartHeight: float,
 	chartWidth: float,
 ) -> str:
@@ -201,15 +205,15 @@ def generateBars(
 	)
 
 
-def sortSatellitesByNetworkThenPrn(satellites: list[SatelliteInView]):
+def sortSatellitesByNetworkThenPrn(satellites: Sequence[SatelliteInView]):
 	return sorted(satellites, key=lambda satellite: (satellite.network, int(satellite.prnNumber)))
 
 
-def sortSatellitesBySnr(satellites: list[SatelliteInView]):
+def sortSatellitesBySnr(satellites: Sequence[SatelliteInView]):
 	return sorted(satellites, key=lambda satellite: satellite.snr)
 
 
-def sortSatellitesByElevation(satellites: list[SatelliteInView]):
+def sortSatellitesByElevation(satellites: Sequence[SatelliteInView]):
 	return sorted(satellites, key=lambda satellite: satellite.elevation)
 
 
@@ -217,7 +221,7 @@ def generateBarChart(
 	settings: SignalChartConfig,
 	palette: Palette,
 	font: Font,
-	satellites: list[SatelliteInView],
+	satellites: Sequence[SatelliteInView],
 	availableWidth: float,
 	availableHeight: float,
 	sortMethod: str = "networkThenPrn",
@@ -1,12 +1,16 @@
+from dataclasses import replace
+
 from PyQt6.QtCore import QByteArray, Qt, pyqtSignal
 from PyQt6.QtGui import QKeyEvent, QResizeEvent
 from PyQt6.QtSvgWidgets import QSvgWidget
 
-from font.hp1345Font import Font
-from gnss.nmea import GnssData
+from font.hp1345Font import getFont
+from gnss.changes import SATELLITES
+from gnss.nmea import GnssSnapshot
 from misc.config import SignalChartConfig
 from misc.size import Size
 from palettes.palette import Palette
+from views.backgroundRenderer import BackgroundRenderer
 from views.baseWindow import BaseWindow
 from views.signalGraph.generate import generateBarChart
 
@@ -23,14 +27,15 @@ class SignalGraphWindow(BaseWindow):
 		self.setWindowTitle("Signal Graph")
 		self.config = config
 
-		self.latestData = GnssData()
+		self.latestData = GnssSnapshot()
 
 		self.sortMethods = ["networkThenPrn", "snr", "elevation"]
 		self.sortMethodIndex = 0
 
-		self.svgFont = Font()
+		self.svgFont = getFont()
 		self.svg = QSvgWidget(parent=self)
 		self.svg.setGeometry(0, 0, int(self.defaultSize.width), int(self.defaultSize.height))
+		self.renderer = BackgroundRenderer(self.showGraph, parent=self)
 		self.updateGraph()
 
 		self.satelliteReceivedEvent.connect(self.updateGraph)
@@ -61,19 +66,26 @@ class SignalGraphWindow(BaseWindow):
 			self.config.countUntrackedSatellites = not self.config.countUntrackedSatellites
 			self.updateGraph()
 
-	def onNewData(self, gnssData: GnssData):
+	def onNewData(self, gnssData: GnssSnapshot):
+		if not gnssData.changes.changedSince(self.drawnVersion, SATELLITES):
+			return
+		self.drawnVersion = gnssData.changes.version
 		self.latestData = gnssData
 		self.satelliteReceivedEvent.emit()
 
 	def updateGraph(self):
-		"""Update the graph when needed"""
-		barChartSvg = generateBarChart(
-			self.config,
-			self.customPalette,
-			self.svgFont,
-			self.latestData.satellites,
-			self.svg.width(),
-			self.svg.height(),
-			self.sortMethods[self.sortMethodIndex],
+		"""Generate the graph for the latest data and current size in the background"""
+		config = replace(self.config)
+		palette = self.customPalette
+		font = self.svgFont
+		satellites = self.latestData.satellites
+		(width, height) = (self.svg.width(), self.svg.height())
+		sortMethod = self.sortMethods[self.sortMethodIndex]
+		self.renderer.submit(
+			lambda: generateBarChart(
+				config, palette, font, satellites, width, height, sortMethod
+			).encode()
 		)
-		self.svg.load(QByteArray(barChartSvg.encode()))
+
+	def showGraph(self, barChartSvg: bytes):
+		self.svg.load(QByteArray(barChartSvg))
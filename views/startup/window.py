@@ -8,7 +8,7 @@ from PyQt6.QtCore import QByteArray, pyqtSignal
 from PyQt6.QtSvgWidgets import QSvgWidget
 from PyQt6.QtWidgets import QApplication
 
-from font.hp1345Font import Font
+from font.hp1345Font import getFont
 from font.mksvgs import makeSvgString
 from palettes.palette import Palette
 from views.baseWindow import BaseWindow
@@ -26,7 +26,7 @@ class StartupWindow(BaseWindow):
 
 		self.app = app
 
-		self.svgFont = Font()
+		self.svgFont = getFont()
 		self.svg = QSvgWidget(parent=self)
 
 		self.refreshSignal.connect(self.refresh)
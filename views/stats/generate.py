@@ -2,7 +2,7 @@ from itertools import zip_longest
 
 from font.hp1345Font import Font
 from font.mksvgs import makeSvgString
-from gnss.nmea import GnssData
+from gnss.nmea import GnssSnapshot
 from misc.config import MiscStatsConfig
 from palettes.palette import Palette
 from views.map.cities import findNearestCityWithCache
@@ -44,7 +44,7 @@ def combineWithPadding(left: list[str], right: list[str], padToWidth: int) -> li
 
 
 def generateStats(
-	data: GnssData, palette: Palette, font: Font, config: MiscStatsConfig
+	data: GnssSnapshot, palette: Palette, font: Font, config: MiscStatsConfig
 ) -> tuple[str, int, int]:
 	"""Generate an SVG of stats for the given data"""
 	nearestCity = findNearestCityWithCache(data.latitude, data.longitude)
@@ -1,12 +1,16 @@
+from dataclasses import replace
+
 from PyQt6.QtCore import QByteArray, QSize, pyqtSignal
 from PyQt6.QtGui import QResizeEvent
 from PyQt6.QtSvgWidgets import QSvgWidget
 
-from font.hp1345Font import Font
-from font.mksvgs import makeSvgString
-from gnss.nmea import GnssData
+from font.hp1345Font import getFont
+from font.mksvgs import makeSvgStringCached
+from gnss.changes import DOP, POSITION, SATELLITES
+from gnss.nmea import GnssSnapshot
 from misc.config import MiscStatsConfig
 from palettes.palette import Palette
+from views.backgroundRenderer import BackgroundRenderer
 from views.baseWindow import BaseWindow
 from views.stats.generate import generateStats
 
@@ -21,11 +25,12 @@ class MiscStatsWindow(BaseWindow):
 		self.setWindowTitle("Misc Stats")
 		self.config = config
 
+		self.renderer = BackgroundRenderer(self.showStats, parent=self)
 		self.satelliteReceivedEvent.connect(self.updateWithNewData)
-		self.latestData = GnssData()
+		self.latestData = GnssSnapshot()
 
-		self.svgFont = Font()
-		(svgStr, width, height) = makeSvgString(
+		self.svgFont = getFont()
+		(svgStr, width, height) = makeSvgStringCached(
 			self.svgFont,
 			"Waiting for data...".encode("ascii"),
 			fontThickness=self.config.fontThickness,
@@ -56,8 +61,11 @@ class MiscStatsWindow(BaseWindow):
 
 		self.svg.setGeometry(0, 0, newWidth, newHeight)
 
-	def onNewData(self, gnssData: GnssData):
+	def onNewData(self, gnssData: GnssSnapshot):
 		"""Update window with new data"""
+		if not gnssData.changes.changedSince(self.drawnVersion, POSITION, DOP, SATELLITES):
+			return
+		self.drawnVersion = gnssData.changes.version
 		self.latestData = gnssData
 		self.satelliteReceivedEvent.emit()
 
@@ -65,13 +73,18 @@ class MiscStatsWindow(BaseWindow):
 		"""Update the misc stats window with new data"""
 		if self.latestData is None:
 			return
-		(svgStr, desiredWidth, desiredHeight) = generateStats(
-			self.latestData, self.customPalette, self.svgFont, self.config
-		)
-
+		data = self.latestData
+		palette = self.customPalette
+		font = self.svgFont
+		config = replace(self.config)
+		self.renderer.submit(lambda: generateStats(data, palette, font, config))
+
+	def showStats(self, stats: tuple[str, int, int]):
+		"""Show newly generated stats, scaled to fit the window"""
+		(svgStr, desiredWidth, desiredHeight) = stats
 		if desiredWidth / self.svg.width() < desiredHeight / self.svg.height():
 			height = desiredHeight * self.svg.width() / desiredWidth
-			width = self.svg.width()
+			width: float = self.svg.width()
 		else:
 			width = desiredWidth * self.svg.height() / desiredHeight
 			height = self.svg.height()
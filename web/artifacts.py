@@ -0,0 +1,169 @@
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from gnss.changes import NEVER_DRAWN
+from gnss.nmea import ADSBSnapshot, GnssSnapshot
+
+METRICS_INTERVAL = 5.0
+"""Minimum seconds between writes of the artifact metrics"""
+
+
+@dataclass
+class ArtifactStats:
+	"""How long an artifact takes to write, and how often that goes wrong"""
+
+	writes: int = 0
+	"""Successful writes, with the timings below only covering these"""
+	overruns: int = 0
+	"""Writes that took longer than the minimum interval between writes of the artifact"""
+	errors: int = 0
+	"""Writes that failed"""
+	lastWriteTime: float = 0
+	maxWriteTime: float = 0
+
+	def recordWrite(self, writeTime: float, minInterval: float) -> bool:
+		"""Record a write that took the given seconds, returning whether it overran"""
+		self.writes += 1
+		self.lastWriteTime = writeTime
+		self.maxWriteTime = max(self.maxWriteTime, writeTime)
+		overran = writeTime > minInterval
+		if overran:
+			self.overruns += 1
+		return overran
+
+
+@dataclass
+class Artifact:
+	"""A generated output, rewritten when the data groups it depends on change (see ChangeTracker),
+	at most maxFps times a second
+	"""
+
+	name: str
+	write: Callable[[GnssSnapshot, ADSBSnapshot], None]
+	gnssGroups: tuple[str, ...]
+	adsbGroups: tuple[str, ...] = ()
+	maxFps: float = 1.0
+	drawnVersion: int = NEVER_DRAWN
+	lastWrittenAt: float = float("-inf")
+	stats: ArtifactStats = field(default_factory=ArtifactStats)
+
+	def isStale(self, gnssData: GnssSnapshot, adsbData: ADSBSnapshot) -> bool:
+		return gnssData.changes.changedSince(
+			self.drawnVersion, *self.gnssGroups
+		) or adsbData.changes.changedSince(self.drawnVersion, *self.adsbGroups)
+
+	def dueAt(self) -> float:
+		"""Monotonic time the artifact can next be written"""
+		return self.lastWrittenAt + 1 / self.maxFps
+
+	def writeLatest(self, gnssData: GnssSnapshot, adsbData: ADSBSnapshot):
+		"""Write the artifact, recording how long it took. A failed write is reported and retried
+		once the artifact is next due, rather than stopping every other artifact being written
+		"""
+		startTime = time.monotonic()
+		self.lastWrittenAt = startTime
+		try:
+			self.write(gnssData, adsbData)
+		except Exception as e:  # pylint: disable=broad-exception-caught
+			self.stats.errors += 1
+			print(f"Failed to write {self.name}: {e!r}")
+		else:
+			self.drawnVersion = max(gnssData.changes.version, adsbData.changes.version)
+			# failed writes are only counted as errors, so they don't skew the timings
+			writeTime = time.monotonic() - startTime
+			if self.stats.recordWrite(writeTime, 1 / self.maxFps):
+				print(
+					f"Writing {self.name} overran: took {writeTime:.3f}s, "
+					f"limit {1 / self.maxFps:.3f}s"
+				)
+
+
+class ArtifactWriter:
+	"""Writes artifacts from a single thread as the data they depend on changes, rather than
+	regenerating everything on a fixed timer. Also writes how long each artifact takes, at most once
+	every METRICS_INTERVAL seconds
+	"""
+
+	def __init__(
+		self,
+		artifacts: list[Artifact],
+		writeMetrics: Callable[[dict[str, Any]], None] | None = None,
+	):
+		self.artifacts = artifacts
+		self.writeMetrics = writeMetrics
+		self.metricsWrittenAt = float("-inf")
+		self.metricsStale = False
+
+		# swapped as a single reference, so each pass reads data from one epoch
+		self.latestData = (GnssSnapshot(), ADSBSnapshot())
+		self.dataChanged = threading.Event()
+
+	def publish(self, gnssData: GnssSnapshot, adsbData: ADSBSnapshot):
+		"""Hand over newer data, safe to call from any thread"""
+		self.latestData = (gnssData, adsbData)
+		self.dataChanged.set()
+
+	def run(self):
+		"""Write artifacts whenever new data is published, or a rate limited artifact becomes due"""
+		timeout: float | None = None
+		while True:
+			self.dataChanged.wait(timeout)
+			# cleared before reading the data, so data published during the pass wakes the next one
+			self.dataChanged.clear()
+			timeout = self.writeDue()
+
+	def writeDue(self) -> float | None:
+		"""Write every stale artifact that is due. Returns the seconds until the next stale artifact
+		is due, or None if none are stale
+		"""
+		(gnssData, adsbData) = self.latestData
+		nextDueAt = None
+		for artifact in self.artifacts:
+			dueAt = self.writeIfDue(artifact, gnssData, adsbData)
+			if dueAt is not None:
+				nextDueAt = dueAt if nextDueAt is None else min(nextDueAt, dueAt)
+
+		metricsDueAt = self.writeMetricsIfDue()
+		if metricsDueAt is not None:
+			nextDueAt = metricsDueAt if nextDueAt is None else min(nextDueAt, metricsDueAt)
+
+		if nextDueAt is None:
+			return None
+		# a slow pass can finish after the next artifact was due
+		return max(0.0, nextDueAt - time.monotonic())
+
+	def writeIfDue(
+		self, artifact: Artifact, gnssData: GnssSnapshot, adsbData: ADSBSnapshot
+	) -> float | None:
+		"""Write the artifact if it's stale and due. Returns when it's next due if it's still stale
+		afterwards, otherwise None
+		"""
+		if not artifact.isStale(gnssData, adsbData):
+			return None
+		if time.monotonic() >= artifact.dueAt():
+			artifact.writeLatest(gnssData, adsbData)
+			self.metricsStale = True
+			if not artifact.isStale(gnssData, adsbData):
+				return None
+		# either rate limited, or failed to write and will be retried
+		return artifact.dueAt()
+
+	def writeMetricsIfDue(self) -> float | None:
+		"""Write the metrics if they've changed and are due, otherwise return when they're next due
+		(None if they haven't changed)
+		"""
+		if self.writeMetrics is None or not self.metricsStale:
+			return None
+		dueAt = self.metricsWrittenAt + METRICS_INTERVAL
+		if time.monotonic() < dueAt:
+			return dueAt
+		self.metricsWrittenAt = time.monotonic()
+		self.metricsStale = False
+		self.writeMetrics(self.metrics())
+		return None
+
+	def metrics(self) -> dict[str, Any]:
+		return {artifact.name: asdict(artifact.stats) for artifact in self.artifacts}
@@ -0,0 +1,9 @@
+// Content-hashed URLs of static files, listed in the page by the server
+const assetUrls: Record<string, string> = JSON.parse(
+	document.getElementById("assetUrls")?.textContent ?? "{}"
+);
+
+// URL to fetch a static file from, which can be cached forever if it's hashed
+export function assetUrl(name: string) {
+	return assetUrls[name] ?? `/${name}`;
+}
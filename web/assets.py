@@ -0,0 +1,65 @@
+import json
+import os
+
+from web.compression import STATIC_BROTLI_QUALITY, isCompressible, supportedEncodings
+from web.store import GENERATED_DIR, StoredArtifact, storedArtifact
+
+WEB_DIR = os.path.dirname(__file__)
+
+HASHED_ASSET_PATHS = {
+	"script.js": os.path.join(WEB_DIR, "..", "dist", "script.js"),
+	"style.css": os.path.join(WEB_DIR, "style.css"),
+	"continents.geojson": os.path.join(GENERATED_DIR, "continents.geojson"),
+	"borders.geojson": os.path.join(GENERATED_DIR, "borders.geojson"),
+}
+"""Files that don't change while the server is running, by the name they're requested by"""
+
+
+class StaticAssets:
+	"""Files read and compressed once at startup, and served from URLs including a hash of their
+	content, so clients can cache them forever and only fetch them again once they've changed
+	"""
+
+	def __init__(self, paths: dict[str, str]):
+		self.byName: dict[str, StoredArtifact] = {}
+		self.byHashedName: dict[str, StoredArtifact] = {}
+		self.urls: dict[str, str] = {}
+
+		for name, path in paths.items():
+			if not os.path.exists(path):
+				print(f"Not serving {name}, as {path} hasn't been built")
+				continue
+			with open(path, "rb") as f:
+				artifact = storedArtifact(name, f.read(), brotliQuality=STATIC_BROTLI_QUALITY)
+			precompress(artifact)
+
+			(stem, extension) = os.path.splitext(name)
+			hashedName = f"{stem}.{artifact.etag[:12]}{extension}"
+			self.byName[name] = artifact
+			self.byHashedName[hashedName] = artifact
+			self.urls[name] = f"/assets/{hashedName}"
+
+	def url(self, name: str) -> str:
+		"""Hashed URL of the asset, or its plain URL if it isn't being served"""
+		return self.urls.get(name, f"/{name}")
+
+	def renderIndex(self, indexHtml: str) -> StoredArtifact:
+		"""Point the page at the hashed URLs, and list them for the script to fetch assets from"""
+		for name in self.urls:
+			indexHtml = indexHtml.replace(f'"/{name}"', f'"{self.url(name)}"')
+		# escaped so nothing in the JSON can close the script tag
+		assetUrls = json.dumps(self.urls).replace("</", "<\\/")
+		indexHtml = indexHtml.replace(
+			"</head>",
+			f'\t<script type="application/json" id="assetUrls">{assetUrls}</script>\n</head>',
+		)
+		index = storedArtifact("index.html", indexHtml.encode())
+		precompress(index)
+		return index
+
+
+def precompress(artifact: StoredArtifact):
+	"""Compress the artifact with every supported encoding now, rather than on first request"""
+	if isCompressible(artifact.mimetype, len(artifact.content)):
+		for encoding in supportedEncodings():
+			artifact.encoded(encoding)
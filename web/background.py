@@ -1,24 +1,27 @@
 import json
-import os
 import statistics
 import threading
-import time
-from datetime import datetime
+from collections.abc import Callable
+from typing import Any
 
 from dotenv import load_dotenv
 
 from font.fetch import fetchFontRomsIfNeeded
-from font.hp1345Font import Font
-from gnss.nmea import ADSBData
+from font.hp1345Font import getFont
+from gnss.changes import DOP, FLIGHTS, POSITION, SATELLITES
+from gnss.nmea import ADSBSnapshot, GnssSnapshot
 from misc.config import MapConfig, MiscStatsConfig, SignalChartConfig, loadConfig
-from misc.mqtt import GnssData, createMqttSubscriber
+from misc.mqtt import createMqttSubscriber
 from palettes.palette import loadPalette
-from views.map.generate import getMapSize, prepareInitialMap, readBaseMap
-from views.map.update import focusOnPoint, genSatelliteMapGroup
+from views.map.generate import getMapSize, getPreparedMap
+from views.map.update import focusOnPoint, genSnapshotMapGroup
 from views.polarGrid.generate import prepareIntialPolarGrid, readBasePolarGrid
 from views.polarGrid.update import addSatellitesToPolarGrid
 from views.signalGraph.generate import generateBarChart
 from views.stats.generate import generateStats
+from web.artifacts import Artifact, ArtifactWriter
+from web.gnssFeed import DELTAS_FILE, FULL_FILE, GnssFeed
+from web.store import generatedFiles
 
 mapConfig = MapConfig()
 chartConfig = SignalChartConfig()
@@ -27,116 +30,104 @@ mistStatsConfig = MiscStatsConfig()
 load_dotenv()
 CONFIG = loadConfig()
 PALETTE = loadPalette(CONFIG.paletteName)
-FONT = Font()
+FONT = getFont()
 
-baseMap = readBaseMap()
-baseMap, keySize = prepareInitialMap(baseMap, PALETTE, mapConfig)
+mapTemplate, keySize = getPreparedMap(PALETTE, mapConfig)
 
 basePolarGrid = readBasePolarGrid()
 basePolarGrid = prepareIntialPolarGrid(basePolarGrid, PALETTE)
 
-# ruff: noqa: PLW0603
-GNSS_DATA = GnssData()
-ADSB_DATA = ADSBData()
+gnssFeed = GnssFeed(PALETTE)
 
 
-def updateMap():
+def updateMap(gnssData: GnssSnapshot, adsbData: ADSBSnapshot):
 	"""Generate and write the latest map"""
-	satelliteGroup = genSatelliteMapGroup(
-		mapConfig,
-		PALETTE,
-		GNSS_DATA.satellites,
-		ADSB_DATA.flights,
-		GNSS_DATA.latitude,
-		GNSS_DATA.longitude,
-		GNSS_DATA.date,
-	)
-	latestMap = baseMap.replace("<!-- satellites go here -->", satelliteGroup)
+	satelliteGroup = genSnapshotMapGroup(mapConfig, PALETTE, gnssData, adsbData)
 	mapSize = getMapSize()
-	latestMap = focusOnPoint(latestMap, mapConfig, mapSize, keySize)
-	with open("./web/generated/map.svg", "w", encoding="utf-8") as f:
-		f.write(latestMap)
+	latestMap = focusOnPoint(mapTemplate, satelliteGroup.encode(), mapConfig, mapSize, keySize)
+	generatedFiles.put("map.svg", b"".join(latestMap))
 
 
-def updatePolarGrid():
-	polarGrid = addSatellitesToPolarGrid(basePolarGrid, PALETTE, GNSS_DATA.satellites)
-	with open("./web/generated/polarGrid.svg", "w", encoding="utf-8") as f:
-		f.write(polarGrid)
+def updatePolarGrid(gnssData: GnssSnapshot, _adsbData: ADSBSnapshot):
+	polarGrid = addSatellitesToPolarGrid(basePolarGrid, PALETTE, gnssData.satellites)
+	generatedFiles.put("polarGrid.svg", polarGrid.encode())
 
 
-def updateStats():
-	(statsSvg, _, _) = generateStats(GNSS_DATA, PALETTE, FONT, mistStatsConfig)
-	with open("./web/generated/stats.svg", "w", encoding="utf-8") as f:
-		f.write(statsSvg)
+def updateStats(gnssData: GnssSnapshot, _adsbData: ADSBSnapshot):
+	(statsSvg, _, _) = generateStats(gnssData, PALETTE, FONT, mistStatsConfig)
+	generatedFiles.put("stats.svg", statsSvg.encode())
 
 
-def updateChart():
-	snrChart = generateBarChart(chartConfig, PALETTE, FONT, GNSS_DATA.satellites, 854, 480)
-	with open("./web/generated/snrChart.svg", "w", encoding="utf-8") as f:
-		f.write(snrChart)
+def updateChart(gnssData: GnssSnapshot, _adsbData: ADSBSnapshot):
+	snrChart = generateBarChart(chartConfig, PALETTE, FONT, gnssData.satellites, 854, 480)
+	generatedFiles.put("snrChart.svg", snrChart.encode())
 
 
-def updateData():
-	with open("./web/generated/gnssData.json", "w", encoding="utf-8") as f:
-		f.write(json.dumps(GNSS_DATA.toJSON(PALETTE)))
+def updateData(gnssData: GnssSnapshot, _adsbData: ADSBSnapshot):
+	(fullData, deltas) = gnssFeed.publish(gnssData)
+	# deltas first, so they're never older than the full data clients are told has changed
+	generatedFiles.put(DELTAS_FILE, deltas)
+	generatedFiles.put(FULL_FILE, fullData)
 
 
-def updateWoprData():
+def updateWoprData(gnssData: GnssSnapshot, _adsbData: ADSBSnapshot):
 	"""Generate and write data for the WOPR endpoint"""
+	snrs = [satellite.snr for satellite in gnssData.satellites]
 	woprData = {
-		"latitude": GNSS_DATA.latitude,
-		"longitude": GNSS_DATA.longitude,
-		"altitude": GNSS_DATA.altitude,
-		"pdop": GNSS_DATA.pdop,
-		"avgSnr": statistics.mean([satellite.snr for satellite in GNSS_DATA.satellites]),
+		"latitude": gnssData.latitude,
+		"longitude": gnssData.longitude,
+		"altitude": gnssData.altitude,
+		"pdop": gnssData.pdop,
+		"avgSnr": statistics.mean(snrs) if snrs else 0,
 	}
-
-	with open("./web/generated/wopr.json", "w", encoding="utf-8") as f:
-		f.write(json.dumps(woprData))
-
-
-def updateSVGsThread():
-	"""Update the SVGs in the background once per second"""
-	while True:
-		startTime = datetime.now()
-		updateMap()
-		updatePolarGrid()
-		updateStats()
-		updateChart()
-		updateData()
-		updateWoprData()
-		endTime = datetime.now()
-
-		# sleep for the rest of the second
-		timeToSleep = 1 - (endTime - startTime).total_seconds()
-		time.sleep(timeToSleep)
+	generatedFiles.put("wopr.json", json.dumps(woprData).encode())
+
+
+def writeMetrics(metrics: dict[str, Any]):
+	generatedFiles.put("metrics.json", json.dumps(metrics).encode())
+
+
+def createArtifactWriter() -> ArtifactWriter:
+	"""Create the writer for every generated file, rate limited as configured"""
+
+	def artifact(
+		name: str,
+		write: Callable[[GnssSnapshot, ADSBSnapshot], None],
+		gnssGroups: tuple[str, ...],
+		adsbGroups: tuple[str, ...] = (),
+	):
+		maxFps = CONFIG.web.artifactMaxFps.get(name, CONFIG.web.maxFps)
+		return Artifact(name, write, gnssGroups, adsbGroups, maxFps)
+
+	return ArtifactWriter(
+		[
+			artifact("map", updateMap, (POSITION, SATELLITES), (FLIGHTS,)),
+			artifact("polarGrid", updatePolarGrid, (SATELLITES,)),
+			artifact("stats", updateStats, (POSITION, DOP, SATELLITES)),
+			artifact("snrChart", updateChart, (SATELLITES,)),
+			artifact("gnssData", updateData, (POSITION, DOP, SATELLITES)),
+			artifact("wopr", updateWoprData, (POSITION, DOP, SATELLITES)),
+		],
+		writeMetrics,
+	)
 
 
-def genOnNewDataCallback():
-	"""Generate a function to update the global GNSS and ADS-B data"""
+def startGenerator(daemon: bool = False) -> threading.Thread:
+	"""Start writing the generated files in the background, as the data they depend on changes"""
+	fetchFontRomsIfNeeded()
+	writer = createArtifactWriter()
+	createMqttSubscriber(CONFIG, writer.publish)
 
-	def onNewData(_: bytes, gnssData: GnssData, adsbData: ADSBData):
-		global GNSS_DATA  # pylint: disable=global-statement
-		global ADSB_DATA  # pylint: disable=global-statement
-		ADSB_DATA = adsbData
-		GNSS_DATA = gnssData
+	generatedFiles.put("palette.json", json.dumps(PALETTE.__dict__).encode())
 
-	return onNewData
+	thread = threading.Thread(target=writer.run, daemon=daemon)
+	thread.start()
+	return thread
 
 
 def main():
-	"""Update the generated SVGs/JSON files for the web app"""
-	fetchFontRomsIfNeeded()
-	createMqttSubscriber(CONFIG, genOnNewDataCallback())
-
-	if not os.path.exists("./web/generated"):
-		os.makedirs("./web/generated")
-
-	with open("./web/generated/palette.json", "w", encoding="utf-8") as f:
-		f.write(json.dumps(PALETTE.__dict__))
-
-	thread = threading.Thread(target=updateSVGsThread)
-	thread.start()
+	"""Update the generated SVGs/JSON files for a web server running in another process"""
+	startGenerator()
 
 
 if __name__ == "__main__":
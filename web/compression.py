@@ -0,0 +1,43 @@
+import gzip
+
+try:
+	import brotli
+except ImportError:  # optional, responses are only gzipped without it
+	brotli = None
+
+MIN_COMPRESSED_SIZE = 1024
+"""Smaller responses are sent as is, as compressing them saves little"""
+COMPRESSIBLE_TYPES = (
+	"text/",
+	"image/svg+xml",
+	"application/json",
+	"application/geo+json",
+	"application/javascript",
+)
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+"""Quality for files compressed while running, as the highest qualities are much slower"""
+STATIC_BROTLI_QUALITY = 11
+"""Quality for files compressed once at startup"""
+
+
+def supportedEncodings() -> list[str]:
+	"""Encodings responses can be compressed with, most preferred first"""
+	return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def isCompressible(mimetype: str, size: int) -> bool:
+	return size >= MIN_COMPRESSED_SIZE and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(content: bytes, encoding: str, brotliQuality: int = BROTLI_QUALITY) -> bytes:
+	"""Compress the content with the given encoding, one of supportedEncodings()"""
+	if encoding == "br" and brotli is not None:
+		compressed: bytes = brotli.compress(content, quality=brotliQuality)
+		return compressed
+	if encoding == "gzip":
+		# mtime fixed so the same content always compresses to the same bytes
+		return gzip.compress(content, GZIP_LEVEL, mtime=0)
+	msg = f"Unsupported encoding {encoding}"
+	raise ValueError(msg)
@@ -1,6 +1,7 @@
-import { type Satellite } from "./satellite.ts";
+import { type Satellite, type TrailPoint } from "./satellite.ts";
 
 export type GnssData = {
+	version: number;
 	satellites: Satellite[];
 	latitude: number;
 	longitude: number;
@@ -15,4 +16,30 @@ export type GnssData = {
 	vdop: number;
 	interference: number;
 	fixQuality: number;
+	// when each network's latest GSV cycle was received, in epoch seconds
+	lastSeen: Record<string, number>;
+};
+
+// Sent by the server whenever the GNSS data or a panel changes
+export type LiveUpdate = {
+	// Unix time the update was sent, in seconds
+	time: number;
+	// Version of each panel, by the name of its route
+	versions: Record<string, string>;
+	gnss: GnssUpdate | null;
+};
+
+// Either all the data (full), or only what's changed since an earlier version (since)
+export type GnssUpdate = Omit<GnssData, "satellites"> & {
+	full: boolean;
+	since?: number;
+	satellites: SatelliteUpdate[];
+	// network and PRN of each satellite no longer in view
+	removed?: [string, number][];
+};
+
+// A new or changed satellite, with either its whole trail, or the points added to it since
+export type SatelliteUpdate = Omit<Satellite, "trail"> & {
+	trail?: TrailPoint[];
+	newTrailPoints?: TrailPoint[];
 };
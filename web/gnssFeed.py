@@ -0,0 +1,84 @@
+import json
+from dataclasses import dataclass
+
+from gnss.nmea import GnssSnapshot
+from palettes.palette import Palette
+from web.store import ArtifactStore, StoredArtifact, storedArtifact
+
+FULL_FILE = "gnssData.json"
+DELTAS_FILE = "gnssDeltas.txt"
+"""One line per delta to the latest version, as the version it's from, a tab, then the delta"""
+DELTA_NAME = "gnssDelta.json"
+"""Name each delta is served as, so it has the same mimetype as the full data"""
+
+
+@dataclass
+class GnssFeed:
+	"""Serializes each published snapshot in full, along with the delta to it from the snapshot
+	published before it, so clients following every update are only sent what changed. Clients
+	further behind are sent everything, rather than keeping deltas from versions no client may have
+	"""
+
+	palette: Palette
+	previous: GnssSnapshot | None = None
+	latest: GnssSnapshot | None = None
+
+	def publish(self, gnssData: GnssSnapshot) -> tuple[bytes, bytes]:
+		"""Serialize the snapshot, returning the full data and the deltas to it from the previous
+		version and from itself (for clients that are already up to date)
+		"""
+		if self.latest is None or self.latest.changes.version != gnssData.changes.version:
+			self.previous = self.latest
+		self.latest = gnssData
+		deltas = b"".join(
+			b"%d\t%s\n"
+			% (older.changes.version, json.dumps(gnssData.deltaJSON(older, self.palette)).encode())
+			for older in (self.previous, gnssData)
+			if older is not None
+		)
+		return (json.dumps(gnssData.toJSON(self.palette)).encode(), deltas)
+
+
+class GnssDeltas:
+	"""Deltas from the generated deltas file, split by the version they're from once per change of
+	the file rather than per request. Each is held as an artifact, so it's only compressed once
+	however many clients are sent it
+	"""
+
+	def __init__(self, store: ArtifactStore):
+		self.store = store
+		# swapped as a single reference, as requests can read it from any thread
+		self.parsed: tuple[str, dict[int, StoredArtifact]] = ("", {})
+
+	def since(self, version: int) -> StoredArtifact | None:
+		"""Delta from the given version to the latest, or None if it's too old (or unknown)"""
+		return self.latestDeltas().get(version)
+
+	def latestStep(self) -> StoredArtifact | None:
+		"""Delta from the version before the latest, or None if there isn't one"""
+		deltas = list(self.latestDeltas().values())
+		# the last delta is from the latest version to itself
+		return deltas[-2] if len(deltas) > 1 else None
+
+	def latestDeltas(self) -> dict[int, StoredArtifact]:
+		"""Deltas by the version they're from, parsed again only when the file has changed"""
+		artifact = self.store.get(DELTAS_FILE)
+		if artifact is None:
+			return {}
+		(etag, deltas) = self.parsed
+		if etag != artifact.etag:
+			deltas = {
+				since: storedArtifact(DELTA_NAME, delta, artifact.version)
+				for (since, delta) in parseDeltas(artifact.content).items()
+			}
+			self.parsed = (artifact.etag, deltas)
+		return deltas
+
+
+def parseDeltas(content: bytes) -> dict[int, bytes]:
+	"""Deltas by the version they're from, oldest first"""
+	deltas = {}
+	for line in content.splitlines():
+		(version, delta) = line.split(b"\t", 1)
+		deltas[int(version)] = delta
+	return deltas
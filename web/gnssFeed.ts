@@ -0,0 +1,58 @@
+import { type GnssData, type GnssUpdate } from "./gnssData.ts";
+import { type Satellite } from "./satellite.ts";
+
+// degrees the earth rotates per second (sidereal)
+const ROTATION_PER_SECOND = 360.985647 / (24 * 60 * 60);
+
+// Rotate a longitude measured at measuredTime by how far the earth has turned since currentTime
+// (both in epoch seconds)
+export function rotateLongByTime(long: number, measuredTime: number, currentTime: number) {
+	return long - (currentTime - measuredTime) * ROTATION_PER_SECOND;
+}
+
+export function currentLatLong(satellite: Satellite, gnssData: GnssData): [number, number] {
+	const currentTime = Date.parse(gnssData.date) / 1000;
+	const lastSeen = satelliteLastSeen(satellite, gnssData);
+	return [satellite.lat, rotateLongByTime(satellite.long, lastSeen, currentTime)];
+}
+
+// Satellites seen in their network's latest GSV cycle aren't sent again just because it moved on,
+// so take when they were seen from the cycle
+export function satelliteLastSeen(satellite: Satellite, gnssData: GnssData) {
+	return satellite.lastSeen ?? gnssData.lastSeen[satellite.network];
+}
+
+// Apply an update to the data the client already has, returning undefined if the update is from
+// a version the client doesn't have
+export function applyGnssUpdate(
+	gnssData: GnssData | undefined,
+	gnssUpdate: GnssUpdate
+): GnssData | undefined {
+	const { full, since, removed, satellites: satelliteUpdates, ...fields } = gnssUpdate;
+	if (!full && (gnssData === undefined || since !== gnssData.version)) return undefined;
+
+	const satellites = new Map<string, Satellite>();
+	if (!full) {
+		for (const satellite of gnssData!.satellites) {
+			satellites.set(satelliteKey(satellite.network, satellite.prnNumber), satellite);
+		}
+	}
+	for (const [network, prnNumber] of removed ?? []) {
+		satellites.delete(satelliteKey(network, prnNumber));
+	}
+
+	for (const { trail, newTrailPoints, ...satellite } of satelliteUpdates) {
+		const key = satelliteKey(satellite.network, satellite.prnNumber);
+		const previousTrail = satellites.get(key)?.trail ?? [];
+		satellites.set(key, {
+			...satellite,
+			trail: trail ?? previousTrail.concat(newTrailPoints ?? []),
+		});
+	}
+
+	return { ...fields, satellites: [...satellites.values()] };
+}
+
+function satelliteKey(network: string, prnNumber: number) {
+	return `${network}-${prnNumber}`;
+}
@@ -3,6 +3,7 @@ import { OrbitControls } from "three/examples/jsm/Addons.js";
 import { type LineMaterialParameters } from "three/addons/lines/LineMaterial.js";
 import { type Palette } from "./palette.ts";
 import { drawGeoJSON } from "./geoJSON.ts";
+import { assetUrl } from "./assetUrls.ts";
 
 export function createCamera() {
 	const fov = 30;
@@ -37,8 +38,10 @@ export function createEarth(scene: THREE.Scene, palette: Palette) {
 	geojsonContainer.rotateX((-90 * Math.PI) / 180);
 	scene.add(geojsonContainer);
 
-	loadGeojson("/continents.geojson", geojsonContainer, { color: palette.continentsBorder });
-	// loadGeojson("/borders.geojson", geojsonContainer, { color: palette.admin0Border });
+	loadGeojson(assetUrl("continents.geojson"), geojsonContainer, {
+		color: palette.continentsBorder,
+	});
+	// loadGeojson(assetUrl("borders.geojson"), geojsonContainer, { color: palette.admin0Border });
 }
 
 async function loadGeojson(
@@ -0,0 +1,48 @@
+import bisect
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+"""Upper bound of each histogram bucket, in seconds, with one more bucket for anything slower"""
+
+
+@dataclass
+class LatencyHistogram:
+	"""Number of requests taking up to each bucket's time"""
+
+	counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+	totalTime: float = 0
+	maxTime: float = 0
+
+	def record(self, seconds: float):
+		self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+		self.totalTime += seconds
+		self.maxTime = max(self.maxTime, seconds)
+
+	def toJSON(self) -> dict[str, Any]:
+		"""Counts by the upper bound of their bucket in ms, along with the count, mean, and max"""
+		count = sum(self.counts)
+		bounds = [f"{bound * 1000:g}" for bound in LATENCY_BUCKETS] + ["+Inf"]
+		return {
+			"count": count,
+			"meanMs": self.totalTime / count * 1000 if count else 0,
+			"maxMs": self.maxTime * 1000,
+			"buckets": dict(zip(bounds, self.counts, strict=True)),
+		}
+
+
+class RequestLatencies:
+	"""Latency histogram for each route, safe to record to from any request thread"""
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.histograms: dict[str, LatencyHistogram] = {}
+
+	def record(self, route: str, seconds: float):
+		with self.lock:
+			self.histograms.setdefault(route, LatencyHistogram()).record(seconds)
+
+	def toJSON(self) -> dict[str, Any]:
+		with self.lock:
+			return {route: histogram.toJSON() for route, histogram in self.histograms.items()}
@@ -0,0 +1,153 @@
+import json
+import math
+import threading
+import time
+from collections.abc import Iterator
+
+from web.gnssFeed import FULL_FILE, GnssDeltas
+from web.store import ArtifactStore
+
+KEEPALIVE_INTERVAL = 15.0
+"""Seconds without an update before a comment is sent, so idle connections aren't closed"""
+WATCH_INTERVAL = 0.2
+"""Seconds between checks of the generated files for changes, when written by another process"""
+
+PANEL_FILES = {
+	"map": "map.svg",
+	"polarGrid": "polarGrid.svg",
+	"stats": "stats.svg",
+	"snr-chart": "snrChart.svg",
+}
+"""Generated file for each panel the web client can show, by the name the client uses"""
+WATCHED_FILES = frozenset((*PANEL_FILES.values(), FULL_FILE))
+
+
+class LiveUpdates:
+	"""Pushes the generated files to connected clients as server-sent events.
+
+	Each update is serialized once, and the same bytes are sent to every subscriber. A subscriber
+	that falls behind skips straight to the latest update, rather than being sent every update it
+	missed.
+
+	Updates are published as soon as the files are stored, when generated in this process.
+	Otherwise the files are checked for changes on disk once there are subscribers.
+
+	Each subscriber holds a server thread for as long as it's connected, so at most maxSubscribers
+	are accepted, leaving threads free for other requests
+	"""
+
+	def __init__(
+		self, store: ArtifactStore, gnssDeltas: GnssDeltas, maxSubscribers: float = math.inf
+	):
+		self.store = store
+		self.gnssDeltas = gnssDeltas
+		self.maxSubscribers = maxSubscribers
+		self.condition = threading.Condition()
+		self.version = 0
+		self.event = b""
+		self.subscribers = 0
+
+		self.watchLock = threading.Lock()
+		self.watchThread: threading.Thread | None = None
+		self.publishLock = threading.Lock()
+		self.lastEtags: dict[str, str] = {}
+		store.addListener(self.onStored)
+
+	def publish(self, data: bytes):
+		"""Send the data to every subscriber, safe to call from any thread"""
+		# each line of the data needs its own field, though JSON from json.dumps is a single line
+		event = b"event: update\ndata: " + data.replace(b"\n", b"\ndata: ") + b"\n\n"
+		with self.condition:
+			self.version += 1
+			self.event = event
+			self.condition.notify_all()
+
+	def waitForUpdate(self, lastVersion: int, timeout: float) -> tuple[int, bytes] | None:
+		"""The latest update if newer than lastVersion, waiting up to timeout seconds for one"""
+		with self.condition:
+			if not self.condition.wait_for(lambda: self.version > lastVersion, timeout):
+				return None
+			return (self.version, self.event)
+
+	def subscribe(self) -> bool:
+		"""Take a place for a new subscriber, returning False if there are already maxSubscribers.
+		Each place taken must be given back with unsubscribe once the subscriber's stream is closed
+		"""
+		with self.condition:
+			if self.subscribers >= self.maxSubscribers:
+				return False
+			self.subscribers += 1
+		self.startWatching()
+		return True
+
+	def unsubscribe(self):
+		with self.condition:
+			self.subscribers -= 1
+
+	def events(self) -> Iterator[bytes]:
+		"""Events for one subscriber: the latest update straight away, then each newer update, with
+		keepalives while there are none
+		"""
+		lastVersion = 0
+		while True:
+			update = self.waitForUpdate(lastVersion, KEEPALIVE_INTERVAL)
+			if update is None:
+				yield b": keepalive\n\n"
+				continue
+			(lastVersion, event) = update
+			yield event
+
+	def startWatching(self):
+		"""Start watching the generated files in the background, if not already"""
+		with self.watchLock:
+			if self.watchThread is None:
+				self.watchThread = threading.Thread(target=self.watch, daemon=True)
+				self.watchThread.start()
+
+	def watch(self):
+		"""Publish an update whenever the files change on disk, for when they're generated by a
+		separate process. Stops once a file is stored in this process, as onStored takes over
+		"""
+		while not self.store.published:
+			self.publishIfChanged()
+			time.sleep(WATCH_INTERVAL)
+
+	def onStored(self, fileName: str):
+		"""Publish an update straight away when a file clients are sent updates of is stored"""
+		if fileName in WATCHED_FILES:
+			self.publishIfChanged()
+
+	def publishIfChanged(self):
+		"""Publish an update if the GNSS data or a panel changed since the last update"""
+		with self.publishLock:
+			etags = self.currentEtags()
+			if etags == self.lastEtags:
+				return
+			self.lastEtags = etags
+			self.publish(self.serializeUpdate(etags))
+
+	def currentEtags(self) -> dict[str, str]:
+		"""ETag of each file clients are sent updates of that has been generated"""
+		etags = {}
+		for name in WATCHED_FILES:
+			artifact = self.store.get(name)
+			if artifact is not None:
+				etags[name] = artifact.etag
+		return etags
+
+	def serializeUpdate(self, etags: dict[str, str]) -> bytes:
+		"""The change to the GNSS data since its previous version, along with the version of each
+		panel so clients only fetch a panel they're showing when it changes. A client that doesn't
+		have the previous version fetches a delta from the version it does have
+		"""
+		versions = {
+			panel: etags[fileName] for panel, fileName in PANEL_FILES.items() if fileName in etags
+		}
+		gnssArtifact = self.gnssDeltas.latestStep() or self.store.get(FULL_FILE)
+		gnssData = gnssArtifact.content if gnssArtifact is not None else b"null"
+		# the GNSS data is already JSON, so is included as is rather than parsed and serialized
+		return b'{"time":%f,"versions":%s,"gnss":%s}' % (
+			time.time(),
+			json.dumps(versions).encode(),
+			gnssData,
+		)
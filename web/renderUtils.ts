@@ -3,19 +3,21 @@ import { Line2 } from "three/addons/lines/Line2.js";
 import { LineMaterial } from "three/addons/lines/LineMaterial.js";
 import { LineGeometry } from "three/addons/lines/LineGeometry.js";
 import { latLongToXyz } from "./geoJSON.ts";
-import { type Satellite } from "./satellite.ts";
+import { rotateLongByTime } from "./gnssFeed.ts";
+import { type Satellite, type TrailPoint } from "./satellite.ts";
 
-export function genSatelliteTrail(satellite: Satellite, currentTime: number) {
+// lastSeen and currentTime in epoch seconds
+export function genSatelliteTrail(satellite: Satellite, lastSeen: number, currentTime: number) {
 	const prevPosPoints: number[][] = [];
 	const lines: Line2[] = [];
+	const positions: TrailPoint[] = [...satellite.trail, [lastSeen, satellite.lat, satellite.long]];
 
-	for (let index = 0; index < satellite.previousPositions.length; index++) {
-		let position = satellite.previousPositions[index];
-		const measureTime = Date.parse(position[0] as string);
-		const timeSinceMeasurementHours = (currentTime - measureTime) / 1000 / 60 / 60;
+	for (let index = 0; index < positions.length; index++) {
+		const [measureTime, lat, measuredLong] = positions[index];
+		const timeSinceMeasurementHours = (currentTime - measureTime) / 60 / 60;
 
-		let latLong = position[1] as [number, number];
-		let [x, y, z] = latLongToXyz([latLong[1], latLong[0]], satellite.altitude / 6.371);
+		const long = rotateLongByTime(measuredLong, measureTime, currentTime);
+		let [x, y, z] = latLongToXyz([long, lat], satellite.altitude / 6.371);
 		y = -y;
 
 		let fadeStartTime = 0;
@@ -1,13 +1,18 @@
+// [epoch seconds, lat, long] of a previous position, with the long as measured, see rotateLongByTime
+export type TrailPoint = [number, number, number];
+
 export type Satellite = {
 	prnNumber: number;
 	network: string;
 	elevation: number;
 	azimuth: number;
 	snr: number;
-	lastSeen: Date;
+	// epoch seconds, only sent if not seen in its network's latest GSV cycle, see satelliteLastSeen
+	lastSeen?: number;
+	// as measured at lastSeen, see currentLatLong
 	lat: number;
 	long: number;
 	colour: string;
 	altitude: number;
-	previousPositions: [string, number[][]];
+	trail: TrailPoint[];
 };
@@ -1,6 +1,7 @@
 import { latLongToXyz } from "./geoJSON.ts";
 import { type Satellite } from "./satellite.ts";
 import { type GnssData } from "./gnssData.ts";
+import { currentLatLong, satelliteLastSeen } from "./gnssFeed.ts";
 
 export class SatelliteDisplay extends HTMLElement {
 	css = /*css*/ `
@@ -37,11 +38,14 @@ pre {
 			return;
 		}
 
-		let roundLat = Math.round(satellite.lat * 100000) / 100000;
-		let roundLong = Math.round(satellite.long * 100000) / 100000;
+		const [lat, long] = currentLatLong(satellite, gnssData);
+		let roundLat = Math.round(lat * 100000) / 100000;
+		let roundLong = Math.round(long * 100000) / 100000;
 
 		let distToSatellite = this.calcDistanceToSatellite(
 			satellite,
+			lat,
+			long,
 			gnssData.latitude,
 			gnssData.longitude,
 			gnssData.altitude
@@ -54,12 +58,19 @@ Network: ${satellite.network}
 Lat: ${roundLat}
 Long: ${roundLong}
 SNR: ${satellite.snr}
-Last update: ${satellite.lastSeen}`;
+Last update: ${new Date(satelliteLastSeen(satellite, gnssData) * 1000).toISOString()}`;
 	}
 
-	calcDistanceToSatellite(satellite: Satellite, lat: number, long: number, altitude: number) {
+	calcDistanceToSatellite(
+		satellite: Satellite,
+		satelliteLat: number,
+		satelliteLong: number,
+		lat: number,
+		long: number,
+		altitude: number
+	) {
 		let [x1, y1, z1] = latLongToXyz([lat, long], 6.371 + altitude / 1000);
-		let [x2, y2, z2] = latLongToXyz([satellite.lat, satellite.long], satellite.altitude);
+		let [x2, y2, z2] = latLongToXyz([satelliteLat, satelliteLong], satellite.altitude);
 		let dist = Math.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2 + (z1 - z2) ** 2);
 		dist = Math.round(dist * 100) / 100;
 		return dist;
@@ -10,7 +10,8 @@ import {
 	genSatellite,
 } from "./renderUtils.ts";
 import { type Satellite } from "./satellite.ts";
-import { type GnssData } from "./gnssData.ts";
+import { type GnssData, type GnssUpdate, type LiveUpdate } from "./gnssData.ts";
+import { applyGnssUpdate, currentLatLong, satelliteLastSeen } from "./gnssFeed.ts";
 
 const svgContainer = document.getElementById("svgContainer") as HTMLDivElement;
 const comboBox = document.getElementById("toDisplay") as HTMLSelectElement;
@@ -28,6 +29,7 @@ document.documentElement.style.setProperty("--foreground", palette.foreground);
 
 let selectedSatellite: Satellite | undefined = undefined;
 let latestGnssData: GnssData | undefined = undefined;
+let shownPanelVersion: string | undefined = undefined;
 
 const renderer = new THREE.WebGLRenderer({ antialias: true, canvas });
 renderer.setClearColor(palette.background);
@@ -100,11 +102,9 @@ function mouseUp(event: MouseEvent) {
 	}
 	satelliteDisplay.update(selectedSatellite, latestGnssData);
 
-	if (selectedSatellite) {
-		let [x, y, z] = latLongToXyz(
-			[selectedSatellite.long, selectedSatellite.lat],
-			selectedSatellite.altitude / 6.371
-		);
+	if (selectedSatellite && latestGnssData) {
+		const [lat, long] = currentLatLong(selectedSatellite, latestGnssData);
+		let [x, y, z] = latLongToXyz([long, lat], selectedSatellite.altitude / 6.371);
 		satellitesObject.add(genGroundLine(x, y, z, selectedSatellite));
 	}
 }
@@ -130,24 +130,49 @@ async function updateSvg() {
 }
 
 async function updateGlobe() {
+	if (latestGnssData) showGlobe(latestGnssData);
+	await fetchGnssUpdate();
+}
+
+// Fetch what has changed since the version the client has, or everything if it has nothing yet
+async function fetchGnssUpdate() {
+	const since = latestGnssData ? `?since=${latestGnssData.version}` : "";
+	const gnssUpdate = (await fetch(`/api/gnss${since}`).then((res) => res.json())) as GnssUpdate;
+	receiveGnssUpdate(gnssUpdate);
+}
+
+function receiveGnssUpdate(gnssUpdate: GnssUpdate) {
+	const gnssData = applyGnssUpdate(latestGnssData, gnssUpdate);
+	if (!gnssData) {
+		// missed the version this update is from (or the server restarted), so the server either
+		// sends what changed since the version the client has, or everything
+		fetchGnssUpdate();
+		return;
+	}
+	if (gnssData.version === latestGnssData?.version) return;
+	latestGnssData = gnssData;
+	if (comboBox.value === "globe") showGlobe(gnssData);
+}
+
+function showGlobe(gnssData: GnssData) {
 	svgContainer.innerHTML = "";
 	canvasContainer.style.display = "block";
 	satelliteDisplay.style.display = "block";
 	svgContainer.style.display = "none";
 
-	let gnssData = (await fetch("/api/gnss").then((res) => res.json())) as GnssData;
-	latestGnssData = gnssData;
 	selectedSatellite = findUpdatedSelectedSatellite(gnssData, selectedSatellite);
-	satelliteDisplay.update(selectedSatellite, latestGnssData);
+	satelliteDisplay.update(selectedSatellite, gnssData);
 	satellitesObject.clear();
 
-	const currentTime = Date.parse(gnssData.date);
+	const currentTime = Date.parse(gnssData.date) / 1000;
 	for (let satellite of gnssData.satellites) {
-		let [x, y, z] = latLongToXyz([satellite.long, satellite.lat], satellite.altitude / 6.371);
+		const [lat, long] = currentLatLong(satellite, gnssData);
+		let [x, y, z] = latLongToXyz([long, lat], satellite.altitude / 6.371);
 		y = -y;
 		satellitesObject.add(genSatellite(x, y, z, satellite));
 		satellitesObject.add(genSatelliteSelector(x, y, z, satellite));
-		satellitesObject.add(...genSatelliteTrail(satellite, currentTime));
+		const lastSeen = satelliteLastSeen(satellite, gnssData);
+		satellitesObject.add(...genSatelliteTrail(satellite, lastSeen, currentTime));
 
 		if (
 			satellite.prnNumber === selectedSatellite?.prnNumber &&
@@ -170,9 +195,42 @@ function findUpdatedSelectedSatellite(
 	);
 }
 
-update();
-setInterval(async () => update(), 1000);
-comboBox.addEventListener("change", async () => update());
+// Show the pushed data, only fetching the shown panel if it has changed
+function onLiveUpdate(liveUpdate: LiveUpdate) {
+	if (liveUpdate.gnss) receiveGnssUpdate(liveUpdate.gnss);
+
+	const toDisplay = comboBox.value;
+	if (toDisplay !== "globe" && liveUpdate.versions[toDisplay] !== shownPanelVersion) {
+		shownPanelVersion = liveUpdate.versions[toDisplay];
+		updateSvg();
+	}
+}
+
+// Receive updates as they're generated, or poll every second if the server can't push them
+function listenForUpdates() {
+	if (!window.EventSource) {
+		pollForUpdates();
+		return;
+	}
+
+	const events = new EventSource("/api/stream");
+	events.addEventListener("update", (event) => onLiveUpdate(JSON.parse(event.data)));
+	events.addEventListener("error", () => {
+		// reconnects by itself after a dropped connection, but gives up if the server rejects it
+		if (events.readyState === EventSource.CLOSED) pollForUpdates();
+	});
+}
+
+function pollForUpdates() {
+	update();
+	setInterval(async () => update(), 1000);
+}
+
+listenForUpdates();
+comboBox.addEventListener("change", async () => {
+	shownPanelVersion = undefined;
+	update();
+});
 
 resizeCanvasToDisplaySize(canvas, renderer, camera);
 window.addEventListener("resize", () => resizeCanvasToDisplaySize(canvas, renderer, camera));
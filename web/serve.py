@@ -1,21 +1,96 @@
-from flask import Flask, send_file
+import json
+import os
+import time
+
+from flask import Flask, Response, abort, g, request, send_file
+
+from web.assets import HASHED_ASSET_PATHS, WEB_DIR, StaticAssets
+from web.compression import isCompressible, supportedEncodings
+from web.gnssFeed import FULL_FILE, GnssDeltas
+from web.latency import RequestLatencies
+from web.live import LiveUpdates
+from web.store import StoredArtifact, generatedFiles
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
 
 app = Flask(__name__)
+gnssDeltas = GnssDeltas(generatedFiles)
+liveUpdates = LiveUpdates(generatedFiles, gnssDeltas)
+requestLatencies = RequestLatencies()
+
+staticAssets = StaticAssets(HASHED_ASSET_PATHS)
+with open(os.path.join(WEB_DIR, "index.html"), encoding="utf-8") as indexFile:
+	index = staticAssets.renderIndex(indexFile.read())
+
+
+@app.before_request
+def startTimingRequest():
+	g.requestStartTime = time.monotonic()
+
+
+@app.after_request
+def recordRequestLatency(response: Response) -> Response:
+	"""Record how long the request took to handle, or for streams, how long until streaming began"""
+	route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+	requestLatencies.record(route, time.monotonic() - g.requestStartTime)
+	return response
+
+
+def artifactResponse(artifact: StoredArtifact | None, immutable: bool = False) -> Response:
+	"""Serve the artifact, compressed if the client accepts it, or 304 if the client already has it.
+	Immutable artifacts can be kept forever, otherwise clients must check theirs is the latest
+	"""
+	if artifact is None:
+		abort(404)
+
+	content = artifact.content
+	etag = artifact.etag
+	encoding = None
+	if isCompressible(artifact.mimetype, len(content)):
+		encoding = request.accept_encodings.best_match(supportedEncodings())
+	if encoding is not None:
+		content = artifact.encoded(encoding)
+		# each encoding is a different representation, so needs its own strong ETag
+		etag = f"{etag}-{encoding}"
+
+	response = Response(content, mimetype=artifact.mimetype)
+	if encoding is not None:
+		response.content_encoding = encoding
+	response.vary.add("Accept-Encoding")
+	response.set_etag(etag)
+	if immutable:
+		response.cache_control.public = True
+		response.cache_control.max_age = IMMUTABLE_MAX_AGE
+		response.cache_control.immutable = True
+	else:
+		response.cache_control.no_cache = True
+	response.make_conditional(request)
+	return response
+
+
+def generatedResponse(fileName: str) -> Response:
+	"""Serve the latest complete version of a generated file"""
+	return artifactResponse(generatedFiles.get(fileName))
 
 
 @app.route("/")
 def indexRoute():
-	return send_file("index.html")
+	return artifactResponse(index)
+
+
+@app.route("/assets/<hashedName>")
+def hashedAssetRoute(hashedName: str):
+	return artifactResponse(staticAssets.byHashedName.get(hashedName), immutable=True)
 
 
 @app.route("/style.css")
 def styleRoute():
-	return send_file("style.css")
+	return artifactResponse(staticAssets.byName.get("style.css"))
 
 
 @app.route("/script.js")
 def scriptRoute():
-	return send_file("../dist/script.js")
+	return artifactResponse(staticAssets.byName.get("script.js"))
 
 
 @app.route("/favicon.ico")
@@ -30,47 +105,83 @@ def robotsRoute():
 
 @app.route("/map")
 def mapRoute():
-	return send_file("generated/map.svg")
+	return generatedResponse("map.svg")
 
 
 @app.route("/polarGrid")
 def polarGridRoute():
-	return send_file("generated/polarGrid.svg")
+	return generatedResponse("polarGrid.svg")
 
 
 @app.route("/stats")
 def miscStatsRoute():
-	return send_file("generated/stats.svg")
+	return generatedResponse("stats.svg")
 
 
 @app.route("/snr-chart")
 def snrChartRoute():
-	return send_file("generated/snrChart.svg")
+	return generatedResponse("snrChart.svg")
 
 
 @app.route("/api/gnss")
 def satellitesRoute():
-	return send_file("generated/gnssData.json")
+	"""All GNSS data, or with ?since=<version> only what has changed since that version"""
+	since = request.args.get("since", type=int)
+	if since is not None:
+		delta = gnssDeltas.since(since)
+		if delta is not None:
+			return artifactResponse(delta)
+	# a client that's too far behind gets everything
+	return generatedResponse(FULL_FILE)
 
 
 @app.route("/api/wopr")
 def woprRoute():
-	return send_file("generated/wopr.json")
+	return generatedResponse("wopr.json")
+
+
+@app.route("/api/stream")
+def streamRoute():
+	"""Server-sent events with the GNSS data and panel versions, sent whenever either changes.
+	Clients turned away once there are too many streaming poll for updates instead
+	"""
+	if not liveUpdates.subscribe():
+		return Response("Too many clients streaming updates", status=503, mimetype="text/plain")
+
+	response = Response(liveUpdates.events(), mimetype="text/event-stream")
+	# also called when the client disconnects, and the server closes the stream
+	response.call_on_close(liveUpdates.unsubscribe)
+	response.cache_control.no_cache = True
+	# stop any reverse proxy holding back events until it has a full buffer
+	response.headers["X-Accel-Buffering"] = "no"
+	return response
+
+
+@app.route("/api/latency")
+def latencyRoute():
+	"""Histogram of how long requests to each route have taken, in this process"""
+	# not jsonify, as that sorts the buckets by name rather than keeping them in order
+	return Response(json.dumps(requestLatencies.toJSON()), mimetype="application/json")
+
+
+@app.route("/api/metrics")
+def metricsRoute():
+	return generatedResponse("metrics.json")
 
 
 @app.route("/continents.geojson")
 def continentsRoute():
-	return send_file("generated/continents.geojson")
+	return artifactResponse(staticAssets.byName.get("continents.geojson"))
 
 
 @app.route("/borders.geojson")
 def bordersRoute():
-	return send_file("generated/borders.geojson")
+	return artifactResponse(staticAssets.byName.get("borders.geojson"))
 
 
 @app.route("/palette.json")
 def paletteRoute():
-	return send_file("generated/palette.json")
+	return generatedResponse("palette.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+from typing import Any
+
+from flask import Flask
+from gunicorn.app.base import BaseApplication
+from gunicorn.workers.base import Worker
+
+from web.background import CONFIG, startGenerator
+from web.serve import app, liveUpdates
+from web.store import generatedFiles
+
+KEEPALIVE = 30
+"""Seconds an idle keep-alive connection is held open, so polling clients reuse their connection"""
+
+
+class WebServer(BaseApplication):
+	"""gunicorn serving the app from a single worker process, with a thread per connection"""
+
+	def __init__(self, application: Flask, options: dict[str, Any]):
+		self.application = application
+		self.options = options
+		super().__init__()
+
+	def init(self, parser: Any, opts: Any, args: Any):
+		"""Not used, as the config is set in load_config rather than parsed from the command line"""
+
+	def load_config(self):  # pylint: disable=invalid-name
+		for key, value in self.options.items():
+			self.cfg.set(key, value)
+
+	def load(self) -> Flask:
+		return self.application
+
+
+def startGeneratorInWorker(_worker: Worker):
+	"""Generate the files in the worker serving them, so they're handed over in memory. Started
+	after the worker is forked, as the MQTT and generator threads wouldn't survive the fork
+	"""
+	generatedFiles.writeToDisk = CONFIG.web.mirrorFilesToDisk
+	startGenerator(daemon=True)
+
+
+def main():
+	"""Serve the web app and generate its files, all from one process"""
+	config = CONFIG.web
+	if config.maxStreams >= config.threads:
+		msg = f"maxStreams ({config.maxStreams}) must be less than threads ({config.threads})"
+		raise ValueError(msg)
+	liveUpdates.maxSubscribers = config.maxStreams
+
+	WebServer(
+		app,
+		{
+			"bind": f"{config.host}:{config.port}",
+			# only one worker, as the generated files are shared in memory
+			"workers": 1,
+			# a thread per connection, as each client streaming live updates holds one (up to
+			# maxStreams of them)
+			"worker_class": "gthread",
+			"threads": config.threads,
+			"keepalive": KEEPALIVE,
+			"post_worker_init": startGeneratorInWorker,
+		},
+	).run()
+
+
+if __name__ == "__main__":
+	main()
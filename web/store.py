@@ -0,0 +1,128 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from misc.files import writeAtomically
+from web.compression import BROTLI_QUALITY, compress
+
+GENERATED_DIR = os.path.join(os.path.dirname(__file__), "generated")
+
+mimetypes.add_type("application/geo+json", ".geojson")
+
+
+@dataclass(frozen=True)
+class StoredArtifact:
+	"""A complete version of a generated file, never modified once stored"""
+
+	content: bytes
+	mimetype: str
+	version: int
+	"""Incremented each time the file changes, only meaningful within this process"""
+	etag: str
+	"""Hash of the content, so the same content has the same ETag in every process"""
+	brotliQuality: int = BROTLI_QUALITY
+	compressed: dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+	"""Content compressed with each encoding, so each version is only compressed once"""
+
+	def encoded(self, encoding: str) -> bytes:
+		"""Content compressed with the encoding, compressing it if it hasn't been already"""
+		compressed = self.compressed.get(encoding)
+		if compressed is None:
+			# two threads may both compress it, but will get the same result
+			compressed = compress(self.content, encoding, self.brotliQuality)
+			self.compressed[encoding] = compressed
+		return compressed
+
+
+class ArtifactStore:
+	"""Latest version of each generated file, held in memory so requests never read the disk or see
+	a half written file.
+
+	Files stored in this process are also written to the directory (unless writeToDisk is False)
+	with a write to a temporary file and rename, so anyone reading from disk only sees complete
+	files. Files not stored in this process (e.g. written by a separate generator process) are read
+	from the directory, and only read again once they are replaced.
+	"""
+
+	def __init__(self, directory: str, writeToDisk: bool = True):
+		self.directory = directory
+		self.writeToDisk = writeToDisk
+		self.lock = threading.Lock()
+		self.artifacts: dict[str, StoredArtifact] = {}
+		self.published: set[str] = set()
+		"""Files stored in this process, which don't need checking on disk"""
+		self.fileStamps: dict[str, tuple[int, int, int]] = {}
+		"""Inode, modification time, and size of each file when it was last read from disk"""
+		self.listeners: list[Callable[[str], None]] = []
+
+	def addListener(self, listener: Callable[[str], None]):
+		"""Call the listener with the file's name each time a file is stored in this process"""
+		self.listeners.append(listener)
+
+	def put(self, fileName: str, content: bytes) -> StoredArtifact:
+		"""Store a new version of the file, write it to disk, then tell any listeners"""
+		with self.lock:
+			artifact = self.newVersion(fileName, content)
+			self.published.add(fileName)
+			if self.writeToDisk:
+				writeAtomically(os.path.join(self.directory, fileName), content)
+		for listener in self.listeners:
+			listener(fileName)
+		return artifact
+
+	def get(self, fileName: str) -> StoredArtifact | None:
+		"""Latest version of the file, or None if it hasn't been generated"""
+		if fileName in self.published:
+			return self.artifacts[fileName]
+		with self.lock:
+			return self.reloadIfReplaced(fileName)
+
+	def newVersion(self, fileName: str, content: bytes) -> StoredArtifact:
+		"""Replace the file's artifact with the content as its next version"""
+		previous = self.artifacts.get(fileName)
+		artifact = storedArtifact(
+			fileName, content, previous.version + 1 if previous is not None else 1
+		)
+		self.artifacts[fileName] = artifact  # swapped as a single reference
+		return artifact
+
+	def reloadIfReplaced(self, fileName: str) -> StoredArtifact | None:
+		"""Read the file from disk if it was replaced since it was last read, otherwise return the
+		version already held
+		"""
+		path = os.path.join(self.directory, fileName)
+		try:
+			with open(path, "rb") as f:
+				stat = os.fstat(f.fileno())
+				stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+				if stamp == self.fileStamps.get(fileName):
+					return self.artifacts[fileName]
+				content = f.read()
+		except FileNotFoundError:
+			return self.artifacts.get(fileName)
+
+		self.fileStamps[fileName] = stamp
+		previous = self.artifacts.get(fileName)
+		if previous is not None and previous.content == content:
+			return previous
+		return self.newVersion(fileName, content)
+
+
+def storedArtifact(
+	fileName: str, content: bytes, version: int = 1, brotliQuality: int = BROTLI_QUALITY
+) -> StoredArtifact:
+	"""Artifact for the content, with the file's mimetype and a hash of the content as its ETag"""
+	return StoredArtifact(
+		content,
+		mimetypes.guess_type(fileName)[0] or "application/octet-stream",
+		version,
+		hashlib.blake2b(content, digest_size=16).hexdigest(),
+		brotliQuality,
+	)
+
+
+generatedFiles = ArtifactStore(GENERATED_DIR)
+"""Files generated for the web app, shared by the generator and server when in the same process"""